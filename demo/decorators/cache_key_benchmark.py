@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: cache_key_benchmark.py
+# @Desc: { 缓存 key 生成器基准测试 }
+# @Date: 2026/10/19 12:00
+import hashlib
+import timeit
+
+from py_tools.decorators.cache import CacheKeyBuilder
+
+
+def legacy_key_builder(func, args, kwargs):
+    """旧版本的 key 生成方式: str() 拼接参数后 sha256"""
+    param_args_str = ",".join([str(arg) for arg in args])
+    param_kwargs_str = ",".join(sorted([f"{k}:{v}" for k, v in kwargs.items()]))
+    hash_str = f"{func.__module__}:{func.__name__}:{param_args_str}:{param_kwargs_str}"
+    return hashlib.sha256(hash_str.encode()).hexdigest()
+
+
+def query_users(user_ids: list, filters: dict = None, page: int = 1, page_size: int = 20):
+    pass
+
+
+def main():
+    args = ([1, 2, 3, 4, 5],)
+    kwargs = {"filters": {"status": 1, "tags": ["a", "b"]}, "page": 2}
+    number = 100000
+
+    key_builders = {"legacy_sha256": legacy_key_builder}
+    for hash_algo in ["sha256", "md5", "blake2b", "xxhash"]:
+        try:
+            key_builders[hash_algo] = CacheKeyBuilder(hash_algo=hash_algo)
+        except ImportError:
+            print(f"{hash_algo} not installed, skip")
+
+    for name, key_builder in key_builders.items():
+        cost = timeit.timeit(lambda: key_builder(query_users, args, kwargs), number=number)
+        print(f"{name:<15} {cost / number * 1e6:.2f} us/op")
+
+    # 只比较哈希部分
+    hash_str = legacy_key_builder.__module__ * 10
+    for hash_algo in ["sha256", "md5", "blake2b", "xxhash"]:
+        try:
+            hash_func = CacheKeyBuilder(hash_algo=hash_algo).hash_func
+        except ImportError:
+            continue
+        cost = timeit.timeit(lambda: hash_func(hash_str.encode()), number=number)
+        print(f"hash {hash_algo:<10} {cost / number * 1e6:.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
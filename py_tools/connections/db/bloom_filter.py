@@ -0,0 +1,298 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { 布隆过滤器模块（防缓存穿透） }
+# @Date: 2026/10/19 18:00
+import hashlib
+import inspect
+import math
+import threading
+from typing import Any, AsyncIterable, Iterable, List, Tuple, Union
+
+from redis import Redis
+from redis import asyncio as aioredis
+
+
+def bloom_filter_size(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """
+    根据预计元素数量与误判率计算布隆过滤器的大小
+    m = -n * ln(p) / (ln2)^2，k = m / n * ln2
+
+    Args:
+        capacity: 预计元素数量 n
+        error_rate: 期望误判率 p，eg: 0.01
+
+    Returns: (位数组大小 m, 哈希函数个数 k)
+        eg: 100 万元素 1% 误判率约需 958 万位（1.14MB）、7 个哈希函数
+    """
+    if capacity <= 0 or not 0 < error_rate < 1:
+        raise ValueError("capacity must be positive and error_rate must be in (0, 1)")
+    num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def bloom_false_positive_rate(num_bits: int, num_hashes: int, count: int) -> float:
+    """
+    写入 count 个元素后的理论误判率 p = (1 - e^(-k * n / m))^k
+
+    Args:
+        num_bits: 位数组大小 m
+        num_hashes: 哈希函数个数 k
+        count: 已写入元素数量 n
+    """
+    return (1 - math.exp(-num_hashes * count / num_bits)) ** num_hashes
+
+
+class BaseBloomFilter(object):
+    """
+    布隆过滤器基类
+    判断不存在则一定不存在，判断存在则有 error_rate 的概率误判（不支持删除元素）
+    元素统一转成字符串后哈希，eg: 1 与 "1" 视为同一个元素
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: 预计元素数量，超过后误判率会升高
+            error_rate: 写入 capacity 个元素时的期望误判率
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits, self.num_hashes = bloom_filter_size(capacity, error_rate)
+
+    @property
+    def memory_bytes(self) -> int:
+        """位数组占用的内存大小"""
+        return (self.num_bits + 7) // 8
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        """写满 capacity 个元素时的理论误判率"""
+        return bloom_false_positive_rate(self.num_bits, self.num_hashes, self.capacity)
+
+    def offsets(self, item: Any) -> List[int]:
+        """元素对应的 k 个位偏移（双重哈希 h1 + i * h2 模拟 k 个哈希函数）"""
+        if not isinstance(item, bytes):
+            item = str(item).encode()
+        digest = hashlib.md5(item).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _fill_stats(self, bits_set: int) -> dict:
+        """根据已置位的数量估算元素数量与当前误判率"""
+        fill_ratio = bits_set / self.num_bits
+        if fill_ratio >= 1:
+            estimated_count = math.inf
+        else:
+            # n ≈ -m / k * ln(1 - X / m)
+            estimated_count = round(-self.num_bits / self.num_hashes * math.log(1 - fill_ratio))
+        return {
+            "capacity": self.capacity,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "memory_bytes": self.memory_bytes,
+            "bits_set": bits_set,
+            "estimated_count": estimated_count,
+            "expected_false_positive_rate": self.expected_false_positive_rate,
+            "false_positive_rate": fill_ratio**self.num_hashes,
+        }
+
+
+class BloomFilter(BaseBloomFilter):
+    """
+    进程内布隆过滤器（bytearray 位数组）
+
+    Examples:
+        bloom = BloomFilter(capacity=1000000, error_rate=0.001)
+        bloom.add_many([1, 2, 3])
+        bloom.contains(4)  # False 一定不存在
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.01):
+        super().__init__(capacity, error_rate)
+        self._bits = bytearray(self.memory_bytes)
+        self._lock = threading.Lock()
+
+    def add(self, item: Any):
+        self.add_many([item])
+
+    def add_many(self, items: Iterable[Any]) -> int:
+        """批量写入，返回写入的元素数量"""
+        count = 0
+        with self._lock:
+            for item in items:
+                for offset in self.offsets(item):
+                    self._bits[offset >> 3] |= 1 << (offset & 7)
+                count += 1
+        return count
+
+    def contains(self, item: Any) -> bool:
+        return all(self._bits[offset >> 3] & (1 << (offset & 7)) for offset in self.offsets(item))
+
+    def contains_many(self, items: Iterable[Any]) -> List[bool]:
+        return [self.contains(item) for item in items]
+
+    def __contains__(self, item: Any) -> bool:
+        return self.contains(item)
+
+    def clear(self):
+        with self._lock:
+            self._bits = bytearray(self.memory_bytes)
+
+    def stats(self) -> dict:
+        """大小、估算元素数量与当前误判率"""
+        bits_set = sum(bin(byte).count("1") for byte in self._bits)
+        return self._fill_stats(bits_set)
+
+
+class _RedisBloomFilterMixin(BaseBloomFilter):
+    """Redis 位图布隆过滤器公共处理，SETBIT、GETBIT 通过 pipeline 批量执行"""
+
+    def __init__(
+        self,
+        client: Union[Redis, aioredis.Redis],
+        key: str,
+        capacity: int = 1000000,
+        error_rate: float = 0.01,
+        batch_size: int = 1000,
+    ):
+        """
+        Args:
+            client: Redis 客户端
+            key: 位图的 key
+            capacity: 预计元素数量
+            error_rate: 期望误判率
+            batch_size: 每个 pipeline 处理的元素数量
+        """
+        super().__init__(capacity, error_rate)
+        if self.num_bits > 2**32:
+            raise ValueError("redis bitmap supports at most 2^32 bits, reduce capacity or increase error_rate")
+        self.client = client
+        self.key = key
+        self.batch_size = batch_size
+
+    def _batches(self, items: Iterable[Any]) -> Iterable[List[Any]]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _add_pipeline(self, items: List[Any]):
+        pipe = self.client.pipeline(transaction=False)
+        for item in items:
+            for offset in self.offsets(item):
+                pipe.setbit(self.key, offset, 1)
+        return pipe
+
+    def _contains_pipeline(self, items: List[Any]):
+        pipe = self.client.pipeline(transaction=False)
+        for item in items:
+            for offset in self.offsets(item):
+                pipe.getbit(self.key, offset)
+        return pipe
+
+    def _parse_contains(self, bits: list) -> List[bool]:
+        k = self.num_hashes
+        return [all(bits[i : i + k]) for i in range(0, len(bits), k)]
+
+
+class RedisBloomFilter(_RedisBloomFilterMixin):
+    """
+    Redis 位图布隆过滤器（同步客户端），多进程共享
+
+    Examples:
+        bloom = RedisBloomFilter(redis_client, "bloom:user_id", capacity=1000000)
+        bloom.add_many(user_ids)
+        bloom.contains_many([1, 2, 3])
+    """
+
+    def add(self, item: Any):
+        self.add_many([item])
+
+    def add_many(self, items: Iterable[Any]) -> int:
+        count = 0
+        for batch in self._batches(items):
+            self._add_pipeline(batch).execute()
+            count += len(batch)
+        return count
+
+    def contains(self, item: Any) -> bool:
+        return self.contains_many([item])[0]
+
+    def contains_many(self, items: Iterable[Any]) -> List[bool]:
+        rets = []
+        for batch in self._batches(items):
+            rets.extend(self._parse_contains(self._contains_pipeline(batch).execute()))
+        return rets
+
+    def clear(self):
+        self.client.delete(self.key)
+
+    def stats(self) -> dict:
+        return self._fill_stats(self.client.bitcount(self.key))
+
+
+class AsyncRedisBloomFilter(_RedisBloomFilterMixin):
+    """Redis 位图布隆过滤器（异步客户端）"""
+
+    async def add(self, item: Any):
+        await self.add_many([item])
+
+    async def add_many(self, items: Iterable[Any]) -> int:
+        count = 0
+        for batch in self._batches(items):
+            await self._add_pipeline(batch).execute()
+            count += len(batch)
+        return count
+
+    async def contains(self, item: Any) -> bool:
+        return (await self.contains_many([item]))[0]
+
+    async def contains_many(self, items: Iterable[Any]) -> List[bool]:
+        rets = []
+        for batch in self._batches(items):
+            rets.extend(self._parse_contains(await self._contains_pipeline(batch).execute()))
+        return rets
+
+    async def clear(self):
+        await self.client.delete(self.key)
+
+    async def stats(self) -> dict:
+        return self._fill_stats(await self.client.bitcount(self.key))
+
+
+async def populate_bloom_filter(
+    bloom_filter: BaseBloomFilter, id_batches: Union[AsyncIterable[List[Any]], Iterable[List[Any]]]
+) -> int:
+    """
+    批量写入布隆过滤器
+
+    Args:
+        bloom_filter: 布隆过滤器
+        id_batches: 分批的 key 来源，eg: UserManager().scan_ids(batch_size=5000)
+
+    Examples:
+        bloom = UserRedisManager.bloom_filter("user_id", capacity=10000000)
+        await populate_bloom_filter(bloom, UserManager().scan_ids())
+
+    Returns: 写入的元素数量
+    """
+
+    async def _add(batch):
+        ret = bloom_filter.add_many(batch)
+        return await ret if inspect.isawaitable(ret) else ret
+
+    count = 0
+    if isinstance(id_batches, AsyncIterable):
+        async for batch in id_batches:
+            count += await _add(batch)
+    else:
+        for batch in id_batches:
+            count += await _add(batch)
+    return count
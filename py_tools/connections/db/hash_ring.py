@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { 一致性哈希环模块 }
+# @Date: 2026/10/19 17:00
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class ConsistentHashRing(object):
+    """
+    一致性哈希环（带虚拟节点）
+    增删节点时只有约 1/N 的 key 需要迁移，用于多个缓存节点的客户端分片
+    """
+
+    def __init__(self, nodes: Iterable[str] = None, replicas: int = 160):
+        """
+        Args:
+            nodes: 节点名称列表
+            replicas: 每个节点的虚拟节点数量，越多 key 分布越均匀
+        """
+        self.replicas = replicas
+        self._ring: Dict[int, str] = {}
+        self._sorted_hashes: List[int] = []
+        for node in nodes or []:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(dict.fromkeys(self._ring.values()))
+
+    def add_node(self, node: str):
+        for i in range(self.replicas):
+            node_hash = self._hash(f"{node}#{i}")
+            self._ring[node_hash] = node
+            bisect.insort(self._sorted_hashes, node_hash)
+
+    def remove_node(self, node: str):
+        for i in range(self.replicas):
+            node_hash = self._hash(f"{node}#{i}")
+            if self._ring.pop(node_hash, None) is not None:
+                self._sorted_hashes.remove(node_hash)
+
+    def get_node(self, key) -> str:
+        """key 所在的节点"""
+        if not self._sorted_hashes:
+            raise ValueError("hash ring is empty")
+        if isinstance(key, bytes):
+            key = key.decode()
+        idx = bisect.bisect(self._sorted_hashes, self._hash(str(key))) % len(self._sorted_hashes)
+        return self._ring[self._sorted_hashes[idx]]
+
+    def group_keys(self, keys: Iterable[T]) -> Dict[str, List[T]]:
+        """按节点分组 key，保持每组内 key 的顺序"""
+        groups: Dict[str, List[T]] = {}
+        for key in keys:
+            groups.setdefault(self.get_node(key), []).append(key)
+        return groups
@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { 异步 Memcached 客户端模块 }
+# @Date: 2026/10/19 20:00
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from py_tools.connections.db.hash_ring import ConsistentHashRing
+
+# 值类型标记（flags），str 读取时解码
+FLAG_BYTES = 0
+FLAG_STR = 1
+
+
+class MemcacheError(Exception):
+    """Memcached 服务端返回错误"""
+
+
+class MemcacheConnectionPool(object):
+    """单个 Memcached 节点的异步连接池，连接按需创建，最多 pool_size 个"""
+
+    def __init__(self, host: str, port: int = 11211, pool_size: int = 10, timeout: float = 3):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        在运行中的事件循环里延迟创建信号量（Python 3.9 的 asyncio 原语创建时就绑定事件循环），
+        事件循环变化时（eg: 多次 asyncio.run）重新创建，旧循环的空闲连接不能复用直接丢弃
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._idle.clear()
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+            self._loop = loop
+        return self._semaphore
+
+    async def _acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        await self._get_semaphore().acquire()
+        try:
+            while self._idle:
+                reader, writer = self._idle.pop()
+                if not writer.is_closing():
+                    return reader, writer
+            return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def _release(self, conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter], discard: bool = False):
+        if discard:
+            conn[1].close()
+        else:
+            self._idle.append(conn)
+        self._semaphore.release()
+
+    async def execute(self, request: bytes, read_func) -> Any:
+        """
+        发送请求并读取响应，出错时丢弃连接（响应可能只读了一部分）
+        Args:
+            request: 完整的请求字节（可包含多条命令）
+            read_func: 读取响应的协程函数 read_func(reader)
+        """
+        conn = await self._acquire()
+        try:
+            conn[1].write(request)
+            ret = await asyncio.wait_for(read_func(conn[0]), self.timeout)
+        except BaseException:
+            self._release(conn, discard=True)
+            raise
+        self._release(conn)
+        return ret
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class AsyncMemcacheClient(object):
+    """
+    异步 Memcached 客户端（文本协议）
+    多个节点按一致性哈希分布 key，get_multi、set_multi 按节点分组，每个节点一次往返，多个节点并发执行
+
+    Examples:
+        client = AsyncMemcacheClient(["10.0.0.1:11211", "10.0.0.2:11211"], pool_size=20)
+        await client.set_multi({"a": "1", "b": b"2"}, ttl=60)
+        await client.get_multi(["a", "b"])  # {"a": "1", "b": b"2"}
+    """
+
+    def __init__(self, servers: List[str], pool_size: int = 10, timeout: float = 3, replicas: int = 160):
+        """
+        Args:
+            servers: 节点列表 eg: ["127.0.0.1:11211"]
+            pool_size: 每个节点的最大连接数
+            timeout: 连接与读取超时时间（秒）
+            replicas: 一致性哈希每个节点的虚拟节点数量
+        """
+        if not servers:
+            raise ValueError("memcache client requires at least one server")
+        self.pools: Dict[str, MemcacheConnectionPool] = {}
+        for server in servers:
+            host, _, port = server.partition(":")
+            self.pools[server] = MemcacheConnectionPool(host, int(port or 11211), pool_size=pool_size, timeout=timeout)
+        self.ring = ConsistentHashRing(self.pools, replicas=replicas)
+
+    @staticmethod
+    def _encode_key(key: str) -> bytes:
+        key = key.encode() if isinstance(key, str) else key
+        if len(key) > 250 or any(c <= 32 or c == 127 for c in key):
+            raise ValueError(f"invalid memcache key {key!r}")
+        return key
+
+    @staticmethod
+    def _encode_value(value: Union[str, bytes, int, float]) -> Tuple[bytes, int]:
+        if isinstance(value, bytes):
+            return value, FLAG_BYTES
+        return str(value).encode(), FLAG_STR
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("memcache connection closed")
+        line = line.rstrip(b"\r\n")
+        if line == b"ERROR" or line.startswith((b"CLIENT_ERROR", b"SERVER_ERROR")):
+            raise MemcacheError(line.decode(errors="replace"))
+        return line
+
+    @classmethod
+    async def _read_values(cls, reader: asyncio.StreamReader) -> Dict[str, Any]:
+        """读取 get 的响应 VALUE <key> <flags> <bytes>\\r\\n<data>\\r\\n ... END\\r\\n"""
+        values = {}
+        while True:
+            line = await cls._read_line(reader)
+            if line == b"END":
+                return values
+            _, key, flags, size = line.split(b" ")[:4]
+            data = (await reader.readexactly(int(size) + 2))[:-2]
+            values[key.decode()] = data.decode() if int(flags) == FLAG_STR else data
+
+    @classmethod
+    def _read_lines(cls, count: int):
+        async def _read(reader):
+            return [await cls._read_line(reader) for _ in range(count)]
+
+        return _read
+
+    async def _execute_nodes(self, node_requests: Dict[str, Tuple[bytes, Any]]) -> Dict[str, Any]:
+        """多个节点并发执行，出错的节点记录日志并返回异常"""
+        nodes = list(node_requests)
+        rets = await asyncio.gather(
+            *[self.pools[node].execute(*node_requests[node]) for node in nodes], return_exceptions=True
+        )
+        for node, ret in zip(nodes, rets):
+            if isinstance(ret, Exception):
+                logger.warning(f"memcache {node} error {ret!r}")
+        return dict(zip(nodes, rets))
+
+    async def get_multi(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        批量获取，节点异常时对应的 key 视为未命中
+        Returns: {key: value} 不存在的 key 不返回
+        """
+        node_requests = {
+            node: (b"get " + b" ".join(self._encode_key(key) for key in node_keys) + b"\r\n", self._read_values)
+            for node, node_keys in self.ring.group_keys(keys).items()
+        }
+        values = {}
+        for ret in (await self._execute_nodes(node_requests)).values():
+            if not isinstance(ret, Exception):
+                values.update(ret)
+        return values
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_multi([key])).get(key)
+
+    async def _store_multi(self, command: bytes, mapping: Dict[str, Any], ttl: int) -> Dict[str, bool]:
+        """存储命令按节点批量发送，返回每个 key 是否存储成功"""
+        node_requests, node_keys_map = {}, self.ring.group_keys(mapping)
+        for node, node_keys in node_keys_map.items():
+            request = bytearray()
+            for key in node_keys:
+                data, flags = self._encode_value(mapping[key])
+                request += b"%s %s %d %d %d\r\n%s\r\n" % (command, self._encode_key(key), flags, ttl, len(data), data)
+            node_requests[node] = (bytes(request), self._read_lines(len(node_keys)))
+
+        stored = {}
+        for node, ret in (await self._execute_nodes(node_requests)).items():
+            for i, key in enumerate(node_keys_map[node]):
+                stored[key] = not isinstance(ret, Exception) and ret[i] == b"STORED"
+        return stored
+
+    async def set_multi(self, mapping: Dict[str, Any], ttl: int = 0) -> List[str]:
+        """
+        批量设置
+        Args:
+            mapping: {key: value}，value 为 str、bytes 或数字
+            ttl: 过期时间（秒），0 不过期
+
+        Returns: 设置失败的 key 列表
+        """
+        stored = await self._store_multi(b"set", mapping, ttl)
+        return [key for key, ok in stored.items() if not ok]
+
+    async def set(self, key: str, value: Any, ttl: int = 0) -> bool:
+        return not await self.set_multi({key: value}, ttl)
+
+    async def add(self, key: str, value: Any, ttl: int = 0) -> bool:
+        """key 不存在时才设置"""
+        return (await self._store_multi(b"add", {key: value}, ttl))[key]
+
+    async def delete_multi(self, keys: List[str]) -> int:
+        """批量删除，返回删除的数量"""
+        node_keys_map = self.ring.group_keys(keys)
+        node_requests = {
+            node: (
+                b"".join(b"delete %s\r\n" % self._encode_key(key) for key in node_keys),
+                self._read_lines(len(node_keys)),
+            )
+            for node, node_keys in node_keys_map.items()
+        }
+        rets = await self._execute_nodes(node_requests)
+        return sum(ret.count(b"DELETED") for ret in rets.values() if not isinstance(ret, Exception))
+
+    async def delete(self, key: str) -> bool:
+        return await self.delete_multi([key]) == 1
+
+    async def close(self):
+        for pool in self.pools.values():
+            await pool.close()
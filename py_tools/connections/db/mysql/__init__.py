@@ -3,7 +3,16 @@
 # @Author: Hui
 # @Desc: { 模块描述 }
 # @Date: 2023/08/17 23:54
-from py_tools.connections.db.mysql.orm_model import BaseOrmTable, BaseOrmTableWithTS
-from py_tools.connections.db.mysql.client import SQLAlchemyManager, DBManager
+from py_tools.connections.db.mysql.orm_model import BaseOrmTable, BaseOrmTableWithTS, VersionColumns
+from py_tools.connections.db.mysql.client import SQLAlchemyManager, DBManager, ChangeBatch
+from py_tools.connections.db.mysql.reference_cache import ReferenceTableCache
 
-__all__ = ["SQLAlchemyManager", "DBManager", "BaseOrmTable", "BaseOrmTableWithTS"]
+__all__ = [
+    "SQLAlchemyManager",
+    "DBManager",
+    "BaseOrmTable",
+    "BaseOrmTableWithTS",
+    "VersionColumns",
+    "ChangeBatch",
+    "ReferenceTableCache",
+]
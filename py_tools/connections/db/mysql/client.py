@@ -4,14 +4,20 @@
 # @Desc: { 数据库连接客户端模块 }
 # @Date: 2023/08/17 23:57
 import asyncio
+import csv
 import functools
+import itertools
 import logging
+import os
+import random
+import tempfile
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Any, AsyncIterator, List, Type, TypeVar, Union
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Tuple, Type, TypeVar, Union
 
 from loguru import logger
-from sqlalchemy import Result, column, delete, func, select, text, update
+from sqlalchemy import Result, and_, column, delete, func, insert, literal, or_, select, text, update
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncEngine,
@@ -21,11 +27,23 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from py_tools.connections.db.mysql import BaseOrmTable
+from py_tools.exceptions import MaxRetryException
 from py_tools.meta_cls import SingletonMetaCls
 
 T_BaseOrmTable = TypeVar("T_BaseOrmTable", bound=BaseOrmTable)
 T_Hints = TypeVar("T_Hints")  # 用于修复被装饰的函数参数提示，让IDE有类型提示
 
+# 批量导入 csv 文件中的 NULL 标记
+BULK_LOAD_NULL = "\\N"
+
+
+class ChangeBatch(NamedTuple):
+    """增量变更批次"""
+
+    rows: List[BaseOrmTable]  # 新增或更新的记录
+    tombstones: List[int]  # 逻辑删除记录的主键id（墓碑）
+    watermark: Tuple[datetime, int]  # 下一批次的水位线 (updated_at, id)
+
 
 def with_session(method) -> T_Hints:
     """
@@ -296,6 +314,207 @@ class DBManager(metaclass=SingletonMetaCls):
 
         return table_objs
 
+    @with_session
+    async def bulk_load(
+        self,
+        rows_or_file: Union[Iterable[Union[T_BaseOrmTable, dict]], str, Path],
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        columns: List[str] = None,
+        chunk_size: int = 5000,
+        session: AsyncSession = None,
+    ) -> int:
+        """
+        大批量导入，使用数据库原生批量加载
+            - mysql: LOAD DATA LOCAL INFILE，需开启客户端 local_infile，
+              eg: init_mysql_engine(connect_args={"local_infile": True})，服务端 local_infile=ON
+            - postgresql(asyncpg): COPY
+            - 其他(sqlite): 分块 executemany
+        Args:
+            rows_or_file: 数据行迭代器（字典或orm实例，流式消费） 或 csv 文件路径
+                csv 文件首行为列名，NULL 值使用 \\N 表示，eg: ExcelUtil.list_to_csv() 导出的文件
+            orm_table: orm表映射类
+            columns: 导入的列名，默认取首行数据的键或 csv 表头
+            chunk_size: executemany 每批次的行数
+            session: 数据库会话对象，如果为 None，则通过装饰器在方法内部开启新的事务
+
+        Notes:
+            原生批量加载不经过 SQLAlchemy，列的 python 端默认值（mapped_column(default=...)，eg: created_at、updated_at）
+            在导入前填充到值为空的列，mysql 导入 csv 文件时同一批次使用相同的默认值
+
+        Examples:
+            await UserManager().bulk_load(({"username": f"hui{i}", "age": 18} for i in range(100000)))
+            await UserManager().bulk_load("users.csv")
+
+        Returns: 导入的行数
+        """
+        orm_table = orm_table or self.orm_table
+        conn = await session.connection()
+        dialect_name = conn.dialect.name
+        defaults = self._column_defaults(orm_table)
+
+        if isinstance(rows_or_file, (str, Path)):
+            csv_file = str(rows_or_file)
+            with open(csv_file, newline="", encoding="utf-8") as f:
+                columns = columns or next(csv.reader(f))
+
+            if dialect_name == "mysql":
+                default_values = {col: default() for col, default in defaults.items()}
+                return await self._mysql_load_data(
+                    csv_file, columns, orm_table=orm_table, session=session, default_values=default_values
+                )
+            elif dialect_name == "postgresql" and not defaults:
+                # COPY 文件无法填充默认值，有 python 端默认值时按行读取后 COPY
+                driver_conn = (await conn.get_raw_connection()).driver_connection
+                status = await driver_conn.copy_to_table(
+                    orm_table.__tablename__,
+                    source=csv_file,
+                    columns=columns,
+                    format="csv",
+                    header=True,
+                    null=BULK_LOAD_NULL,
+                )
+                return int(status.split()[-1])
+
+            rows = self._iter_csv_rows(csv_file, columns, orm_table)
+        else:
+            rows = (row.to_dict() if isinstance(row, BaseOrmTable) else row for row in rows_or_file)
+            if not columns:
+                # 预读首行获取列名
+                first_row = next(rows, None)
+                if first_row is None:
+                    return 0
+                columns = list(first_row)
+                rows = itertools.chain([first_row], rows)
+
+        columns = list(columns) + [col for col in defaults if col not in columns]
+        rows = self._fill_defaults(rows, defaults)
+        if dialect_name == "mysql":
+            fd, csv_file = tempfile.mkstemp(suffix=".csv")
+            try:
+                with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f, lineterminator="\n")
+                    writer.writerow(columns)
+                    for row in rows:
+                        writer.writerow([self._to_csv_value(row.get(col)) for col in columns])
+                return await self._mysql_load_data(csv_file, columns, orm_table=orm_table, session=session)
+            finally:
+                os.remove(csv_file)
+        elif dialect_name == "postgresql":
+            driver_conn = (await conn.get_raw_connection()).driver_connection
+            records = (tuple(row.get(col) for col in columns) for row in rows)
+            status = await driver_conn.copy_records_to_table(orm_table.__tablename__, records=records, columns=columns)
+            return int(status.split()[-1])
+
+        # 通用处理: 分块 executemany
+        load_count = 0
+        insert_sql = insert(orm_table.__table__)
+        while True:
+            chunk = [{col: row.get(col) for col in columns} for row in itertools.islice(rows, chunk_size)]
+            if not chunk:
+                break
+            await session.execute(insert_sql, chunk)
+            load_count += len(chunk)
+        return load_count
+
+    @staticmethod
+    def _column_defaults(orm_table: Type[BaseOrmTable]) -> Dict[str, Callable[[], Any]]:
+        """列的 python 端默认值（标量或无参函数），{列名: 生成默认值的函数}"""
+        defaults = {}
+        for table_column in orm_table.__table__.columns:
+            default = table_column.default
+            if default is None:
+                continue
+            if default.is_scalar:
+                defaults[table_column.name] = functools.partial(lambda value: value, default.arg)
+            elif default.is_callable:
+                # SQLAlchemy 将无参函数包装成接收执行上下文的函数
+                defaults[table_column.name] = functools.partial(default.arg, None)
+        return defaults
+
+    @staticmethod
+    def _fill_defaults(rows: Iterable[dict], defaults: Dict[str, Callable[[], Any]]) -> Iterable[dict]:
+        """填充值为空的默认值列（不修改原数据行）"""
+        for row in rows:
+            missing_cols = [col for col in defaults if row.get(col) is None]
+            if missing_cols:
+                row = {**row, **{col: defaults[col]() for col in missing_cols}}
+            yield row
+
+    @staticmethod
+    def _to_csv_value(value: Any) -> Any:
+        """转换成 csv 导入的字段值"""
+        if value is None:
+            return BULK_LOAD_NULL
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    @staticmethod
+    def _iter_csv_rows(csv_file: str, columns: List[str], orm_table: Type[BaseOrmTable]) -> Iterable[dict]:
+        """流式读取 csv 文件行，并按列类型转换字段值"""
+        python_types = {}
+        for col in columns:
+            try:
+                python_types[col] = orm_table.__table__.c[col].type.python_type
+            except NotImplementedError:
+                python_types[col] = str
+
+        def _parse(col, value):
+            if value == BULK_LOAD_NULL:
+                return None
+            python_type = python_types[col]
+            if python_type is bool:
+                return value.lower() in ("1", "true")
+            if python_type in (datetime, date):
+                return python_type.fromisoformat(value)
+            if python_type is int:
+                # pandas 导出含空值的整数列会变成浮点数, eg: 1.0
+                return int(float(value)) if "." in value else int(value)
+            if python_type is float:
+                return float(value)
+            return value
+
+        with open(csv_file, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)  # 跳过表头
+            for values in reader:
+                yield {col: _parse(col, value) for col, value in zip(columns, values)}
+
+    async def _mysql_load_data(
+        self,
+        csv_file: str,
+        columns: List[str],
+        *,
+        orm_table: Type[BaseOrmTable],
+        session: AsyncSession,
+        default_values: Dict[str, Any] = None,
+    ) -> int:
+        """mysql LOAD DATA LOCAL INFILE 导入 csv 文件，default_values 填充 csv 中为空或缺少的列"""
+        # 标准 csv 转义（不使用反斜杠转义），通过用户变量将 \N 转换成 NULL
+        default_values = default_values or {}
+        var_names = [f"@c{idx}" for idx in range(len(columns))]
+        params = {"csv_file": csv_file, "null_val": BULK_LOAD_NULL}
+        set_items = []
+        for col, var in zip(columns, var_names):
+            value_sql = f"NULLIF({var}, :null_val)"
+            if col in default_values:
+                params[f"default_{col}"] = default_values[col]
+                value_sql = f"COALESCE({value_sql}, :default_{col})"
+            set_items.append(f"`{col}` = {value_sql}")
+        for col, value in default_values.items():
+            if col not in columns:
+                params[f"default_{col}"] = value
+                set_items.append(f"`{col}` = :default_{col}")
+        set_clause = ", ".join(set_items)
+        load_sql = (
+            f"LOAD DATA LOCAL INFILE :csv_file INTO TABLE `{orm_table.__tablename__}` CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' IGNORE 1 LINES ({', '.join(var_names)}) SET {set_clause}"
+        )
+        cursor_result = await session.execute(text(load_sql), params)
+        return cursor_result.rowcount
+
     @with_session
     async def add(
         self, table_obj: [T_BaseOrmTable, dict], *, orm_table: Type[BaseOrmTable] = None, session: AsyncSession = None
@@ -572,6 +791,218 @@ class DBManager(metaclass=SingletonMetaCls):
             # [User(id=1, username="hui", age=18), User(id=2, username="dbk", age=18)
             return cursor_result.scalars().all() or []
 
+    async def changes_since(
+        self,
+        watermark: Union[datetime, Tuple[datetime, int]] = None,
+        batch_size: int = 500,
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        updated_field: str = "updated_at",
+        logic_field: str = "deleted_at",
+        session: AsyncSession = None,
+    ) -> AsyncIterator[ChangeBatch]:
+        """
+        增量变更拉取（基于 (updated_at, id) 的游标分页）
+        Args:
+            watermark: 水位线 (updated_at, id)，为 None 时从头拉取，仅传时间时包含该时刻的变更
+            batch_size: 每批次拉取数量
+            orm_table: orm表映射类，需包含更新时间与逻辑删除字段，例如 BaseOrmTableWithTS
+            updated_field: 更新时间字段 默认 updated_at
+            logic_field: 逻辑删除字段 默认 deleted_at
+            session: 数据库会话对象，如果为 None，则每批次单独开启事务
+
+        Examples:
+            watermark = None
+            async for batch in UserManager().changes_since(watermark, batch_size=1000):
+                sync_rows(batch.rows)
+                drop_ids(batch.tombstones)
+                watermark = batch.watermark  # 持久化水位线，下次从此处继续
+
+        Notes:
+            水位线依赖更新时间单调递增，长事务延迟提交的旧时间戳记录可能被跳过，可适当回退水位线重叠拉取
+            从头拉取（watermark 为 None）时调用方还没有任何记录，直接过滤逻辑删除的记录，tombstones 为空
+
+        Returns:
+            异步迭代 ChangeBatch(rows, tombstones, watermark)
+        """
+        orm_table = orm_table or self.orm_table
+        updated_col = getattr(orm_table, updated_field)
+        initial_load = watermark is None
+        if isinstance(watermark, datetime):
+            watermark = (watermark, 0)
+
+        while True:
+            conds = [getattr(orm_table, logic_field).is_(None)] if initial_load else []
+            if watermark:
+                wm_time, wm_id = watermark
+                conds.append(or_(updated_col > wm_time, and_(updated_col == wm_time, orm_table.id > wm_id)))
+
+            rows = await self.query_all(
+                orm_table=orm_table,
+                conds=conds,
+                orders=[updated_col, orm_table.id],
+                limit=batch_size,
+                session=session,
+            )
+            if not rows:
+                break
+
+            last_row = rows[-1]
+            watermark = (getattr(last_row, updated_field), last_row.id)
+
+            changed_rows, tombstones = [], []
+            for row in rows:
+                if getattr(row, logic_field) is not None:
+                    tombstones.append(row.id)
+                else:
+                    changed_rows.append(row)
+
+            yield ChangeBatch(rows=changed_rows, tombstones=tombstones, watermark=watermark)
+
+            if len(rows) < batch_size:
+                break
+
+    async def scan_ids(
+        self,
+        batch_size: int = 1000,
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        conds: list = None,
+        id_field: str = "id",
+        session: AsyncSession = None,
+    ) -> AsyncIterator[list]:
+        """
+        按主键游标分批扫描 id（WHERE id > last_id ORDER BY id LIMIT n），避免大 offset 深分页
+        Args:
+            batch_size: 每批次数量
+            orm_table: orm表映射类
+            conds: 过滤条件列表，eg: [UserTable.deleted_at.is_(None)]
+            id_field: 主键字段 默认 id
+            session: 数据库会话对象，如果为 None，则每批次单独开启事务
+
+        Examples:
+            async for user_ids in UserManager().scan_ids(batch_size=5000):
+                bloom_filter.add_many(user_ids)
+
+        Returns:
+            异步迭代每批次的 id 列表
+        """
+        orm_table = orm_table or self.orm_table
+        id_col = getattr(orm_table, id_field)
+        last_id = None
+        while True:
+            batch_conds = list(conds or [])
+            if last_id is not None:
+                batch_conds.append(id_col > last_id)
+
+            ids = await self.query_all(
+                cols=[id_col],
+                orm_table=orm_table,
+                conds=batch_conds,
+                orders=[id_col],
+                flat=True,
+                limit=batch_size,
+                session=session,
+            )
+            if not ids:
+                break
+
+            yield ids
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+
+    @with_session
+    async def query_subtree(
+        self,
+        root_id: int,
+        pid_field: str = "pid",
+        max_depth: int = None,
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        session: AsyncSession = None,
+    ) -> List[dict]:
+        """
+        递归查询子树（WITH RECURSIVE）
+        Args:
+            root_id: 子树根节点id
+            pid_field: 父级id字段 默认 pid
+            max_depth: 最大递归深度，根节点深度为 0，默认 None 不限制
+            orm_table: orm表映射类
+            session: 数据库会话对象，如果为 None，则通过装饰器在方法内部开启新的事务
+
+        Examples:
+            rows = await CategoryManager().query_subtree(root_id=1, max_depth=2)
+            rows => [{"id": 1, "pid": 0, ..., "depth": 0}, {"id": 2, "pid": 1, ..., "depth": 1}, ...]
+
+            # 直接构造树形结构
+            tree = tree_util.list_to_tree_dfs(rows, root_pid=rows[0]["pid"])
+
+        Returns: 按深度排序的字典列表，包含 depth 字段
+        """
+        orm_table = orm_table or self.orm_table
+        table = orm_table.__table__
+
+        # 锚点: 根节点; 递归: 父级id等于上一层节点id的子节点
+        tree_cte = (
+            select(*table.c, literal(0).label("depth")).where(table.c.id == root_id).cte("subtree", recursive=True)
+        )
+        child_table = table.alias("child")
+        recursive_sql = select(*child_table.c, (tree_cte.c.depth + 1).label("depth")).join(
+            tree_cte, child_table.c[pid_field] == tree_cte.c.id
+        )
+        if max_depth is not None:
+            recursive_sql = recursive_sql.where(tree_cte.c.depth < max_depth)
+
+        tree_cte = tree_cte.union_all(recursive_sql)
+        query_sql = select(tree_cte).order_by(tree_cte.c.depth, tree_cte.c.id)
+        cursor_result = await session.execute(query_sql)
+        return [dict(row) for row in cursor_result.mappings().all()]
+
+    @with_session
+    async def query_ancestors(
+        self,
+        node_id: int,
+        pid_field: str = "pid",
+        max_depth: int = None,
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        session: AsyncSession = None,
+    ) -> List[dict]:
+        """
+        递归查询祖先节点（WITH RECURSIVE）
+        Args:
+            node_id: 节点id
+            pid_field: 父级id字段 默认 pid
+            max_depth: 最大向上递归深度，节点自身深度为 0，默认 None 不限制
+            orm_table: orm表映射类
+            session: 数据库会话对象，如果为 None，则通过装饰器在方法内部开启新的事务
+
+        Examples:
+            rows = await CategoryManager().query_ancestors(node_id=5)
+            rows => [{"id": 5, "pid": 2, ..., "depth": 0}, {"id": 2, "pid": 1, ..., "depth": 1}, ...]
+
+        Returns: 从节点自身到根节点的字典列表，包含 depth 字段
+        """
+        orm_table = orm_table or self.orm_table
+        table = orm_table.__table__
+
+        # 锚点: 节点自身; 递归: id等于下一层节点父级id的父节点
+        tree_cte = (
+            select(*table.c, literal(0).label("depth")).where(table.c.id == node_id).cte("ancestors", recursive=True)
+        )
+        parent_table = table.alias("parent")
+        recursive_sql = select(*parent_table.c, (tree_cte.c.depth + 1).label("depth")).join(
+            tree_cte, parent_table.c.id == tree_cte.c[pid_field]
+        )
+        if max_depth is not None:
+            recursive_sql = recursive_sql.where(tree_cte.c.depth < max_depth)
+
+        tree_cte = tree_cte.union_all(recursive_sql)
+        query_sql = select(tree_cte).order_by(tree_cte.c.depth)
+        cursor_result = await session.execute(query_sql)
+        return [dict(row) for row in cursor_result.mappings().all()]
+
     async def list_page(
         self,
         cols: list = None,
@@ -658,6 +1089,95 @@ class DBManager(metaclass=SingletonMetaCls):
         cursor_result = await session.execute(sql)
         return cursor_result.rowcount
 
+    @with_session
+    async def update_if_version(
+        self,
+        pk_id: int,
+        expected_version: int,
+        values: dict,
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        version_field: str = "version",
+        session: AsyncSession = None,
+    ) -> bool:
+        """
+        乐观锁更新，版本号一致时才更新并将版本号 +1
+        Args:
+            pk_id: 主键id
+            expected_version: 期望的版本号（读取时的版本号）
+            values: 要更新的字段和对应的值
+            orm_table: ORM表映射类，需包含版本号列，eg: class InventoryTable(BaseOrmTable, VersionColumns)
+            version_field: 版本号字段 默认 version
+            session: 数据库会话对象，如果为 None，则在方法内部开启新的事务
+
+        Examples:
+            sql => update inventory set stock=9, version=version+1 where id=1 and version=3
+
+        Returns: 是否更新成功，False 表示版本冲突（或记录不存在）
+        """
+        orm_table = orm_table or self.orm_table
+        version_col = getattr(orm_table, version_field)
+        values = {**values, version_field: version_col + 1}
+        sql = update(orm_table).where(orm_table.id == pk_id, version_col == expected_version).values(**values)
+        cursor_result = await session.execute(sql)
+        return cursor_result.rowcount == 1
+
+    async def update_with_version_retry(
+        self,
+        pk_id: int,
+        update_func: Callable[[T_BaseOrmTable], dict],
+        *,
+        orm_table: Type[BaseOrmTable] = None,
+        version_field: str = "version",
+        max_retry: int = 5,
+        interval: float = 0.05,
+    ) -> bool:
+        """
+        乐观锁读取-计算-更新循环，版本冲突时重新读取重试
+        每次尝试都是独立的短事务，读取不加锁，只有最后的条件更新会短暂持有行锁
+        Args:
+            pk_id: 主键id
+            update_func: 根据当前记录计算要更新的值，返回空则不更新
+                eg: lambda row: {"stock": row.stock - 1}
+            orm_table: ORM表映射类
+            version_field: 版本号字段 默认 version
+            max_retry: 最大重试次数
+            interval: 冲突后随机退避的最大间隔（秒）
+
+        Raises:
+            MaxRetryException
+
+        Returns: 是否更新，记录不存在或 update_func 返回空时为 False
+        """
+        orm_table = orm_table or self.orm_table
+        for _ in range(max_retry):
+            # 每次重试使用新的事务，避免读取到旧的快照
+            async with self.transaction() as session:
+                row = await self.query_by_id(pk_id, orm_table=orm_table, session=session)
+                if not row:
+                    return False
+
+                values = update_func(row)
+                if asyncio.iscoroutine(values):
+                    values = await values
+                if not values:
+                    return False
+
+                updated = await self.update_if_version(
+                    pk_id,
+                    getattr(row, version_field),
+                    values,
+                    orm_table=orm_table,
+                    version_field=version_field,
+                    session=session,
+                )
+            if updated:
+                return True
+
+            await asyncio.sleep(random.uniform(0, interval))
+
+        raise MaxRetryException(f"乐观锁更新冲突超过最大重试次数, max_retry_count {max_retry}")
+
     @with_session
     async def update_or_add(
         self,
@@ -55,5 +55,13 @@ class TimestampColumns(AsyncAttrs, DeclarativeBase):
     deleted_at: Mapped[datetime] = mapped_column(nullable=True, comment="删除时间")
 
 
+class VersionColumns(AsyncAttrs, DeclarativeBase):
+    """乐观锁版本号列"""
+
+    __abstract__ = True
+
+    version: Mapped[int] = mapped_column(default=0, comment="版本号")
+
+
 class BaseOrmTableWithTS(BaseOrmTable, TimestampColumns):
     __abstract__ = True
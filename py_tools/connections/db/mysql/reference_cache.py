@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { 参照表进程内缓存模块 }
+# @Date: 2026/10/19 10:30
+import asyncio
+import logging
+from typing import Any, Dict, List, Type, Union
+
+from loguru import logger
+
+from py_tools.connections.db.mysql.client import DBManager, T_BaseOrmTable
+
+
+class ReferenceTableCache:
+    """
+    小型参照表（枚举、地区、配置等）的进程内只读镜像
+    全量加载到内存并按主键、唯一列建立索引，查询同步 O(1) 不占用连接池，
+    后台基于 updated_at 水位线增量刷新
+    """
+
+    def __init__(
+        self,
+        db_manager_cls: Type[DBManager],
+        unique_fields: List[str] = None,
+        refresh_interval: int = 60,
+        updated_field: str = "updated_at",
+        logic_field: str = "deleted_at",
+        log: Union[logging.Logger] = None,
+    ):
+        """
+        Args:
+            db_manager_cls: DBManager 子类，需指定 orm_table
+            unique_fields: 需要建立索引的唯一列，例如 ["code"]
+            refresh_interval: 后台刷新间隔（秒）
+            updated_field: 更新时间字段，表没有该字段时每次刷新全量重新加载
+            logic_field: 逻辑删除字段，表有该字段时不加载逻辑删除的记录
+            log: 日志对象
+        """
+        self.db_manager_cls = db_manager_cls
+        self.orm_table = db_manager_cls.orm_table
+        self.unique_fields = unique_fields or []
+        self.refresh_interval = refresh_interval
+        self.updated_field = updated_field
+        self.logic_field = logic_field
+        self.log = log or logger
+
+        self.watermark = None
+        self._rows: Dict[Any, T_BaseOrmTable] = {}
+        self._unique_index: Dict[str, Dict[Any, T_BaseOrmTable]] = {field: {} for field in self.unique_fields}
+        self._refresh_task: asyncio.Task = None
+
+    @property
+    def incremental(self) -> bool:
+        """是否支持水位线增量刷新"""
+        return hasattr(self.orm_table, self.updated_field)
+
+    def _build_index(self, rows: Dict[Any, T_BaseOrmTable]):
+        """构建唯一列索引并整体替换（写时复制，读取无需加锁）"""
+        unique_index = {field: {} for field in self.unique_fields}
+        for row in rows.values():
+            for field, index in unique_index.items():
+                index[getattr(row, field)] = row
+
+        self._rows, self._unique_index = rows, unique_index
+
+    async def load(self):
+        """全量加载"""
+        rows = {}
+        if self.incremental:
+            watermark = None
+            async for batch in self.db_manager_cls().changes_since(
+                watermark, updated_field=self.updated_field, logic_field=self.logic_field
+            ):
+                rows.update({row.id: row for row in batch.rows})
+                watermark = batch.watermark
+            self.watermark = watermark
+        else:
+            logic_col = getattr(self.orm_table, self.logic_field, None)
+            conds = [logic_col.is_(None)] if logic_col is not None else []
+            rows = {row.id: row for row in await self.db_manager_cls().query_all(conds=conds)}
+
+        self._build_index(rows)
+        self.log.debug(f"{self.orm_table.__tablename__} reference cache loaded, count {len(rows)}")
+        return len(rows)
+
+    async def refresh(self):
+        """
+        增量刷新，只拉取水位线之后的变更并应用到镜像
+
+        Notes:
+            物理删除无法通过水位线感知，如果参照表存在物理删除需定期调用 load() 全量加载
+
+        Returns: 变更的记录数
+        """
+        if not self.incremental or self.watermark is None:
+            return await self.load()
+
+        rows = None
+        change_count = 0
+        async for batch in self.db_manager_cls().changes_since(
+            self.watermark, updated_field=self.updated_field, logic_field=self.logic_field
+        ):
+            rows = rows if rows is not None else dict(self._rows)
+            rows.update({row.id: row for row in batch.rows})
+            for pk_id in batch.tombstones:
+                rows.pop(pk_id, None)
+            change_count += len(batch.rows) + len(batch.tombstones)
+            self.watermark = batch.watermark
+
+        if rows is not None:
+            self._build_index(rows)
+        return change_count
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.log.error(f"{self.orm_table.__tablename__} reference cache refresh error {e}")
+
+    def start_refresh(self) -> asyncio.Task:
+        """开启后台定时刷新"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._refresh_task
+
+    async def stop_refresh(self):
+        """停止后台刷新"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def get(self, pk_id: Any, default: Any = None) -> Union[T_BaseOrmTable, Any]:
+        """根据主键id查询"""
+        return self._rows.get(pk_id, default)
+
+    def get_by(self, field: str, value: Any, default: Any = None) -> Union[T_BaseOrmTable, Any]:
+        """根据唯一列查询"""
+        if field not in self._unique_index:
+            raise ValueError(f"{field} not in unique_fields {self.unique_fields}")
+        return self._unique_index[field].get(value, default)
+
+    def all(self) -> List[T_BaseOrmTable]:
+        """全部记录"""
+        return list(self._rows.values())
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, pk_id):
+        return pk_id in self._rows
@@ -3,21 +3,177 @@
 # @Author: Hui
 # @Desc: { redis连接处理模块 }
 # @Date: 2023/05/03 21:13
+import asyncio
+import functools
+import itertools
 from datetime import timedelta
-from typing import Optional, Union
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional, Tuple, Union
 
 from redis import Redis
 from redis import asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.cluster import RedisCluster
 
 from py_tools import constants
-from py_tools.decorators.cache import AsyncRedisCacheProxy, CacheMeta, RedisCacheProxy, cache_json
+from py_tools.connections.db.bloom_filter import AsyncRedisBloomFilter, BaseBloomFilter, RedisBloomFilter
+from py_tools.connections.db.redis_script import AsyncScriptRegistry, ScriptRegistry
+from py_tools.connections.db.redis_shard import AsyncShardedRedis, ShardedRedis
+from py_tools.connections.mq.redis_stream import AsyncRedisStreamQueue, RedisStreamQueue
+from py_tools.decorators.cache import (
+    DEFAULT_KEY_BUILDER,
+    AsyncRedisCacheProxy,
+    AsyncTrackingCacheProxy,
+    BaseCacheCodec,
+    BaseCacheCompressor,
+    CacheMeta,
+    CacheSerializer,
+    RedisCacheProxy,
+    TrackingCacheProxy,
+    cache_json,
+    cache_json_batch,
+)
+
+# key 存在时才更新 Hash 字段，返回 -1 表示 key 不存在
+HSET_IF_EXISTS_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 1 then
+    return redis.call("hset", KEYS[1], unpack(ARGV))
+end
+return -1
+"""
+
+# 空 dict 缓存为只有该标记字段的 Hash（Redis 不能保存空 Hash），读取时去掉
+HASH_EMPTY_FIELD = "__py_tools_empty__"
+
+
+class AutoPipelineRedis:
+    """
+    异步 Redis 自动 pipeline 客户端
+    同一次事件循环迭代内（或 flush_delay 时间窗口内）不同协程发出的命令合并为一个 pipeline 发送，
+    一次往返后分别设置每个调用者的结果，高并发扇入时显著减少网络往返
+    未在 AUTO_PIPELINE_COMMANDS 中的命令（pipeline、pubsub、阻塞命令等）直接透传给原客户端
+    """
+
+    AUTO_PIPELINE_COMMANDS = frozenset(
+        {
+            "get", "set", "setex", "setnx", "psetex", "mget", "mset", "getdel", "getex", "incr", "incrby",
+            "decr", "decrby", "delete", "unlink", "exists", "expire", "pexpire", "ttl", "pttl", "type",
+            "hget", "hmget", "hgetall", "hset", "hdel", "hexists", "hincrby", "hlen", "hkeys", "hvals",
+            "lpush", "rpush", "lpop", "rpop", "lrange", "llen", "ltrim", "lindex",
+            "sadd", "srem", "smembers", "sismember", "smismember", "scard",
+            "zadd", "zrem", "zscore", "zincrby", "zrange", "zrangebyscore", "zcard", "zrank",
+            "eval", "evalsha", "publish", "xadd", "xack",
+        }
+    )  # fmt: skip
+
+    def __init__(self, client: aioredis.Redis, max_batch: int = 1000, flush_delay: float = 0):
+        """
+        Args:
+            client: 异步 Redis 客户端
+            max_batch: 单个 pipeline 最多的命令数量，超过后立即发送
+            flush_delay: 收集命令的时间窗口（秒），默认 0 表示当前事件循环迭代结束时发送
+        """
+        self.client = client
+        self.max_batch = max_batch
+        self.flush_delay = flush_delay
+        self.pipeline_count = 0  # 已发送的 pipeline 数量
+        self.command_count = 0  # 已发送的命令数量
+        self._pending: List[Tuple[str, tuple, dict, asyncio.Future]] = []
+        self._flush_handle: asyncio.Handle = None
+        self._tasks = set()
+
+    def __getattr__(self, name):
+        if name in self.AUTO_PIPELINE_COMMANDS:
+            return functools.partial(self._enqueue, name)
+        return getattr(self.client, name)
+
+    def _enqueue(self, command: str, *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((command, args, kwargs, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.flush_delay:
+                self._flush_handle = loop.call_later(self.flush_delay, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        """发送当前收集的命令"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._execute(batch))
+            self._tasks.add(task)  # 保持任务引用，避免被垃圾回收
+            task.add_done_callback(self._tasks.discard)
+
+    @property
+    def wrapped_client(self) -> aioredis.Redis:
+        """被包装的原始客户端（集群判断等需要真实客户端类型）"""
+        return self.client
+
+    async def _execute(self, batch: List[Tuple[str, tuple, dict, asyncio.Future]]):
+        futures = []
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for command, args, kwargs, future in batch:
+                try:
+                    getattr(pipe, command)(*args, **kwargs)
+                except Exception as e:
+                    # 参数校验失败（如 DataError）在构建命令时抛出，只影响对应的调用者
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                futures.append(future)
+
+            self.pipeline_count += 1
+            self.command_count += len(futures)
+            rets = await pipe.execute(raise_on_error=False) if futures else []
+        except BaseException as e:
+            # 任何异常都要通知未完成的调用者，否则调用者永远等待
+            for *_, future in batch:
+                if future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for future, ret in zip(futures, rets):
+            if future.done():
+                continue  # 调用方已取消
+            if isinstance(ret, Exception):
+                future.set_exception(ret)
+            else:
+                future.set_result(ret)
+
+    async def flush(self):
+        """立即发送收集的命令并等待所有 pipeline 完成"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def aclose(self):
+        await self.flush()
+        await self.client.aclose()
 
 
 class BaseRedisManager:
     """Redis客户端管理器"""
 
-    client: Union[Redis, aioredis.Redis] = None
+    client: Union[
+        Redis, aioredis.Redis, AutoPipelineRedis, RedisCluster, AsyncRedisCluster, ShardedRedis, AsyncShardedRedis
+    ] = None
     cache_key_prefix = constants.CACHE_KEY_PREFIX
+    client_cache: Union[TrackingCacheProxy, AsyncTrackingCacheProxy] = None
+    script_registry: Union[ScriptRegistry, AsyncScriptRegistry] = None
+    typed_serializer = CacheSerializer()  # Hash 字段、List、Set 元素的序列化器
 
     @classmethod
     def init_redis_client(
@@ -28,7 +184,10 @@ class BaseRedisManager:
         db: int = 0,
         password: Optional[str] = None,
         max_connections: Optional[int] = None,
-        **kwargs
+        auto_pipeline: bool = False,
+        cluster: bool = False,
+        shard_nodes: Optional[List[dict]] = None,
+        **kwargs,
     ):
         """
         初始化 Redis 客户端。
@@ -40,19 +199,37 @@ class BaseRedisManager:
             db (int): 要连接的数据库编号，默认为 0
             password (Optional[str]): 密码可选
             max_connections (Optional[int]): 最大连接数。默认为 None（不限制连接数）
+            auto_pipeline (bool): 异步客户端是否自动合并并发命令为 pipeline（AutoPipelineRedis），默认为 False
+            cluster (bool): 是否连接 Redis Cluster（host、port 为任一集群节点），默认为 False
+            shard_nodes (Optional[List[dict]]): 多个独立节点的连接参数，按一致性哈希做客户端分片（ShardedRedis）
+                eg: [{"host": "10.0.0.1", "port": 6379}, {"host": "10.0.0.2", "port": 6379}]
             **kwargs: 传递给 Redis 客户端的其他参数
 
         Returns:
             None
         """
         if cls.client is None:
-            redis_client_cls = Redis
-            if async_client:
-                redis_client_cls = aioredis.Redis
+            if cluster:
+                # 集群只有 db 0，多 key 命令由缓存代理按 slot 拆分
+                cluster_cls = AsyncRedisCluster if async_client else RedisCluster
+                if max_connections:
+                    kwargs["max_connections"] = max_connections
+                cls.client = cluster_cls(host=host, port=port, password=password, **kwargs)
+            elif shard_nodes:
+                sharded_cls = AsyncShardedRedis if async_client else ShardedRedis
+                cls.client = sharded_cls.from_nodes(
+                    shard_nodes, password=password, max_connections=max_connections, **kwargs
+                )
+            else:
+                redis_client_cls = Redis
+                if async_client:
+                    redis_client_cls = aioredis.Redis
 
-            cls.client = redis_client_cls(
-                host=host, port=port, db=db, password=password, max_connections=max_connections, **kwargs
-            )
+                cls.client = redis_client_cls(
+                    host=host, port=port, db=db, password=password, max_connections=max_connections, **kwargs
+                )
+            if async_client and auto_pipeline:
+                cls.client = AutoPipelineRedis(cls.client)
 
         return cls.client
 
@@ -61,13 +238,45 @@ class BaseRedisManager:
         cls,
         ttl: Union[int, timedelta] = 60,
         key_prefix: str = None,
+        single_flight: bool = True,
+        distributed_lock: bool = False,
+        lock_ttl: int = 10,
+        codec: Union[str, BaseCacheCodec] = "json",
+        compress: Union[str, BaseCacheCompressor] = None,
+        compress_threshold: int = 1024,
+        key_builder: Callable[[Callable, tuple, dict], str] = DEFAULT_KEY_BUILDER,
+        stale_ttl: int = 0,
+        ttl_jitter: float = 0,
+        early_refresh_beta: float = 0,
+        negative_ttl: int = None,
+        tags: Callable[..., List[str]] = None,
+        metrics: bool = False,
+        bloom_filter: BaseBloomFilter = None,
+        bloom_key: Callable[..., Any] = None,
+        warm_up_args: Callable[[], Union[Iterable, AsyncIterable]] = None,
     ):
         """
-        缓存装饰器（仅支持缓存能够json序列化的数据）
+        缓存装饰器（默认 json 序列化，可通过 codec 指定 orjson、msgpack、pickle）
         缓存函数整体结果
         Args:
             ttl: 过期时间 默认60s
             key_prefix: 默认的key前缀, 再未指定key时使用
+            single_flight: 进程内同一个key并发未命中时只执行一次函数
+            distributed_lock: 使用 Redis SET NX 锁跨进程单飞，整个集群只执行一次函数
+            lock_ttl: 分布式锁过期时间
+            codec: 编解码器 json、orjson、msgpack、pickle
+            compress: 压缩方式 zlib、zstd，默认不压缩
+            compress_threshold: 编码后超过该字节数才压缩
+            key_builder: 缓存 key 生成器，eg: CacheKeyBuilder(ignore_args=["self"])
+            stale_ttl: 过期后仍返回旧值并后台刷新的时间窗口（秒）
+            ttl_jitter: 过期时间随机抖动比例
+            early_refresh_beta: 概率提前刷新系数（XFetch）
+            negative_ttl: 结果为 None 或空时的过期时间，默认与 ttl 相同
+            tags: 根据函数参数生成缓存标签的函数，配合 invalidate_tags 精确失效
+            metrics: 是否统计缓存指标，通过 cache_stats() 查看
+            bloom_filter: 布隆过滤器，判断一定不存在时直接返回 None，eg: cls.bloom_filter("user_id")
+            bloom_key: 根据函数参数生成布隆过滤器元素的函数，默认取函数的第一个参数
+            warm_up_args: 预热参数生成函数，注册后通过 warm_up() 预热缓存
 
         Returns:
         """
@@ -75,8 +284,431 @@ class BaseRedisManager:
         if isinstance(ttl, timedelta):
             ttl = int(ttl.total_seconds())
 
-        cache_proxy = RedisCacheProxy(cls.client)
-        if isinstance(cls.client, aioredis.Redis):
-            cache_proxy = AsyncRedisCacheProxy(cls.client)
+        return cache_json(
+            cache_proxy=cls._cache_proxy(),
+            key_prefix=key_prefix,
+            ttl=ttl,
+            single_flight=single_flight,
+            distributed_lock=distributed_lock,
+            lock_ttl=lock_ttl,
+            codec=codec,
+            compress=compress,
+            compress_threshold=compress_threshold,
+            key_builder=key_builder,
+            stale_ttl=stale_ttl,
+            ttl_jitter=ttl_jitter,
+            early_refresh_beta=early_refresh_beta,
+            negative_ttl=negative_ttl,
+            tags=tags,
+            metrics=metrics,
+            bloom_filter=bloom_filter,
+            bloom_key=bloom_key,
+            warm_up_args=warm_up_args,
+        )
+
+    @classmethod
+    def invalidate_tags(cls, tags: List[str], key_prefix: str = None):
+        """
+        删除标签下的所有缓存（异步客户端返回协程需要 await）
+        Args:
+            tags: 标签列表
+            key_prefix: 与 cache_json 的 key_prefix 相同，默认为 cls.cache_key_prefix
+
+        Returns: 删除的缓存 key 数量
+        """
+        return cls._cache_proxy().invalidate_tags(tags, key_prefix=key_prefix or cls.cache_key_prefix)
+
+    @classmethod
+    def enable_client_cache(
+        cls, prefixes: List[str] = None, maxsize: int = 1024, local_ttl: int = 0
+    ) -> Union[TrackingCacheProxy, AsyncTrackingCacheProxy]:
+        """
+        开启客户端缓存（Redis 6+ CLIENT TRACKING 广播模式），跟踪前缀下的 key 读取后保存在进程内存，
+        直到服务端推送失效消息，热点 key（eg: 配置）读取没有网络开销，开启后 cache_json 也通过本地缓存读取
+        Args:
+            prefixes: 跟踪的 key 前缀列表，默认为 cache_json 的 key 前缀
+            maxsize: 本地缓存最大数量
+            local_ttl: 本地缓存最长有效期（秒），0 表示只依赖失效消息
+
+        Notes:
+            需要 Redis 6+ 单机客户端，集群、分片客户端不支持
+
+        Examples:
+            RedisManager.enable_client_cache(prefixes=["config:"])
+            RedisManager.client_cache.get("config:feature_flags")
+
+        Returns: 客户端缓存代理
+        """
+        if cls.client_cache is None:
+            prefixes = prefixes or [f"{cls.cache_key_prefix}:cache_json"]
+            if cls._is_async_client():
+                cls.client_cache = AsyncTrackingCacheProxy(cls.client, prefixes, maxsize=maxsize, local_ttl=local_ttl)
+            else:
+                cls.client_cache = TrackingCacheProxy(cls.client, prefixes, maxsize=maxsize, local_ttl=local_ttl)
+        return cls.client_cache
+
+    @classmethod
+    def _cache_proxy(cls):
+        if cls.client_cache is not None:
+            return cls.client_cache
+        if cls._is_async_client():
+            return AsyncRedisCacheProxy(cls.client)
+        return RedisCacheProxy(cls.client)
+
+    @classmethod
+    def cache_json_batch(
+        cls,
+        ttl: Union[int, timedelta] = 60,
+        key_prefix: str = None,
+        ids_arg: str = None,
+        negative_ttl: int = None,
+        codec: Union[str, BaseCacheCodec] = "json",
+        compress: Union[str, BaseCacheCompressor] = None,
+        compress_threshold: int = 1024,
+        key_builder: Callable[[Callable, tuple, dict], str] = DEFAULT_KEY_BUILDER,
+        metrics: bool = False,
+        bloom_filter: BaseBloomFilter = None,
+    ):
+        """
+        批量缓存装饰器，按 id 逐个缓存 func(ids, ...) -> {id: value} 的结果
+        MGET 批量获取，只对未命中的 id 执行函数，pipeline SETEX 批量写回
+        Args:
+            ttl: 过期时间 默认60s
+            key_prefix: 默认的key前缀, 再未指定key时使用
+            ids_arg: id 列表参数名，默认函数的第一个参数
+            negative_ttl: 不存在的 id 的过期时间，默认与 ttl 相同
+            codec: 编解码器 json、orjson、msgpack、pickle
+            compress: 压缩方式 zlib、zstd，默认不压缩
+            compress_threshold: 编码后超过该字节数才压缩
+            key_builder: 缓存 key 生成器
+            metrics: 是否统计缓存指标
+            bloom_filter: 布隆过滤器，一定不存在的 id 不查缓存也不传给函数
+
+        Returns:
+        """
+        return cache_json_batch(
+            cache_proxy=cls._cache_proxy(),
+            key_prefix=key_prefix or cls.cache_key_prefix,
+            ttl=ttl,
+            ids_arg=ids_arg,
+            negative_ttl=negative_ttl,
+            codec=codec,
+            compress=compress,
+            compress_threshold=compress_threshold,
+            key_builder=key_builder,
+            metrics=metrics,
+            bloom_filter=bloom_filter,
+        )
+
+    @classmethod
+    def bloom_filter(
+        cls, name: str, capacity: int = 1000000, error_rate: float = 0.01, batch_size: int = 1000
+    ) -> Union[RedisBloomFilter, AsyncRedisBloomFilter]:
+        """
+        Redis 位图布隆过滤器，防止不存在的 key 穿透缓存
+        位数组大小 m = -n * ln(p) / (ln2)^2，哈希函数个数 k = m / n * ln2，
+        eg: 1000 万元素 1% 误判率约 11.4MB、7 个哈希函数，0.1% 误判率约 17.1MB、10 个哈希函数
+        Args:
+            name: 过滤器名称，eg: user_id
+            capacity: 预计元素数量，超过后误判率升高，需要重建
+            error_rate: 期望误判率
+            batch_size: 每个 pipeline 处理的元素数量
+
+        Examples:
+            user_bloom = RedisManager.bloom_filter("user_id", capacity=10000000)
+            await populate_bloom_filter(user_bloom, UserManager().scan_ids())
+
+            @RedisManager.cache_json(ttl=60, bloom_filter=user_bloom)
+            async def get_user(user_id):
+                return await UserManager().query_by_id(user_id)
+
+        Returns: 异步客户端返回 AsyncRedisBloomFilter
+        """
+        bloom_cls = AsyncRedisBloomFilter if cls._is_async_client() else RedisBloomFilter
+        return bloom_cls(
+            cls.client,
+            f"{cls.cache_key_prefix}:bloom:{name}",
+            capacity=capacity,
+            error_rate=error_rate,
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    def scripts(cls) -> Union[ScriptRegistry, AsyncScriptRegistry]:
+        """
+        Lua 脚本注册表（EVALSHA 调用，NOSCRIPT 时回退 EVAL），内置令牌桶、滑动窗口、加锁回源、限长列表等脚本
+        多步操作一次往返且原子执行
+
+        Examples:
+            allowed, _ = RedisManager.scripts().token_bucket(f"rate:{user_id}", capacity=20, rate=10)
+            RedisManager.scripts().register("my_script", lua_source)
+            RedisManager.scripts().call("my_script", keys=["k"], args=[1])
+
+        Returns: 异步客户端返回 AsyncScriptRegistry
+        """
+        if cls.script_registry is None or cls.script_registry.client is not cls.client:
+            registry_cls = AsyncScriptRegistry if cls._is_async_client() else ScriptRegistry
+            cls.script_registry = registry_cls(cls.client)
+        return cls.script_registry
+
+    @classmethod
+    def stream_queue(
+        cls, name: str, group: str, max_len: int = None, batch_size: int = 500
+    ) -> Union[RedisStreamQueue, AsyncRedisStreamQueue]:
+        """
+        Redis Streams 消息队列，消费者组内多个消费者分摊消息，适合中等量级、不想额外部署 kafka 的场景
+        生产者每 batch_size 条 XADD 一次 pipeline 往返，消费者批量 XREADGROUP、并发处理、批量 XACK，
+        处理积压时停止拉取（背压），失败或宕机遗留的消息由 XAUTOCLAIM 认领重新处理（至少一次，handler 需幂等）
+        Args:
+            name: 队列名称，stream key 为 {cache_key_prefix}:stream:{name}
+            group: 消费者组名称
+            max_len: 队列近似最大长度，超过后裁剪最早的消息，None 不限制
+            batch_size: 每个 pipeline 发送的 XADD、XACK 数量
+
+        Examples:
+            queue = RedisManager.stream_queue("order_events", group="order_service")
+            await queue.add_many([{"order_id": 1}, {"order_id": 2}])
+
+            async def handle_order(message_id, message): ...
+
+            await queue.run(handle_order, count=100, concurrency=20)
+
+        Returns: 异步客户端返回 AsyncRedisStreamQueue
+        """
+        queue_cls = AsyncRedisStreamQueue if cls._is_async_client() else RedisStreamQueue
+        return queue_cls(
+            cls.client,
+            f"{cls.cache_key_prefix}:stream:{name}",
+            group,
+            max_len=max_len,
+            batch_size=batch_size,
+            serializer=cls.typed_serializer,
+        )
+
+    @classmethod
+    def _is_async_client(cls) -> bool:
+        return isinstance(cls.client, (aioredis.Redis, AutoPipelineRedis, AsyncRedisCluster, AsyncShardedRedis))
+
+    @classmethod
+    def _execute(cls, pipe, post: Callable[[list], Any] = None):
+        """执行 pipeline 并处理结果，异步客户端返回协程"""
+        if cls._is_async_client():
+
+            async def _run():
+                rets = await pipe.execute()
+                return post(rets) if post else rets
+
+            return _run()
+
+        rets = pipe.execute()
+        return post(rets) if post else rets
+
+    @classmethod
+    def _dumps_items(cls, mapping: dict) -> dict:
+        return {field: cls.typed_serializer.dumps(value) for field, value in mapping.items()}
+
+    @classmethod
+    def _loads_value(cls, cache_data):
+        return None if cache_data is None else cls.typed_serializer.loads(cache_data)
+
+    @staticmethod
+    def _decode(name):
+        return name.decode() if isinstance(name, bytes) else name
+
+    @classmethod
+    def hash_set(cls, key: str, mapping: dict, ttl: Union[int, timedelta] = None):
+        """
+        整体缓存 dict 为 Redis Hash（每个字段单独序列化），覆盖原有字段
+        Args:
+            key: 缓存 key
+            mapping: 字段字典，为空时写入空标记字段，读取时返回 {}（空结果同样被缓存）
+            ttl: 过期时间，默认不过期
+
+        Returns: 写入的字段数量（异步客户端返回协程）
+        """
+        pipe = cls.client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=cls._dumps_items(mapping) if mapping else {HASH_EMPTY_FIELD: ""})
+        if ttl:
+            pipe.expire(key, ttl)
+        return cls._execute(pipe, lambda rets: len(mapping))
+
+    @classmethod
+    def _loads_hash(cls, cache_data: dict) -> Optional[dict]:
+        if not cache_data:
+            return None
+        fields = ((cls._decode(field), value) for field, value in cache_data.items())
+        return {field: cls._loads_value(value) for field, value in fields if field != HASH_EMPTY_FIELD}
+
+    @classmethod
+    def hash_get(cls, key: str, fields: List[str] = None) -> Optional[dict]:
+        """
+        读取 Hash 缓存，指定 fields 时通过 HMGET 只传输、解析需要的字段
+        Args:
+            key: 缓存 key
+            fields: 需要的字段，默认全部字段
+
+        Returns: 字段字典，key 不存在时返回 None，不存在的字段值为 None（异步客户端返回协程）
+        """
+        pipe = cls.client.pipeline(transaction=False)
+        if fields is None:
+            pipe.hgetall(key)
+            return cls._execute(pipe, lambda rets: cls._loads_hash(rets[0]))
+
+        pipe.exists(key).hmget(key, fields)
+        return cls._execute(pipe, lambda rets: dict(zip(fields, map(cls._loads_value, rets[1]))) if rets[0] else None)
+
+    @classmethod
+    def hash_update(cls, key: str, mapping: dict, only_exists: bool = True):
+        """
+        部分更新 Hash 缓存的字段，不改变过期时间
+        Args:
+            key: 缓存 key
+            mapping: 需要更新的字段
+            only_exists: 只在 key 存在时更新，避免缓存过期后写入只有部分字段的 Hash
+
+        Returns: 是否更新（异步客户端返回协程）
+        """
+        pipe = cls.client.pipeline(transaction=False)
+        items = cls._dumps_items(mapping)
+        if only_exists:
+            pipe.eval(HSET_IF_EXISTS_SCRIPT, 1, key, *itertools.chain.from_iterable(items.items()))
+            return cls._execute(pipe, lambda rets: rets[0] != -1)
+
+        pipe.hset(key, mapping=items)
+        return cls._execute(pipe, lambda rets: True)
+
+    @classmethod
+    def hash_delete_fields(cls, key: str, *fields: str):
+        """删除 Hash 缓存的字段，返回删除的字段数量（异步客户端返回协程）"""
+        return cls._execute(cls.client.pipeline(transaction=False).hdel(key, *fields), lambda rets: rets[0])
+
+    @classmethod
+    def list_push(cls, key: str, *values, max_len: int = None, ttl: Union[int, timedelta] = None):
+        """
+        追加元素到 List 缓存尾部
+        Args:
+            key: 缓存 key
+            values: 元素
+            max_len: 最多保留最近的元素数量，默认不限制
+            ttl: 过期时间，默认不修改
+
+        Returns: 追加后的长度（异步客户端返回协程）
+        """
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.rpush(key, *[cls.typed_serializer.dumps(value) for value in values])
+        if max_len:
+            pipe.ltrim(key, -max_len, -1)
+        if ttl:
+            pipe.expire(key, ttl)
+        return cls._execute(pipe, lambda rets: min(rets[0], max_len) if max_len else rets[0])
+
+    @classmethod
+    def list_range(cls, key: str, start: int = 0, end: int = -1) -> list:
+        """读取 List 缓存区间 [start, end] 的元素（异步客户端返回协程）"""
+        pipe = cls.client.pipeline(transaction=False).lrange(key, start, end)
+        return cls._execute(pipe, lambda rets: [cls._loads_value(v) for v in rets[0]])
+
+    @classmethod
+    def set_add(cls, key: str, *members, ttl: Union[int, timedelta] = None):
+        """
+        添加元素到 Set 缓存，元素需为可稳定序列化的标量（str、int 等）
+        Returns: 新增的元素数量（异步客户端返回协程）
+        """
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.sadd(key, *[cls.typed_serializer.dumps(member) for member in members])
+        if ttl:
+            pipe.expire(key, ttl)
+        return cls._execute(pipe, lambda rets: rets[0])
+
+    @classmethod
+    def set_remove(cls, key: str, *members):
+        """从 Set 缓存移除元素，返回移除的数量（异步客户端返回协程）"""
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.srem(key, *[cls.typed_serializer.dumps(member) for member in members])
+        return cls._execute(pipe, lambda rets: rets[0])
+
+    @classmethod
+    def set_members(cls, key: str) -> list:
+        """Set 缓存的所有元素（异步客户端返回协程）"""
+        pipe = cls.client.pipeline(transaction=False).smembers(key)
+        return cls._execute(pipe, lambda rets: [cls._loads_value(v) for v in rets[0]])
+
+    @classmethod
+    def set_contains(cls, key: str, *members) -> List[bool]:
+        """SMISMEMBER 批量判断元素是否在 Set 缓存中（异步客户端返回协程）"""
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.smismember(key, [cls.typed_serializer.dumps(member) for member in members])
+        return cls._execute(pipe, lambda rets: [bool(ret) for ret in rets[0]])
+
+    @classmethod
+    def cache_hash(
+        cls,
+        ttl: Union[int, timedelta] = 60,
+        key_prefix: str = None,
+        key_builder: Callable[[Callable, tuple, dict], str] = DEFAULT_KEY_BUILDER,
+    ):
+        """
+        缓存 dict 结果为 Redis Hash（CacheMeta.data_type = hash）
+        被装饰函数增加以下方法:
+            cache_key(*args, **kwargs): 获取缓存 key，可配合 hash_update 部分更新字段
+            get_fields(fields, *args, **kwargs): 只读取需要的字段，未命中时执行函数缓存整体结果
+
+        Args:
+            ttl: 过期时间 默认60s
+            key_prefix: 默认的key前缀
+            key_builder: 缓存 key 生成器
+
+        Examples:
+            @RedisManager.cache_hash(ttl=600)
+            def get_user_profile(user_id) -> dict: ...
+
+            get_user_profile.get_fields(["name", "avatar"], user_id=1)
+
+        Returns:
+        """
+        key_prefix = f"{key_prefix or cls.cache_key_prefix}:cache_hash"
+
+        def _cache(func):
+            def _cache_key(*args, **kwargs):
+                return f"{key_prefix}:{func.__module__}:{func.__name__}:{key_builder(func, args, kwargs)}"
+
+            def _pick(ret: dict, fields: List[str]) -> dict:
+                return {field: ret.get(field) for field in fields}
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                key = _cache_key(*args, **kwargs)
+                ret = cls.hash_get(key)
+                if ret is None:
+                    ret = func(*args, **kwargs)
+                    if isinstance(ret, dict):
+                        cls.hash_set(key, ret, ttl)
+                return ret
+
+            def sync_get_fields(fields: List[str], *args, **kwargs):
+                ret = cls.hash_get(_cache_key(*args, **kwargs), fields)
+                return ret if ret is not None else _pick(sync_wrapper(*args, **kwargs) or {}, fields)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _cache_key(*args, **kwargs)
+                ret = await cls.hash_get(key)
+                if ret is None:
+                    ret = await func(*args, **kwargs)
+                    if isinstance(ret, dict):
+                        await cls.hash_set(key, ret, ttl)
+                return ret
+
+            async def async_get_fields(fields: List[str], *args, **kwargs):
+                ret = await cls.hash_get(_cache_key(*args, **kwargs), fields)
+                return ret if ret is not None else _pick(await async_wrapper(*args, **kwargs) or {}, fields)
+
+            if asyncio.iscoroutinefunction(func):
+                wrapper, wrapper.get_fields = async_wrapper, async_get_fields
+            else:
+                wrapper, wrapper.get_fields = sync_wrapper, sync_get_fields
+            wrapper.cache_key = _cache_key
+            return wrapper
 
-        return cache_json(cache_proxy=cache_proxy, key_prefix=key_prefix, ttl=ttl)
+        return _cache
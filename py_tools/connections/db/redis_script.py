@@ -0,0 +1,342 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { Redis Lua 脚本注册模块 }
+# @Date: 2026/10/19 19:00
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
+
+from redis import Redis
+from redis import asyncio as aioredis
+from redis.exceptions import NoScriptError
+
+# 令牌桶限流 KEYS[1] 桶 ARGV: 容量 每秒生成令牌数 申请令牌数，返回 {是否允许, 剩余令牌}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+# 滑动窗口计数 KEYS[1] 有序集合 ARGV: 窗口毫秒数 上限 唯一成员，返回 {是否允许, 窗口内数量}
+SLIDING_WINDOW_SCRIPT = """
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    count = count + 1
+    allowed = 1
+end
+redis.call('PEXPIRE', KEYS[1], window)
+return {allowed, count}
+"""
+
+# 获取缓存，不存在时加锁 KEYS: 缓存 锁 ARGV: 锁标识 锁过期秒数，返回 {1, 值} 命中 {2} 获取到锁 {0} 其他人持有锁
+GET_OR_LOCK_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    return {1, value}
+end
+if redis.call('SET', KEYS[2], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return {2}
+end
+return {0}
+"""
+
+# 写入缓存并释放自己的锁 KEYS: 缓存 锁 ARGV: 值 过期秒数 锁标识
+SET_AND_UNLOCK_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+if redis.call('GET', KEYS[2]) == ARGV[3] then
+    redis.call('DEL', KEYS[2])
+end
+return 1
+"""
+
+# 释放自己的锁 KEYS[1] 锁 ARGV: 锁标识，返回是否释放
+UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 限长列表推入 KEYS[1] 列表 ARGV: 最大长度 过期秒数(0 不设置) 元素...，返回列表长度
+CAPPED_LIST_PUSH_SCRIPT = """
+local max_len = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local length = redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+if max_len > 0 and length > max_len then
+    redis.call('LTRIM', KEYS[1], -max_len, -1)
+    length = max_len
+end
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return length
+"""
+
+# 计数并设置过期时间 KEYS[1] 计数器 ARGV: 增量 过期秒数，首次计数时设置过期时间，返回计数
+INCR_EXPIRE_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+if count == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return count
+"""
+
+# 比较并设置 KEYS[1] ARGV: 期望值 新值 过期秒数(0 不设置)，返回是否设置成功
+COMPARE_AND_SET_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'KEEPTTL')
+end
+return 1
+"""
+
+BUILTIN_SCRIPTS = {
+    "token_bucket": TOKEN_BUCKET_SCRIPT,
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "get_or_lock": GET_OR_LOCK_SCRIPT,
+    "set_and_unlock": SET_AND_UNLOCK_SCRIPT,
+    "unlock": UNLOCK_SCRIPT,
+    "capped_list_push": CAPPED_LIST_PUSH_SCRIPT,
+    "incr_expire": INCR_EXPIRE_SCRIPT,
+    "compare_and_set": COMPARE_AND_SET_SCRIPT,
+}
+
+
+class _ScriptRegistryBase(object):
+    """Lua 脚本注册表公共处理，sha1 在本地计算，调用时不需要等待 SCRIPT LOAD 的结果"""
+
+    def __init__(self, client: Union[Redis, aioredis.Redis]):
+        self.client = client
+        self.scripts: Dict[str, Tuple[str, str]] = {}  # {名称: (sha1, 脚本)}
+        for name, source in BUILTIN_SCRIPTS.items():
+            self.register(name, source)
+
+    def register(self, name: str, source: str) -> str:
+        """
+        注册脚本
+        Args:
+            name: 脚本名称
+            source: Lua 脚本
+
+        Returns: 脚本 sha1
+        """
+        sha = hashlib.sha1(source.encode()).hexdigest()
+        self.scripts[name] = (sha, source)
+        return sha
+
+    def _get_script(self, name: str) -> Tuple[str, str]:
+        if name not in self.scripts:
+            raise KeyError(f"lua script {name} not registered")
+        return self.scripts[name]
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        """
+        缓存 key 对应的锁 key，与缓存 key 在同一个集群槽位（脚本的多个 KEYS 必须同槽，否则 CROSSSLOT）
+        缓存 key 已有 hash tag 时沿用，否则以整个缓存 key 作为 hash tag，eg: user:1 -> {user:1}:lock
+        （缓存 key 包含 } 但没有有效的 hash tag 时无法保证同槽，集群下需要使用 {tag} 形式的 key）
+        """
+        start = key.find("{")
+        end = key.find("}", start + 1) if start != -1 else -1
+        if end > start + 1:
+            return f"{key}:lock"
+        return f"{{{key}}}:lock"
+
+    @staticmethod
+    def _parse_token_bucket(ret: list) -> Tuple[bool, float]:
+        return bool(ret[0]), float(ret[1])
+
+    @staticmethod
+    def _parse_sliding_window(ret: list) -> Tuple[bool, int]:
+        return bool(ret[0]), int(ret[1])
+
+
+class ScriptRegistry(_ScriptRegistryBase):
+    """
+    同步 Lua 脚本注册表
+    通过 EVALSHA 调用，服务端没有该脚本（NOSCRIPT）时通过 EVAL 执行并缓存脚本，多步操作一次往返且原子执行
+
+    Examples:
+        scripts = ScriptRegistry(redis_client)
+        scripts.load()  # 可选，预加载所有脚本
+        allowed, tokens = scripts.token_bucket("rate:api:user:1", capacity=10, rate=5)
+    """
+
+    def load(self):
+        """SCRIPT LOAD 预加载所有脚本"""
+        pipe = self.client.pipeline(transaction=False)
+        for _, source in self.scripts.values():
+            pipe.script_load(source)
+        pipe.execute()
+
+    def call(self, name: str, keys: Sequence = (), args: Sequence = ()) -> Any:
+        """
+        执行脚本
+        Args:
+            name: 脚本名称
+            keys: 脚本的 KEYS
+            args: 脚本的 ARGV
+
+        Returns: 脚本返回值
+        """
+        sha, source = self._get_script(name)
+        try:
+            return self.client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return self.client.eval(source, len(keys), *keys, *args)
+
+    def token_bucket(self, key: str, capacity: int, rate: float, requested: int = 1) -> Tuple[bool, float]:
+        """
+        令牌桶限流
+        Args:
+            key: 限流的 key
+            capacity: 桶容量（允许的突发数量）
+            rate: 每秒生成的令牌数
+            requested: 本次申请的令牌数
+
+        Returns: (是否允许, 剩余令牌数)
+        """
+        return self._parse_token_bucket(self.call("token_bucket", [key], [capacity, rate, requested]))
+
+    def sliding_window(self, key: str, limit: int, window: float) -> Tuple[bool, int]:
+        """
+        滑动窗口限流，窗口内最多 limit 次
+        Args:
+            key: 限流的 key
+            limit: 窗口内的次数上限
+            window: 窗口大小（秒）
+
+        Returns: (是否允许, 窗口内次数)
+        """
+        ret = self.call("sliding_window", [key], [int(window * 1000), limit, uuid.uuid4().hex])
+        return self._parse_sliding_window(ret)
+
+    def get_or_set_with_lock(
+        self, key: str, loader: Callable[[], Any], ttl: int, lock_ttl: int = 10, wait_interval: float = 0.05
+    ) -> Any:
+        """
+        获取缓存，不存在时只有获取到锁的调用者执行 loader 并写入，其余调用者等待结果
+        Args:
+            key: 缓存 key
+            loader: 加载函数，返回 Redis 可存储的值（str、bytes、数字）
+            ttl: 缓存过期时间（秒）
+            lock_ttl: 锁过期时间，也是等待结果的最长时间
+            wait_interval: 等待结果的轮询间隔
+
+        Notes:
+            loader 出错时释放锁，等待的调用者重新竞争锁，不用等到锁过期
+
+        Returns: 缓存值（命中时为 Redis 返回的值）
+        """
+        lock_key, token = self._lock_key(key), uuid.uuid4().hex
+        deadline = time.monotonic() + lock_ttl
+        while True:
+            ret = self.call("get_or_lock", [key, lock_key], [token, lock_ttl])
+            if ret[0] == 1:
+                return ret[1]
+            if ret[0] == 2 or time.monotonic() >= deadline:
+                try:
+                    value = loader()
+                except BaseException:
+                    self.call("unlock", [lock_key], [token])
+                    raise
+                self.call("set_and_unlock", [key, lock_key], [value, ttl, token])
+                return value
+            time.sleep(wait_interval)
+
+    def capped_list_push(self, key: str, *values, max_len: int, ttl: int = 0) -> int:
+        """
+        列表尾部推入并只保留最新的 max_len 个元素
+        Returns: 列表长度
+        """
+        return self.call("capped_list_push", [key], [max_len, ttl, *values])
+
+    def incr_expire(self, key: str, ttl: int, amount: int = 1) -> int:
+        """计数，首次计数时设置过期时间（固定窗口计数器）"""
+        return self.call("incr_expire", [key], [amount, ttl])
+
+    def compare_and_set(self, key: str, expected: Any, value: Any, ttl: int = 0) -> bool:
+        """当前值等于 expected 时设置为 value，ttl 为 0 时保留原过期时间"""
+        return bool(self.call("compare_and_set", [key], [expected, value, ttl]))
+
+
+class AsyncScriptRegistry(_ScriptRegistryBase):
+    """异步 Lua 脚本注册表"""
+
+    async def load(self):
+        pipe = self.client.pipeline(transaction=False)
+        for _, source in self.scripts.values():
+            pipe.script_load(source)
+        await pipe.execute()
+
+    async def call(self, name: str, keys: Sequence = (), args: Sequence = ()) -> Any:
+        sha, source = self._get_script(name)
+        try:
+            return await self.client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return await self.client.eval(source, len(keys), *keys, *args)
+
+    async def token_bucket(self, key: str, capacity: int, rate: float, requested: int = 1) -> Tuple[bool, float]:
+        return self._parse_token_bucket(await self.call("token_bucket", [key], [capacity, rate, requested]))
+
+    async def sliding_window(self, key: str, limit: int, window: float) -> Tuple[bool, int]:
+        ret = await self.call("sliding_window", [key], [int(window * 1000), limit, uuid.uuid4().hex])
+        return self._parse_sliding_window(ret)
+
+    async def get_or_set_with_lock(
+        self, key: str, loader: Callable, ttl: int, lock_ttl: int = 10, wait_interval: float = 0.05
+    ) -> Any:
+        lock_key, token = self._lock_key(key), uuid.uuid4().hex
+        deadline = time.monotonic() + lock_ttl
+        while True:
+            ret = await self.call("get_or_lock", [key, lock_key], [token, lock_ttl])
+            if ret[0] == 1:
+                return ret[1]
+            if ret[0] == 2 or time.monotonic() >= deadline:
+                try:
+                    value = loader()
+                    if asyncio.iscoroutine(value):
+                        value = await value
+                except BaseException:
+                    await self.call("unlock", [lock_key], [token])
+                    raise
+                await self.call("set_and_unlock", [key, lock_key], [value, ttl, token])
+                return value
+            await asyncio.sleep(wait_interval)
+
+    async def capped_list_push(self, key: str, *values, max_len: int, ttl: int = 0) -> int:
+        return await self.call("capped_list_push", [key], [max_len, ttl, *values])
+
+    async def incr_expire(self, key: str, ttl: int, amount: int = 1) -> int:
+        return await self.call("incr_expire", [key], [amount, ttl])
+
+    async def compare_and_set(self, key: str, expected: Any, value: Any, ttl: int = 0) -> bool:
+        return bool(await self.call("compare_and_set", [key], [expected, value, ttl]))
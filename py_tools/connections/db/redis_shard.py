@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { Redis 客户端分片模块 }
+# @Date: 2026/10/19 17:00
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple, Union
+
+from redis import Redis
+from redis import asyncio as aioredis
+
+from py_tools.connections.db.hash_ring import ConsistentHashRing
+
+# 没有 key 的命令，在默认节点执行（发布订阅也统一在默认节点）
+NO_KEY_COMMANDS = frozenset({"publish", "pubsub", "ping", "info", "time", "script_load", "script_exists"})
+
+# 多 key 命令，按节点拆分后合并结果
+MULTI_KEY_COMMANDS = frozenset({"mget", "delete", "unlink", "exists"})
+
+
+class _ShardedPipelineBase(object):
+    """分片 pipeline，按节点拆分命令，每个节点一个 pipeline，执行后按命令顺序组装结果"""
+
+    def __init__(self, sharded: "_ShardedRedisBase", transaction: bool = False):
+        self._sharded = sharded
+        self._transaction = transaction
+        self._reset()
+
+    def _reset(self):
+        self._node_commands: Dict[str, List[Tuple[str, tuple, dict]]] = {}
+        self._resolvers: List[Callable[[Dict[str, list]], Any]] = []
+
+    def __len__(self):
+        return len(self._resolvers)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _command(*args, **kwargs):
+            self._add(name, args, kwargs)
+            return self
+
+        return _command
+
+    def _append(self, node: str, name: str, args: tuple, kwargs: dict) -> int:
+        commands = self._node_commands.setdefault(node, [])
+        commands.append((name, args, kwargs))
+        return len(commands) - 1
+
+    def _add(self, name: str, args: tuple, kwargs: dict):
+        if name == "mget":
+            keys = list(args[0]) if isinstance(args[0], (list, tuple)) else [args[0]]
+            keys.extend(args[1:])
+            parts = [
+                (node, self._append(node, "mget", (node_keys,), {}), node_keys)
+                for node, node_keys in self._sharded.ring.group_keys(keys).items()
+            ]
+
+            def _resolve(node_rets):
+                values = {}
+                for node, idx, node_keys in parts:
+                    values.update(zip(node_keys, node_rets[node][idx]))
+                return [values[key] for key in keys]
+
+        elif name in MULTI_KEY_COMMANDS:
+            parts = [
+                (node, self._append(node, name, tuple(node_keys), {}))
+                for node, node_keys in self._sharded.ring.group_keys(args).items()
+            ]
+
+            def _resolve(node_rets):
+                return sum(node_rets[node][idx] for node, idx in parts)
+
+        else:
+            node = self._sharded.route(name, args, kwargs)
+            idx = self._append(node, name, args, kwargs)
+
+            def _resolve(node_rets):
+                return node_rets[node][idx]
+
+        self._resolvers.append(_resolve)
+
+    def _node_pipeline(self, node: str):
+        pipe = self._sharded.clients[node].pipeline(transaction=self._transaction)
+        for name, args, kwargs in self._node_commands[node]:
+            getattr(pipe, name)(*args, **kwargs)
+        return pipe
+
+    def _resolve(self, node_rets: Dict[str, list]) -> list:
+        try:
+            return [resolver(node_rets) for resolver in self._resolvers]
+        finally:
+            self._reset()
+
+
+class ShardedPipeline(_ShardedPipelineBase):
+    """同步分片 pipeline，多个节点通过线程并发执行"""
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        nodes = list(self._node_commands)
+        pipes = [self._node_pipeline(node) for node in nodes]
+        if len(pipes) <= 1:
+            rets = [pipe.execute(raise_on_error=raise_on_error) for pipe in pipes]
+        else:
+            rets = list(self._sharded.executor.map(lambda pipe: pipe.execute(raise_on_error=raise_on_error), pipes))
+        return self._resolve(dict(zip(nodes, rets)))
+
+
+class AsyncShardedPipeline(_ShardedPipelineBase):
+    """异步分片 pipeline，多个节点并发执行"""
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        nodes = list(self._node_commands)
+        pipes = [self._node_pipeline(node) for node in nodes]
+        rets = await asyncio.gather(*[pipe.execute(raise_on_error=raise_on_error) for pipe in pipes])
+        return self._resolve(dict(zip(nodes, rets)))
+
+
+class _ShardedRedisBase(object):
+    """多个独立 Redis 节点的客户端分片公共处理"""
+
+    def __init__(self, clients: Dict[str, Union[Redis, aioredis.Redis]], replicas: int = 160):
+        """
+        Args:
+            clients: {节点名称: Redis 客户端}，第一个节点为默认节点（执行发布订阅等没有 key 的命令）
+            replicas: 一致性哈希每个节点的虚拟节点数量
+        """
+        if not clients:
+            raise ValueError("sharded redis requires at least one node")
+        self.clients = clients
+        self.ring = ConsistentHashRing(clients, replicas=replicas)
+        self.default_node = next(iter(clients))
+
+    @classmethod
+    def from_nodes(cls, nodes: List[dict], replicas: int = 160, **kwargs):
+        """
+        根据节点连接信息创建
+        Args:
+            nodes: 节点连接参数列表，eg: [{"host": "10.0.0.1", "port": 6379}, {"host": "10.0.0.2"}]
+            replicas: 一致性哈希每个节点的虚拟节点数量
+            **kwargs: 所有节点通用的客户端参数，eg: password、max_connections
+        """
+        clients = {}
+        for node in nodes:
+            node_kwargs = {**kwargs, **node}
+            name = f"{node_kwargs.get('host', 'localhost')}:{node_kwargs.get('port', 6379)}/{node_kwargs.get('db', 0)}"
+            clients[name] = cls.client_cls(**node_kwargs)
+        return cls(clients, replicas=replicas)
+
+    def route(self, name: str, args: tuple, kwargs: dict) -> str:
+        """命令所在的节点，按第一个 key 路由"""
+        key = None
+        if name in ("eval", "evalsha"):
+            # eval(script, numkeys, *keys_and_args) 多个 key 需要在同一个节点
+            if len(args) > 2 and int(args[1]) > 0:
+                key = args[2]
+        elif name not in NO_KEY_COMMANDS:
+            key = args[0] if args else kwargs.get("name", kwargs.get("key"))
+        return self.default_node if key is None else self.ring.get_node(key)
+
+    def get_client(self, key) -> Union[Redis, aioredis.Redis]:
+        """key 所在节点的客户端"""
+        return self.clients[self.ring.get_node(key)]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        attr = getattr(self.clients[self.default_node], name)
+        if not callable(attr):
+            return attr
+
+        def _command(*args, **kwargs):
+            return getattr(self.clients[self.route(name, args, kwargs)], name)(*args, **kwargs)
+
+        return _command
+
+
+class ShardedRedis(_ShardedRedisBase):
+    """
+    同步 Redis 客户端分片，按一致性哈希将 key 分布到多个独立节点
+    单 key 命令路由到所在节点；MGET、DELETE 等多 key 命令与 pipeline 按节点分组并发执行
+
+    Examples:
+        client = ShardedRedis.from_nodes([{"host": "10.0.0.1"}, {"host": "10.0.0.2"}])
+        client.mget(["a", "b", "c"])
+    """
+
+    client_cls = Redis
+
+    def __init__(self, clients: Dict[str, Redis], replicas: int = 160):
+        super().__init__(clients, replicas=replicas)
+        self.executor = ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix="redis_shard")
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> ShardedPipeline:
+        """分片 pipeline，事务只在单个节点内生效"""
+        return ShardedPipeline(self, transaction=transaction)
+
+    def mget(self, keys, *args) -> list:
+        return self.pipeline(transaction=False).mget(keys, *args).execute()[0]
+
+    def delete(self, *names) -> int:
+        return self.pipeline(transaction=False).delete(*names).execute()[0]
+
+    def unlink(self, *names) -> int:
+        return self.pipeline(transaction=False).unlink(*names).execute()[0]
+
+    def exists(self, *names) -> int:
+        return self.pipeline(transaction=False).exists(*names).execute()[0]
+
+    def keys(self, pattern="*") -> list:
+        return [key for client in self.clients.values() for key in client.keys(pattern)]
+
+    def scan_iter(self, match=None, count=None, _type=None, **kwargs) -> Iterator:
+        """依次 SCAN 所有节点"""
+        for client in self.clients.values():
+            yield from client.scan_iter(match=match, count=count, _type=_type, **kwargs)
+
+    def flushdb(self):
+        for client in self.clients.values():
+            client.flushdb()
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+        self.executor.shutdown(wait=False)
+
+
+class AsyncShardedRedis(_ShardedRedisBase):
+    """异步 Redis 客户端分片，多 key 命令与 pipeline 按节点分组后并发执行"""
+
+    client_cls = aioredis.Redis
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> AsyncShardedPipeline:
+        """分片 pipeline，事务只在单个节点内生效"""
+        return AsyncShardedPipeline(self, transaction=transaction)
+
+    async def mget(self, keys, *args) -> list:
+        return (await self.pipeline(transaction=False).mget(keys, *args).execute())[0]
+
+    async def delete(self, *names) -> int:
+        return (await self.pipeline(transaction=False).delete(*names).execute())[0]
+
+    async def unlink(self, *names) -> int:
+        return (await self.pipeline(transaction=False).unlink(*names).execute())[0]
+
+    async def exists(self, *names) -> int:
+        return (await self.pipeline(transaction=False).exists(*names).execute())[0]
+
+    async def keys(self, pattern="*") -> list:
+        rets = await asyncio.gather(*[client.keys(pattern) for client in self.clients.values()])
+        return [key for keys in rets for key in keys]
+
+    async def scan_iter(self, match=None, count=None, _type=None, **kwargs) -> AsyncIterator:
+        """依次 SCAN 所有节点"""
+        for client in self.clients.values():
+            async for key in client.scan_iter(match=match, count=count, _type=_type, **kwargs):
+                yield key
+
+    async def flushdb(self):
+        await asyncio.gather(*[client.flushdb() for client in self.clients.values()])
+
+    async def aclose(self):
+        await asyncio.gather(*[client.aclose() for client in self.clients.values()])
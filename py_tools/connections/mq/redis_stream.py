@@ -0,0 +1,360 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @Desc: { Redis Streams 消息队列模块 }
+# @Date: 2026/10/19 21:00
+import asyncio
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Iterable, List, Set, Tuple, Union
+
+from loguru import logger
+from redis import Redis
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from py_tools.decorators.cache import CacheSerializer
+
+# 消息体字段名，消息内容序列化后存放在该字段
+STREAM_DATA_FIELD = "data"
+
+# 消息 (消息ID, 消息内容)
+StreamMessage = Tuple[str, Any]
+
+
+class _RedisStreamQueueMixin(object):
+    """Redis Streams 队列公共逻辑（消息编解码、读取结果解析）"""
+
+    def __init__(
+        self,
+        client: Union[Redis, aioredis.Redis],
+        name: str,
+        group: str,
+        max_len: int = None,
+        batch_size: int = 500,
+        serializer: CacheSerializer = None,
+    ):
+        """
+        Args:
+            client: redis 客户端
+            name: stream key
+            group: 消费者组名称
+            max_len: 队列近似最大长度（XADD MAXLEN ~），None 不限制
+            batch_size: 每个 pipeline 发送的 XADD、XACK 数量
+            serializer: 消息序列化器，默认 json
+        """
+        self.client = client
+        self.name = name
+        self.group = group
+        self.max_len = max_len
+        self.batch_size = batch_size
+        self.serializer = serializer or CacheSerializer()
+        self._stopped = False
+
+    @staticmethod
+    def default_consumer() -> str:
+        """默认消费者名称 主机名-进程号"""
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _batches(self, items: Iterable) -> Iterable[list]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _build_add_pipeline(self, messages: List[Any]):
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(
+                self.name,
+                {STREAM_DATA_FIELD: self.serializer.dumps(message)},
+                maxlen=self.max_len,
+                approximate=True,
+            )
+        return pipe
+
+    def _build_ack_pipeline(self, message_ids: List[str]):
+        """每 batch_size 个消息ID一条 XACK，全部放在一个 pipeline 中"""
+        pipe = self.client.pipeline(transaction=False)
+        for batch in self._batches(message_ids):
+            pipe.xack(self.name, self.group, *batch)
+        return pipe
+
+    def _parse_entries(self, entries) -> List[StreamMessage]:
+        """解析 [(消息ID, {字段: 值})]，消息已被删除时字段为空，内容返回 None"""
+        messages = []
+        for message_id, fields in entries or []:
+            fields = {self._decode(field): value for field, value in (fields or {}).items()}
+            data = fields.get(STREAM_DATA_FIELD)
+            messages.append((self._decode(message_id), None if data is None else self.serializer.loads(data)))
+        return messages
+
+    def _parse_read(self, ret) -> List[StreamMessage]:
+        """解析 XREADGROUP 结果 [[stream, [(消息ID, {字段: 值})]]]"""
+        return self._parse_entries(ret[0][1]) if ret else []
+
+    def _parse_claim(self, ret) -> Tuple[str, List[StreamMessage], List[str]]:
+        """解析 XAUTOCLAIM 结果 [下一个游标, 消息列表, 已删除的消息ID（redis 7+）]"""
+        deleted_ids = [self._decode(message_id) for message_id in ret[2]] if len(ret) > 2 else []
+        return self._decode(ret[0]), self._parse_entries(ret[1]), deleted_ids
+
+    @staticmethod
+    def _read_count(count: int, max_in_flight: int, in_flight: int) -> int:
+        """背压: 本次读取数量不超过剩余的处理容量，处理积压时不再从队列拉取消息"""
+        return max(0, min(count, max_in_flight - in_flight))
+
+    def stop(self):
+        """停止消费，等待处理中的消息完成并确认后 run 返回"""
+        self._stopped = True
+
+
+class RedisStreamQueue(_RedisStreamQueueMixin):
+    """
+    Redis Streams 消息队列（同步），消费者组内多个消费者分摊消息，处理成功后确认（XACK），
+    处理失败或消费者宕机的消息留在待处理列表（PEL），空闲超过 claim_idle 后被其他消费者认领重新处理
+
+    Examples:
+        queue = RedisManager.stream_queue("order_events", group="order_service")
+        queue.add_many([{"order_id": 1}, {"order_id": 2}])
+        queue.run(handle_order, concurrency=8)  # handle_order(message_id, message)
+    """
+
+    def ensure_group(self, start_id: str = "0"):
+        """创建消费者组（stream 不存在时自动创建），已存在时忽略"""
+        try:
+            self.client.xgroup_create(self.name, self.group, id=start_id, mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def add(self, message: Any) -> str:
+        """发送一条消息，返回消息ID"""
+        return self.add_many([message])[0]
+
+    def add_many(self, messages: Iterable[Any]) -> List[str]:
+        """
+        批量发送消息，每 batch_size 条 XADD 一次 pipeline 往返
+        Returns: 消息ID列表
+        """
+        message_ids = []
+        for batch in self._batches(messages):
+            message_ids.extend(self._decode(message_id) for message_id in self._build_add_pipeline(batch).execute())
+        return message_ids
+
+    def read(self, consumer: str, count: int = 100, block: int = None) -> List[StreamMessage]:
+        """读取新消息（XREADGROUP >），block 为阻塞等待毫秒数"""
+        ret = self.client.xreadgroup(self.group, consumer, {self.name: ">"}, count=count, block=block)
+        return self._parse_read(ret)
+
+    def ack(self, message_ids: List[str]) -> int:
+        """批量确认消息，返回确认成功的数量"""
+        return sum(self._build_ack_pipeline(message_ids).execute()) if message_ids else 0
+
+    def claim(self, consumer: str, min_idle_time: int = 60000, count: int = 100) -> List[StreamMessage]:
+        """
+        认领空闲超过 min_idle_time 毫秒的待处理消息（XAUTOCLAIM），已被删除的消息直接确认
+        Args:
+            consumer: 认领到的消费者名称
+            min_idle_time: 最小空闲毫秒数
+            count: 最多认领数量
+        """
+        messages, start_id = [], "0-0"
+        while len(messages) < count:
+            ret = self.client.xautoclaim(
+                self.name, self.group, consumer, min_idle_time, start_id, count=count - len(messages)
+            )
+            start_id, claimed, deleted_ids = self._parse_claim(ret)
+            messages.extend(claimed)
+            if deleted_ids:
+                self.ack(deleted_ids)
+            if start_id == "0-0":
+                break
+        return messages
+
+    def run(
+        self,
+        handler: Callable[[str, Any], Any],
+        consumer: str = None,
+        count: int = 100,
+        concurrency: int = 10,
+        max_in_flight: int = None,
+        block: int = 1000,
+        claim_idle: int = 60000,
+        claim_interval: float = 30,
+    ):
+        """
+        消费消息直到 stop，handler 在线程池中并发执行，正常返回后批量确认，抛出异常的消息不确认，等待重新认领
+        Args:
+            handler: 消息处理函数 handler(message_id, message)
+            consumer: 消费者名称，默认 主机名-进程号
+            count: 每次 XREADGROUP 读取的最大数量
+            concurrency: 并发处理的线程数
+            max_in_flight: 已读取未处理完的最大消息数（背压），默认 concurrency * 2
+            block: 无消息时阻塞等待毫秒数
+            claim_idle: 待处理消息空闲超过该毫秒数后认领重新处理
+            claim_interval: 认领检查间隔（秒）
+        """
+        consumer = consumer or self.default_consumer()
+        max_in_flight = max_in_flight or concurrency * 2
+        self.ensure_group()
+        self._stopped = False
+        futures: Set[Future] = set()
+        ack_ids, ack_lock = [], threading.Lock()
+        next_claim_time = time.monotonic()
+
+        def _handle(message_id: str, message: Any):
+            try:
+                handler(message_id, message)
+            except Exception as e:
+                logger.exception(f"stream {self.name} handle message {message_id} error {e!r}")
+                return
+            with ack_lock:
+                ack_ids.append(message_id)
+
+        def _flush_ack():
+            with ack_lock:
+                message_ids = ack_ids[:]
+                ack_ids.clear()
+            if message_ids:
+                self.ack(message_ids)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while not self._stopped:
+                read_count = self._read_count(count, max_in_flight, len(futures))
+                if not read_count:
+                    _, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    _flush_ack()
+                    continue
+
+                messages = []
+                if claim_idle and time.monotonic() >= next_claim_time:
+                    messages = self.claim(consumer, claim_idle, read_count)
+                    next_claim_time = time.monotonic() + claim_interval
+                if not messages:
+                    messages = self.read(consumer, read_count, block)
+                futures.update(executor.submit(_handle, *message) for message in messages)
+                futures = {future for future in futures if not future.done()}
+                _flush_ack()
+
+            wait(futures)
+            _flush_ack()
+
+
+class AsyncRedisStreamQueue(_RedisStreamQueueMixin):
+    """
+    Redis Streams 消息队列（异步），handler 为协程函数，由 asyncio 任务并发执行
+
+    Examples:
+        queue = AsyncRedisManager.stream_queue("order_events", group="order_service")
+        await queue.add_many([{"order_id": 1}, {"order_id": 2}])
+        await queue.run(handle_order, concurrency=50)  # async handle_order(message_id, message)
+    """
+
+    async def ensure_group(self, start_id: str = "0"):
+        try:
+            await self.client.xgroup_create(self.name, self.group, id=start_id, mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def add(self, message: Any) -> str:
+        return (await self.add_many([message]))[0]
+
+    async def add_many(self, messages: Iterable[Any]) -> List[str]:
+        message_ids = []
+        for batch in self._batches(messages):
+            rets = await self._build_add_pipeline(batch).execute()
+            message_ids.extend(self._decode(message_id) for message_id in rets)
+        return message_ids
+
+    async def read(self, consumer: str, count: int = 100, block: int = None) -> List[StreamMessage]:
+        ret = await self.client.xreadgroup(self.group, consumer, {self.name: ">"}, count=count, block=block)
+        return self._parse_read(ret)
+
+    async def ack(self, message_ids: List[str]) -> int:
+        return sum(await self._build_ack_pipeline(message_ids).execute()) if message_ids else 0
+
+    async def claim(self, consumer: str, min_idle_time: int = 60000, count: int = 100) -> List[StreamMessage]:
+        messages, start_id = [], "0-0"
+        while len(messages) < count:
+            ret = await self.client.xautoclaim(
+                self.name, self.group, consumer, min_idle_time, start_id, count=count - len(messages)
+            )
+            start_id, claimed, deleted_ids = self._parse_claim(ret)
+            messages.extend(claimed)
+            if deleted_ids:
+                await self.ack(deleted_ids)
+            if start_id == "0-0":
+                break
+        return messages
+
+    async def run(
+        self,
+        handler: Callable[[str, Any], Awaitable[Any]],
+        consumer: str = None,
+        count: int = 100,
+        concurrency: int = 10,
+        max_in_flight: int = None,
+        block: int = 1000,
+        claim_idle: int = 60000,
+        claim_interval: float = 30,
+    ):
+        """
+        消费消息直到 stop，参数同 RedisStreamQueue.run
+        concurrency 限制同时执行的 handler 数量，max_in_flight 限制已读取未处理完的消息数（背压）
+        """
+        consumer = consumer or self.default_consumer()
+        max_in_flight = max_in_flight or concurrency * 2
+        await self.ensure_group()
+        self._stopped = False
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: Set[asyncio.Task] = set()
+        ack_ids: List[str] = []
+        next_claim_time = time.monotonic()
+
+        async def _handle(message_id: str, message: Any):
+            async with semaphore:
+                try:
+                    await handler(message_id, message)
+                except Exception as e:
+                    logger.exception(f"stream {self.name} handle message {message_id} error {e!r}")
+                    return
+            ack_ids.append(message_id)
+
+        async def _flush_ack():
+            message_ids = ack_ids[:]
+            ack_ids.clear()
+            if message_ids:
+                await self.ack(message_ids)
+
+        while not self._stopped:
+            read_count = self._read_count(count, max_in_flight, len(tasks))
+            if not read_count:
+                _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                await _flush_ack()
+                continue
+
+            messages = []
+            if claim_idle and time.monotonic() >= next_claim_time:
+                messages = await self.claim(consumer, claim_idle, read_count)
+                next_claim_time = time.monotonic() + claim_interval
+            if not messages:
+                messages = await self.read(consumer, read_count, block)
+            tasks.update(asyncio.create_task(_handle(*message)) for message in messages)
+            tasks = {task for task in tasks if not task.done()}
+            await _flush_ack()
+
+        if tasks:
+            await asyncio.wait(tasks)
+        await _flush_ack()
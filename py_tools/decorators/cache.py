@@ -4,19 +4,40 @@
 # @Desc: { 缓存装饰器模块 }
 # @Date: 2023/05/03 19:23
 import asyncio
+import bisect
 import functools
 import hashlib
+import inspect
+import itertools
 import json
+import math
+import pickle
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from datetime import time as dt_time
 from datetime import timedelta
-from typing import Union
+from decimal import Decimal
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import cacheout
 import memcache
+from loguru import logger
 from pydantic import BaseModel, Field
 from redis import Redis
 from redis import asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.cluster import RedisCluster
 
 from py_tools import constants
+from py_tools.connections.db.bloom_filter import BaseBloomFilter
+from py_tools.connections.db.memcache_client import AsyncMemcacheClient
 
 
 class CacheMeta(BaseModel):
@@ -28,140 +49,2811 @@ class CacheMeta(BaseModel):
     data_type: str = Field(description="缓存的数据类型（str、list、hash、set）")
 
 
+def _default_encode(obj):
+    """json/msgpack 不支持类型的默认转换"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):
+        # eg: orm 映射类实例
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date, dt_time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not serializable")
+
+
+class BaseCacheCodec(object):
+    """缓存值编解码器基类"""
+
+    codec_id: int = None  # 编码标识，写入缓存值的头部字节，取值 1~7
+    name: str = None
+    binary: bool = True  # 编码结果是否为二进制（非 utf-8 文本），decode_responses=True 的 redis 客户端无法读取
+
+    def dumps(self, obj) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes):
+        raise NotImplementedError
+
+
+class JsonCodec(BaseCacheCodec):
+    """标准库 json 编解码（datetime、Decimal 等转字符串）"""
+
+    codec_id = 1
+    name = "json"
+    binary = False
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=_default_encode, ensure_ascii=False).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(BaseCacheCodec):
+    """orjson 编解码，原生支持 datetime、dataclass 等，需安装 orjson"""
+
+    codec_id = 2
+    name = "orjson"
+    binary = False
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def dumps(self, obj):
+        return self.orjson.dumps(obj, default=_default_encode, option=self.orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+class MsgpackCodec(BaseCacheCodec):
+    """msgpack 二进制编解码，体积更小，需安装 msgpack"""
+
+    codec_id = 3
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+
+        self.msgpack = msgpack
+
+    def dumps(self, obj):
+        return self.msgpack.packb(obj, default=_default_encode, use_bin_type=True)
+
+    def loads(self, data):
+        return self.msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class PickleCodec(BaseCacheCodec):
+    """
+    pickle 编解码，支持任意 python 对象（datetime、Decimal、pydantic 模型、orm 实例等原样还原）
+
+    Notes:
+        反序列化会执行任意代码，只能用于可信的缓存服务
+    """
+
+    codec_id = 4
+    name = "pickle"
+
+    def dumps(self, obj):
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class BaseCacheCompressor(object):
+    """缓存值压缩基类"""
+
+    compress_id: int = None  # 压缩标识，写入缓存值的头部字节，取值 1~2
+    name: str = None
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCompressor(BaseCacheCompressor):
+    compress_id = 1
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class ZstdCompressor(BaseCacheCompressor):
+    """zstd 压缩，需安装 zstandard"""
+
+    compress_id = 2
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        import zstandard
+
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def decompress(self, data):
+        return self.decompressor.decompress(data)
+
+
+CACHE_CODECS = {codec_cls.name: codec_cls for codec_cls in [JsonCodec, OrjsonCodec, MsgpackCodec, PickleCodec]}
+CACHE_COMPRESSORS = {compressor_cls.name: compressor_cls for compressor_cls in [ZlibCompressor, ZstdCompressor]}
+
+
+class CacheSerializer(object):
+    """
+    缓存值序列化器（编解码 + 可选压缩）
+    序列化后的首字节为头部: 低 3 位编码标识，高位压缩标识，
+    读取时按头部选择编解码器，切换编码方式后旧缓存仍可读取，无需清空缓存
+    """
+
+    def __init__(
+        self,
+        codec: Union[str, BaseCacheCodec] = "json",
+        compress: Union[str, BaseCacheCompressor] = None,
+        compress_threshold: int = 1024,
+    ):
+        """
+        Args:
+            codec: 编解码器 json、orjson、msgpack、pickle 或 BaseCacheCodec 实例
+            compress: 压缩方式 zlib、zstd 或 BaseCacheCompressor 实例，默认不压缩
+            compress_threshold: 编码后超过该字节数才压缩
+        """
+        self.codec = CACHE_CODECS[codec]() if isinstance(codec, str) else codec
+        self.compressor = CACHE_COMPRESSORS[compress]() if isinstance(compress, str) else compress
+        self.compress_threshold = compress_threshold
+        self._codecs: Dict[int, BaseCacheCodec] = {self.codec.codec_id: self.codec}
+        self._compressors: Dict[int, BaseCacheCompressor] = {}
+        if self.compressor:
+            self._compressors[self.compressor.compress_id] = self.compressor
+
+    def _get_codec(self, codec_id: int) -> BaseCacheCodec:
+        if codec_id not in self._codecs:
+            codec_cls = next(codec_cls for codec_cls in CACHE_CODECS.values() if codec_cls.codec_id == codec_id)
+            self._codecs[codec_id] = codec_cls()
+        return self._codecs[codec_id]
+
+    def _get_compressor(self, compress_id: int) -> BaseCacheCompressor:
+        if compress_id not in self._compressors:
+            compressor_cls = next(
+                compressor_cls
+                for compressor_cls in CACHE_COMPRESSORS.values()
+                if compressor_cls.compress_id == compress_id
+            )
+            self._compressors[compress_id] = compressor_cls()
+        return self._compressors[compress_id]
+
+    def dumps(self, obj) -> bytes:
+        data = self.codec.dumps(obj)
+        compress_id = 0
+        if self.compressor and len(data) > self.compress_threshold:
+            data = self.compressor.compress(data)
+            compress_id = self.compressor.compress_id
+
+        header = self.codec.codec_id | compress_id << 3
+        return bytes([header]) + data
+
+    @property
+    def binary(self) -> bool:
+        """序列化结果是否为二进制（二进制编码或压缩）"""
+        return self.codec.binary or self.compressor is not None
+
+    def loads(self, data: Union[bytes, str]):
+        if isinstance(data, str):
+            # decode_responses=True 的 redis 客户端返回 str，头部字节被解码为控制字符，文本编码的值去掉头部后解码
+            header = ord(data[0]) if data else 0
+            codec_id, compress_id = header & 0b111, header >> 3
+            if header < 0x20 and codec_id and not compress_id and not self._get_codec(codec_id).binary:
+                return self._get_codec(codec_id).loads(data[1:].encode())
+            # 兼容旧版本缓存的 json 字符串
+            return json.loads(data)
+
+        header = data[0]
+        codec_id, compress_id = header & 0b111, header >> 3
+        if not codec_id or compress_id > 2:
+            # 没有头部字节，兼容旧版本缓存的 json 字符串
+            return json.loads(data)
+
+        data = data[1:]
+        if compress_id:
+            data = self._get_compressor(compress_id).decompress(data)
+        return self._get_codec(codec_id).loads(data)
+
+
+# 直接 repr() 即可稳定编码的类型
+_KEY_SCALAR_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+class CacheKeyBuilder(object):
+    """
+    缓存 key 生成器
+    - 按参数名归一化位置参数与关键字参数，并补全默认值，f(1) 与 f(a=1) 生成相同的 key
+    - dict、list、set 等稳定编码，与顺序无关的容器排序后编码
+    - 默认使用 blake2b 哈希，可选 xxhash（需安装 xxhash）、md5、sha256
+    """
+
+    HASH_FUNCS = {
+        "blake2b": lambda data: hashlib.blake2b(data, digest_size=16).hexdigest(),
+        "md5": lambda data: hashlib.md5(data).hexdigest(),
+        "sha256": lambda data: hashlib.sha256(data).hexdigest(),
+    }
+
+    def __init__(self, ignore_args: List[str] = None, hash_algo: str = "blake2b"):
+        """
+        Args:
+            ignore_args: 不参与生成 key 的参数名，eg: ["self", "cls", "session"]
+                self 的默认 str() 包含内存地址，装饰实例方法时需要忽略或实现 __cache_key__() 方法
+            hash_algo: 哈希算法 blake2b、xxhash、md5、sha256
+        """
+        self.ignore_args = set(ignore_args or [])
+        self.hash_func = self._get_hash_func(hash_algo)
+        self._func_params: Dict[Callable, Tuple[List[str], Dict[str, Any], str]] = {}
+
+    def _get_hash_func(self, hash_algo: str) -> Callable[[bytes], str]:
+        if hash_algo == "xxhash":
+            import xxhash
+
+            return xxhash.xxh3_128_hexdigest
+        return self.HASH_FUNCS[hash_algo]
+
+    def _get_func_params(self, func) -> Tuple[List[str], Dict[str, Any], str]:
+        """获取函数的位置参数名、默认值与 key 前缀（每个函数只解析一次签名）"""
+        if func not in self._func_params:
+            arg_names, defaults = [], {}
+            for param in inspect.signature(func).parameters.values():
+                if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                    arg_names.append(param.name)
+                if param.default is not param.empty and param.name not in self.ignore_args:
+                    defaults[param.name] = param.default
+            self._func_params[func] = (arg_names, defaults, f"{func.__module__}:{func.__qualname__}:")
+        return self._func_params[func]
+
+    @classmethod
+    def normalize(cls, obj):
+        """将参数值转换成可稳定 repr() 的结构（dict 按键排序，set 排序）"""
+        obj_type = type(obj)
+        if obj_type in _KEY_SCALAR_TYPES:
+            return obj
+
+        if isinstance(obj, dict):
+            try:
+                keys = sorted(obj)
+            except TypeError:
+                keys = sorted(obj, key=repr)
+            ret = {}
+            for key in keys:
+                value = obj[key]
+                ret[key] = value if type(value) in _KEY_SCALAR_TYPES else cls.normalize(value)
+            return ret
+
+        if obj_type is list or obj_type is tuple:
+            for item in obj:
+                if type(item) not in _KEY_SCALAR_TYPES:
+                    return obj_type(cls.normalize(item) for item in obj)
+            return obj
+
+        if isinstance(obj, (set, frozenset)):
+            return ("__set__", *sorted((cls.normalize(item) for item in obj), key=repr))
+        if hasattr(obj, "__cache_key__"):
+            return obj.__cache_key__()
+        if isinstance(obj, BaseModel):
+            return (obj.__class__.__name__, cls.normalize(obj.model_dump()))
+        if isinstance(obj, (list, tuple, Decimal, datetime, date, dt_time)):
+            return obj
+        return str(obj)
+
+    def build(self, func, args: tuple, kwargs: dict) -> str:
+        """根据函数与参数生成哈希值"""
+        arg_names, defaults, key_prefix = self._get_func_params(func)
+        params = dict(defaults)
+        arg_num = len(arg_names)
+        for idx, arg in enumerate(args):
+            # 可变位置参数没有参数名，使用下标
+            params[arg_names[idx] if idx < arg_num else f"*{idx}"] = arg
+        params.update(kwargs)
+
+        for name in self.ignore_args:
+            params.pop(name, None)
+
+        hash_str = f"{key_prefix}{self.normalize(params)!r}"
+        return self.hash_func(hash_str.encode())
+
+    __call__ = build
+
+
+DEFAULT_KEY_BUILDER = CacheKeyBuilder()
+
+
+class CacheHistogram(object):
+    """累计直方图，记录各区间的次数，分位数按区间上界估算"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # 最后一个为超过最大区间的次数
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """估算分位数"""
+        if not self.count:
+            return 0
+        rank, cumulative = q * self.count, 0
+        for bucket, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(bucket, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bucket, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            buckets[bucket] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class CacheMetrics(object):
+    """缓存指标（命中、未命中、读写耗时、序列化耗时、缓存值大小、单飞等待）"""
+
+    LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+    SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    HISTOGRAM_BUCKETS = {
+        "get_latency": LATENCY_BUCKETS,
+        "set_latency": LATENCY_BUCKETS,
+        "serialize_time": LATENCY_BUCKETS,
+        "deserialize_time": LATENCY_BUCKETS,
+        "single_flight_wait": LATENCY_BUCKETS,
+        "value_size": SIZE_BUCKETS,
+    }
+    COUNTERS = ("hits", "misses", "stale_hits", "refreshes", "single_flight_waits", "bloom_rejects")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {name: 0 for name in self.COUNTERS}
+            self.histograms = {name: CacheHistogram(buckets) for name, buckets in self.HISTOGRAM_BUCKETS.items()}
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.counters["hits"], self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0,
+                **{name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            }
+
+
+# 开启指标的函数、缓存代理的指标 {名称: CacheMetrics}
+FUNC_METRICS: Dict[str, CacheMetrics] = {}
+PROXY_METRICS: Dict[str, CacheMetrics] = {}
+
+
+def cache_stats() -> dict:
+    """
+    所有开启指标（cache_json(metrics=True)）的函数与缓存代理的统计信息
+    Returns: {"functions": {函数名: 指标}, "proxies": {代理名: 指标}}
+    """
+    return {
+        "functions": {name: metrics.stats() for name, metrics in FUNC_METRICS.items()},
+        "proxies": {name: metrics.stats() for name, metrics in PROXY_METRICS.items()},
+    }
+
+
+# 比较 token 后再删除锁，避免误删其他进程的锁
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# 标签记录缓存 key，标签的过期时间只延长不缩短（兼容 Redis 6，EXPIRE NX、GT 需要 Redis 7）
+ADD_TAG_SCRIPT = """
+redis.call("sadd", KEYS[1], ARGV[1])
+local ttl = tonumber(ARGV[2])
+if redis.call("ttl", KEYS[1]) < ttl then
+    redis.call("expire", KEYS[1], ttl)
+end
+return 1
+"""
+
+
 class BaseCacheProxy(object):
     """缓存代理基类"""
 
-    def __init__(self, cache_client):
-        self.cache_client = cache_client  # 具体的缓存客户端，例如Redis、Memcached等
+    # 是否直接存取反序列化后的对象（为 True 时 cache_json 不做序列化处理）
+    stores_objects = False
+
+    def __init__(self, cache_client):
+        self.cache_client = cache_client  # 具体的缓存客户端，例如Redis、Memcached等
+        self._metrics: CacheMetrics = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.__class__.__name__}@{id(self):x}"
+
+    @property
+    def metrics(self) -> CacheMetrics:
+        """缓存代理的指标，首次访问时创建并注册"""
+        if self._metrics is None:
+            self._metrics = PROXY_METRICS.setdefault(self.name, CacheMetrics(self.name))
+        return self._metrics
+
+    def set(self, key: str, value: str, ttl: int):
+        raise NotImplementedError
+
+    def get(self, key):
+        cache_data = self.cache_client.get(key)
+        return cache_data
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """批量获取，按 keys 顺序返回，不存在的为 None"""
+        return [self.get(key) for key in keys]
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int):
+        """批量设置"""
+        for key, value in mapping.items():
+            self.set(key, value, ttl)
+
+    def acquire_lock(self, key: str, ttl: int) -> Optional[str]:
+        """获取分布式锁，成功返回锁的 token"""
+        raise NotImplementedError(f"{self.__class__.__name__} not support distributed lock")
+
+    def release_lock(self, key: str, token: str):
+        """释放分布式锁"""
+        raise NotImplementedError(f"{self.__class__.__name__} not support distributed lock")
+
+    def delete(self, *keys: str):
+        """删除缓存"""
+        raise NotImplementedError
+
+    def add_tags(self, key: str, tags: List[str], ttl: int, key_prefix: str = constants.CACHE_KEY_PREFIX):
+        """记录缓存 key 所属的标签，标签按 key_prefix 隔离（共用缓存服务的不同应用互不影响）"""
+        raise NotImplementedError(f"{self.__class__.__name__} not support cache tags")
+
+    def invalidate_tags(self, tags: List[str], key_prefix: str = constants.CACHE_KEY_PREFIX) -> int:
+        """删除标签下的所有缓存，返回删除的 key 数量"""
+        raise NotImplementedError(f"{self.__class__.__name__} not support cache tags")
+
+
+def is_decode_responses_client(client) -> bool:
+    """是否为 decode_responses=True 的 redis 客户端（读取的值为 str，二进制缓存值无法解码）"""
+    client = getattr(client, "wrapped_client", client)
+    clients = getattr(client, "clients", None)
+    if isinstance(clients, dict) and clients:
+        # 客户端分片，各节点连接参数相同
+        client = next(iter(clients.values()))
+    get_connection_kwargs = getattr(type(client), "get_connection_kwargs", None)
+    return bool(get_connection_kwargs and get_connection_kwargs(client).get("decode_responses"))
+
+
+def check_cache_serializer(proxy: BaseCacheProxy, serializer: CacheSerializer):
+    """二进制编码或压缩的缓存值不能通过 decode_responses=True 的 redis 客户端读取，装饰时提前报错"""
+    if serializer.binary and is_decode_responses_client(proxy.cache_client):
+        raise ValueError(
+            f"{proxy.__class__.__name__} uses a decode_responses=True redis client, which cannot read "
+            f"{serializer.codec.name} encoded or compressed cache values; use codec json/orjson without compress "
+            f"or a client created with decode_responses=False"
+        )
+
+
+def is_cluster_client(client) -> bool:
+    """是否为 Redis Cluster 客户端（多 key 命令需要按 slot 拆分），AutoPipelineRedis 等包装客户端按原始客户端判断"""
+    client = getattr(client, "wrapped_client", client)
+    return isinstance(client, (RedisCluster, AsyncRedisCluster))
+
+
+class _RedisTagMixin:
+    """Redis 缓存标签，每个标签一个 Set 记录所属的缓存 key"""
+
+    tag_delete_batch = 500  # 失效时每条 DEL 命令删除的 key 数量
+
+    @staticmethod
+    def _tag_key(tag: str, key_prefix: str = constants.CACHE_KEY_PREFIX) -> str:
+        return f"{key_prefix}:cache_tag:{tag}"
+
+    def _add_tags_pipeline(self, key: str, tags: List[str], ttl: int, key_prefix: str = constants.CACHE_KEY_PREFIX):
+        """SADD 记录 key，标签的过期时间只延长不缩短，不短于其中的缓存（每个标签一个单 key 脚本，兼容集群）"""
+        pipe = self.cache_client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.eval(ADD_TAG_SCRIPT, 1, self._tag_key(tag, key_prefix), key, ttl)
+        return pipe
+
+    def _members_pipeline(self, tag_keys: List[str]):
+        pipe = self.cache_client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        return pipe
+
+    @staticmethod
+    def _union_members(members_list: List[set]) -> List[str]:
+        keys = set().union(*members_list)
+        return [key.decode() if isinstance(key, bytes) else key for key in keys]
+
+    def _delete_pipeline(self, keys: List[str], tag_keys: List[str]):
+        """分批删除缓存 key 与标签"""
+        pipe = self.cache_client.pipeline(transaction=False)
+        if is_cluster_client(self.cache_client):
+            # 集群 pipeline 不支持多 key 的 DEL，逐个删除，由客户端按节点分组发送
+            for key in itertools.chain(keys, tag_keys):
+                pipe.delete(key)
+            return pipe
+
+        for i in range(0, len(keys), self.tag_delete_batch):
+            pipe.delete(*keys[i : i + self.tag_delete_batch])
+        if tag_keys:
+            # 没有参数的 DEL 会被服务端拒绝
+            pipe.delete(*tag_keys)
+        return pipe
+
+
+class CacheTagIndex(object):
+    """进程内缓存标签索引 tag -> {key: 过期时间}"""
+
+    prune_threshold = 1024  # 单个标签的 key 数量每增加该数量清理一次已过期的 key
+
+    def __init__(self):
+        self._tag_keys: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, tags: List[str], ttl: float = None, key_prefix: str = constants.CACHE_KEY_PREFIX):
+        now = time.monotonic()
+        expire_at = now + ttl if ttl else math.inf
+        with self._lock:
+            for tag in tags:
+                tag = f"{key_prefix}:{tag}"
+                keys = self._tag_keys.setdefault(tag, {})
+                keys[key] = max(keys.get(key, 0), expire_at)
+                if len(keys) % self.prune_threshold == 0:
+                    self._tag_keys[tag] = {k: v for k, v in keys.items() if v > now}
+
+    def pop(self, tags: List[str], key_prefix: str = constants.CACHE_KEY_PREFIX) -> List[str]:
+        """移除标签并返回其中的 key"""
+        keys = set()
+        with self._lock:
+            for tag in tags:
+                keys.update(self._tag_keys.pop(f"{key_prefix}:{tag}", {}))
+        return list(keys)
+
+
+class RedisCacheProxy(_RedisTagMixin, BaseCacheProxy):
+    """同步redis缓存代理"""
+
+    def __init__(self, cache_client: Redis):
+        super().__init__(cache_client)
+
+    def set(self, key, value, ttl):
+        self.cache_client.setex(name=key, value=value, time=ttl)
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        if is_cluster_client(self.cache_client):
+            # 按 slot 分组获取
+            return self.cache_client.mget_nonatomic(keys)
+        return self.cache_client.mget(keys)
+
+    def set_many(self, mapping, ttl):
+        pipe = self.cache_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(name=key, value=value, time=ttl)
+        pipe.execute()
+
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.cache_client.set(name=key, value=token, nx=True, ex=ttl):
+            return token
+
+    def release_lock(self, key, token):
+        self.cache_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    def delete(self, *keys):
+        self.cache_client.delete(*keys)
+
+    def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        self._add_tags_pipeline(key, tags, ttl, key_prefix).execute()
+
+    def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        tag_keys = [self._tag_key(tag, key_prefix) for tag in tags]
+        keys = self._union_members(self._members_pipeline(tag_keys).execute())
+        self._delete_pipeline(keys, tag_keys).execute()
+        return len(keys)
+
+
+class AsyncRedisCacheProxy(_RedisTagMixin, BaseCacheProxy):
+    """异步Redis缓存代理"""
+
+    def __init__(self, cache_client: aioredis.Redis):
+        super().__init__(cache_client)
+
+    async def set(self, key, value, ttl):
+        await self.cache_client.setex(name=key, value=value, time=ttl)
+
+    async def get(self, key):
+        cache_data = await self.cache_client.get(key)
+        return cache_data
+
+    async def get_many(self, keys):
+        if not keys:
+            return []
+        if is_cluster_client(self.cache_client):
+            return await self.cache_client.mget_nonatomic(keys)
+        return await self.cache_client.mget(keys)
+
+    async def set_many(self, mapping, ttl):
+        pipe = self.cache_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(name=key, value=value, time=ttl)
+        await pipe.execute()
+
+    async def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if await self.cache_client.set(name=key, value=token, nx=True, ex=ttl):
+            return token
+
+    async def release_lock(self, key, token):
+        await self.cache_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def delete(self, *keys):
+        await self.cache_client.delete(*keys)
+
+    async def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        await self._add_tags_pipeline(key, tags, ttl, key_prefix).execute()
+
+    async def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        tag_keys = [self._tag_key(tag, key_prefix) for tag in tags]
+        keys = self._union_members(await self._members_pipeline(tag_keys).execute())
+        await self._delete_pipeline(keys, tag_keys).execute()
+        return len(keys)
+
+
+class MemoryCacheProxy(BaseCacheProxy):
+    """
+    系统内存缓存代理，存储序列化后的值
+    cache_client 可以是 cacheout.Cache（按条目数限制）或 LRUMemoryCache、TinyLFUMemoryCache（按序列化后的字节数限制）
+    """
+
+    def __init__(self, cache_client: Union[cacheout.Cache, "LRUMemoryCache"]):
+        super().__init__(cache_client)
+        self.tag_index = CacheTagIndex()
+
+    def set(self, key, value, ttl):
+        self.cache_client.set(key=key, value=value, ttl=ttl)
+
+    def set_many(self, mapping, ttl):
+        self.cache_client.set_many(mapping, ttl=ttl)
+
+    def delete(self, *keys):
+        self.cache_client.delete_many(list(keys))
+
+    def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        self.tag_index.add(key, tags, ttl, key_prefix)
+
+    def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        keys = self.tag_index.pop(tags, key_prefix)
+        self.delete(*keys)
+        return len(keys)
+
+    def stats(self) -> dict:
+        """容量统计"""
+        if isinstance(self.cache_client, LRUMemoryCache):
+            return self.cache_client.stats()
+        return {"size": self.cache_client.size(), "maxsize": self.cache_client.maxsize}
+
+
+MEMORY_PROXY = MemoryCacheProxy(cache_client=cacheout.Cache(maxsize=1024))
+
+
+def estimate_size(obj, _depth: int = 0) -> int:
+    """估算对象占用的内存字节数（递归累加容器元素的 sys.getsizeof，超过一定深度不再计算）"""
+    size = sys.getsizeof(obj)
+    if _depth >= 8:
+        return size
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in obj)
+    elif isinstance(obj, BaseModel):
+        size += estimate_size(obj.__dict__, _depth + 1)
+    return size
+
+
+class LRUMemoryCache:
+    """
+    进程内 LRU + TTL 缓存，同时按条目数与估算的字节数限制容量
+    读写加线程锁且不涉及 await，可在多个协程、线程之间共享
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 64 * 1024 * 1024, sizeof: Callable = estimate_size):
+        """
+        Args:
+            maxsize: 最大条目数，0 不限制
+            max_bytes: 最大字节数，0 不限制
+            sizeof: 计算缓存值字节数的函数，默认 estimate_size 估算
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()  # key -> (value, 过期时间戳, 字节数)
+        self._lock = threading.Lock()
+
+    def _pop(self, key):
+        _, _, size = self._data.pop(key)
+        self.total_bytes -= size
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到满足容量限制"""
+        while self._data and (
+            (self.maxsize and len(self._data) > self.maxsize) or (self.max_bytes and self.total_bytes > self.max_bytes)
+        ):
+            self._pop(next(iter(self._data)))
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            if item[1] and item[1] <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl: float = None):
+        size = self.sizeof(value)
+        expire_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if self.max_bytes and size > self.max_bytes:
+                # 单个值超过容量上限不缓存
+                return
+            self._data[key] = (value, expire_at, size)
+            self.total_bytes += size
+            self._evict()
+
+    def set_many(self, mapping: Dict[str, Any], ttl: float = None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl=ttl)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._pop(key)
+
+    def delete_many(self, keys: List[str]):
+        self.delete(*keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """容量与命中统计"""
+        total = self.hits + self.misses
+        return {
+            "policy": "lru",
+            "size": self.size(),
+            "maxsize": self.maxsize,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0,
+        }
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch 频率估算（TinyLFU）
+    depth 行 4 位饱和计数器（上限 15），写入次数达到 10 倍宽度时所有计数减半，让过去的热点逐渐冷却
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        width = 1 << max(4, (width - 1).bit_length())
+        self.mask = width - 1
+        self.depth = depth
+        self.table = [bytearray(width) for _ in range(depth)]
+        self.additions = 0
+        self.reset_at = width * 10
+
+    def _indexes(self, key) -> List[int]:
+        return [hash((key, i)) & self.mask for i in range(self.depth)]
+
+    def increment(self, key):
+        for row, idx in zip(self.table, self._indexes(key)):
+            if row[idx] < self.MAX_COUNT:
+                row[idx] += 1
+        self.additions += 1
+        if self.additions >= self.reset_at:
+            self.table = [bytearray(count >> 1 for count in row) for row in self.table]
+            self.additions //= 2
+
+    def frequency(self, key) -> int:
+        return min(row[idx] for row, idx in zip(self.table, self._indexes(key)))
+
+
+class TinyLFUMemoryCache(LRUMemoryCache):
+    """
+    进程内 W-TinyLFU + TTL 缓存，按条目数与字节数限制容量
+    新写入先进入窗口 LRU（默认 1% 容量），窗口淘汰的候选者与主区（SLRU：试用区 + 保护区）的淘汰者比较访问频率，
+    频率更高才准入，一次性扫描的大量冷数据不会挤掉热点数据，命中率通常高于 LRU
+    """
+
+    WINDOW, PROBATION, PROTECTED = 0, 1, 2
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sizeof: Callable = estimate_size,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+        sketch_width: int = None,
+    ):
+        """
+        Args:
+            maxsize: 最大条目数，0 不限制
+            max_bytes: 最大字节数，0 不限制
+            sizeof: 计算缓存值字节数的函数，默认 estimate_size 估算
+            window_ratio: 窗口 LRU 占总容量的比例
+            protected_ratio: 保护区占主区容量的比例
+            sketch_width: 频率估算的计数器宽度，默认为 maxsize 的 4 倍（至少 4096）
+        """
+        super().__init__(maxsize=maxsize, max_bytes=max_bytes, sizeof=sizeof)
+        self.window_ratio = window_ratio
+        self.protected_ratio = protected_ratio
+        self.sketch = CountMinSketch(width=sketch_width or max(maxsize * 4, 4096))
+        self._segments: List["OrderedDict[str, Tuple[Any, float, int]]"] = [OrderedDict(), OrderedDict(), OrderedDict()]
+        self._segment_bytes = [0, 0, 0]
+        self._key_segment: Dict[Any, int] = {}
+
+        window_size = max(1, int(maxsize * window_ratio)) if maxsize else 0
+        window_bytes = int(max_bytes * window_ratio) if max_bytes else 0
+        main_size = maxsize - window_size if maxsize else 0
+        main_bytes = max_bytes - window_bytes if max_bytes else 0
+        # 各区域容量 (条目数, 字节数)，0 不限制
+        self._window_limit = (window_size, window_bytes)
+        self._main_limit = (main_size, main_bytes)
+        self._protected_limit = (int(main_size * protected_ratio), int(main_bytes * protected_ratio))
+
+    @staticmethod
+    def _over(count: int, nbytes: int, limit: Tuple[int, int]) -> bool:
+        return bool((limit[0] and count > limit[0]) or (limit[1] and nbytes > limit[1]))
+
+    def _insert(self, segment: int, key, item: Tuple[Any, float, int]):
+        self._segments[segment][key] = item
+        self._segment_bytes[segment] += item[2]
+        self._key_segment[key] = segment
+        self.total_bytes += item[2]
+
+    def _remove(self, key) -> Tuple[Any, float, int]:
+        segment = self._key_segment.pop(key)
+        item = self._segments[segment].pop(key)
+        self._segment_bytes[segment] -= item[2]
+        self.total_bytes -= item[2]
+        return item
+
+    def _pop(self, key):
+        self._remove(key)
+
+    def _main_over(self, extra_count: int = 0, extra_bytes: int = 0) -> bool:
+        count = len(self._segments[self.PROBATION]) + len(self._segments[self.PROTECTED]) + extra_count
+        nbytes = self._segment_bytes[self.PROBATION] + self._segment_bytes[self.PROTECTED] + extra_bytes
+        return self._over(count, nbytes, self._main_limit)
+
+    def _admit(self, key, item: Tuple[Any, float, int]):
+        """窗口淘汰的候选者与主区淘汰者比较频率，频率更高才进入主区试用区"""
+        candidate_freq = self.sketch.frequency(key)
+        while self._main_over(1, item[2]):
+            victim_segment = self.PROBATION if self._segments[self.PROBATION] else self.PROTECTED
+            if not self._segments[victim_segment] or candidate_freq <= self.sketch.frequency(
+                next(iter(self._segments[victim_segment]))
+            ):
+                self.evictions += 1
+                return
+            self._remove(next(iter(self._segments[victim_segment])))
+            self.evictions += 1
+        self._insert(self.PROBATION, key, item)
+
+    def _evict(self):
+        window = self._segments[self.WINDOW]
+        while window and self._over(len(window), self._segment_bytes[self.WINDOW], self._window_limit):
+            key = next(iter(window))
+            self._admit(key, self._remove(key))
+
+    def _promote(self, key):
+        """试用区再次命中晋升到保护区，保护区超出容量时最久未使用的降级回试用区"""
+        self._insert(self.PROTECTED, key, self._remove(key))
+        protected = self._segments[self.PROTECTED]
+        while len(protected) > 1 and self._over(
+            len(protected), self._segment_bytes[self.PROTECTED], self._protected_limit
+        ):
+            demoted = next(iter(protected))
+            self._insert(self.PROBATION, demoted, self._remove(demoted))
+
+    def get(self, key, default=None):
+        with self._lock:
+            self.sketch.increment(key)
+            segment = self._key_segment.get(key)
+            if segment is None:
+                self.misses += 1
+                return default
+            item = self._segments[segment][key]
+            if item[1] and item[1] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            if segment == self.PROBATION:
+                self._promote(key)
+            else:
+                self._segments[segment].move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl: float = None):
+        size = self.sizeof(value)
+        expire_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self.sketch.increment(key)
+            segment = self._key_segment.get(key, self.WINDOW)
+            if key in self._key_segment:
+                # 更新保留所在区域
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            self._insert(segment, key, (value, expire_at, size))
+            if segment != self.WINDOW and self._main_over():
+                self._admit(key, self._remove(key))
+            self._evict()
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._key_segment:
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.clear()
+            self._segment_bytes = [0, 0, 0]
+            self._key_segment.clear()
+            self.total_bytes = 0
+
+    def size(self) -> int:
+        return len(self._key_segment)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update(
+            policy="w-tinylfu",
+            window_bytes=self._segment_bytes[self.WINDOW],
+            probation_bytes=self._segment_bytes[self.PROBATION],
+            protected_bytes=self._segment_bytes[self.PROTECTED],
+        )
+        return stats
+
+
+class AsyncMemoryCacheProxy(BaseCacheProxy):
+    """
+    异步进程内缓存代理，异步函数默认的缓存
+    直接存储反序列化后的对象，命中时没有序列化开销
+
+    Notes:
+        命中返回的是同一个对象，调用方不要修改
+    """
+
+    stores_objects = True
+
+    def __init__(self, cache_client: LRUMemoryCache = None):
+        super().__init__(cache_client or LRUMemoryCache())
+        self.tag_index = CacheTagIndex()
+
+    async def get(self, key):
+        return self.cache_client.get(key)
+
+    async def set(self, key, value, ttl):
+        self.cache_client.set(key, value, ttl=ttl)
+
+    async def get_many(self, keys):
+        return [self.cache_client.get(key) for key in keys]
+
+    async def set_many(self, mapping, ttl):
+        for key, value in mapping.items():
+            self.cache_client.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        self.cache_client.delete(*keys)
+
+    async def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        self.tag_index.add(key, tags, ttl, key_prefix)
+
+    async def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        return self._invalidate_tags(tags, key_prefix)
+
+    def _invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX) -> int:
+        """同步删除标签下的缓存（进程内缓存不需要等待 IO），供未指定缓存代理的 invalidate_tags 调用"""
+        keys = self.tag_index.pop(tags, key_prefix)
+        self.cache_client.delete(*keys)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return self.cache_client.stats()
+
+
+ASYNC_MEMORY_PROXY = AsyncMemoryCacheProxy()
+
+
+def get_default_cache_proxy(is_async: bool = False) -> BaseCacheProxy:
+    """未指定缓存代理时的默认内存缓存"""
+    return ASYNC_MEMORY_PROXY if is_async else MEMORY_PROXY
+
+
+def set_default_cache_proxy(proxy: BaseCacheProxy = None, async_proxy: BaseCacheProxy = None):
+    """
+    设置未指定缓存代理时的默认缓存，只影响之后装饰的函数，需要在导入业务模块前设置
+
+    Args:
+        proxy: 同步函数的默认缓存代理
+        async_proxy: 异步函数的默认缓存代理
+
+    Examples:
+        # 按字节数限制容量并使用 W-TinyLFU 淘汰
+        set_default_cache_proxy(
+            proxy=MemoryCacheProxy(TinyLFUMemoryCache(maxsize=0, max_bytes=256 * 1024 * 1024)),
+            async_proxy=AsyncMemoryCacheProxy(TinyLFUMemoryCache(maxsize=0, max_bytes=256 * 1024 * 1024)),
+        )
+    """
+    global MEMORY_PROXY, ASYNC_MEMORY_PROXY
+    if proxy is not None:
+        MEMORY_PROXY = proxy
+    if async_proxy is not None:
+        ASYNC_MEMORY_PROXY = async_proxy
+
+
+class MemcacheCacheProxy(BaseCacheProxy):
+    def __init__(self, cache_client: memcache.Client):
+        super().__init__(cache_client)
+
+    def set(self, key, value, ttl):
+        self.cache_client.set(key, value, time=ttl)
+
+    def get_many(self, keys):
+        cache_datas = self.cache_client.get_multi(keys)
+        return [cache_datas.get(key) for key in keys]
+
+    def set_many(self, mapping, ttl):
+        self.cache_client.set_multi(mapping, time=ttl)
+
+    def delete(self, *keys):
+        self.cache_client.delete_multi(keys)
+
+
+class AsyncMemcacheCacheProxy(BaseCacheProxy):
+    """
+    异步 Memcached 缓存代理，不阻塞事件循环
+    连接池 + 一致性哈希多节点，get_many、set_many 每个节点一次往返
+
+    Examples:
+        proxy = AsyncMemcacheCacheProxy(AsyncMemcacheClient(["10.0.0.1:11211", "10.0.0.2:11211"]))
+
+        @cache_json(cache_proxy=proxy, ttl=60)
+        async def get_user(user_id): ...
+    """
+
+    def __init__(self, cache_client: AsyncMemcacheClient):
+        super().__init__(cache_client)
+
+    async def get(self, key):
+        return await self.cache_client.get(key)
+
+    async def set(self, key, value, ttl):
+        await self.cache_client.set(key, value, ttl=ttl)
+
+    async def get_many(self, keys):
+        cache_datas = await self.cache_client.get_multi(keys) if keys else {}
+        return [cache_datas.get(key) for key in keys]
+
+    async def set_many(self, mapping, ttl):
+        await self.cache_client.set_multi(mapping, ttl=ttl)
+
+    async def delete(self, *keys):
+        await self.cache_client.delete_multi(list(keys))
+
+    async def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if await self.cache_client.add(key, token, ttl=ttl):
+            return token
+
+    async def release_lock(self, key, token):
+        # Memcached 没有原子的比较删除，锁过期后被其他人获取时可能误删
+        if await self.cache_client.get(key) == token:
+            await self.cache_client.delete(key)
+
+
+class _TieredCacheMixin:
+    """二级缓存公共处理"""
+
+    _MISSING = object()
+
+    def _init_tiered(self, l1_maxsize: int, l1_ttl: int, channel: str, serializer: CacheSerializer):
+        self.serializer = serializer or CacheSerializer()
+        self.l1_cache = cacheout.LRUCache(maxsize=l1_maxsize)
+        self.l1_ttl = l1_ttl
+        self.channel = channel or f"{constants.CACHE_KEY_PREFIX}:cache_invalidate"
+        self.node_id = uuid.uuid4().hex  # 当前节点标识，忽略自己发布的失效消息
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def _l1_get(self, key):
+        value = self.l1_cache.get(key, default=self._MISSING)
+        if value is not self._MISSING:
+            self.l1_hits += 1
+        return value
+
+    def _l1_set_from_l2(self, key, cache_data, pttl):
+        """L2 命中回填 L1，L1 过期时间不超过 L2 剩余时间"""
+        self.l2_hits += 1
+        return self._l1_fill(key, cache_data, pttl)
+
+    def _l1_fill(self, key, cache_data, pttl):
+        value = self.serializer.loads(cache_data)
+        l1_ttl = self.l1_ttl if not pttl or pttl < 0 else min(self.l1_ttl, pttl / 1000)
+        self.l1_cache.set(key, value, ttl=l1_ttl)
+        return value
+
+    def _l1_set_many_from_l2(self, keys: List[str], pipe_rets: list) -> list:
+        """批量回填 L1，pipe_rets 为每个 key 依次 GET、PTTL 的结果"""
+        values = []
+        for key, cache_data, pttl in zip(keys, pipe_rets[::2], pipe_rets[1::2]):
+            if cache_data is None:
+                self.misses += 1
+                values.append(None)
+            else:
+                values.append(self._l1_set_from_l2(key, cache_data, pttl))
+        return values
 
-    def set(self, key: str, value: str, ttl: int):
-        raise NotImplementedError
+    def _l2_set_many_pipeline(self, mapping: Dict[str, Any], ttl: int, serializer: CacheSerializer = None):
+        """
+        批量写入 L2 并发布失效消息的 pipeline
+        L1 写入 L2 值解码后的对象，L1、L2 命中的结果类型一致（eg: json 编码时 datetime 都为字符串）
 
-    def get(self, key):
-        cache_data = self.cache_client.get(key)
-        return cache_data
+        Returns: (pipeline, 写入 L1 的 {key: value})
+        """
+        serializer = serializer or self.serializer
+        pipe = self.cache_client.pipeline(transaction=False)
+        l1_mapping = {}
+        for key, value in mapping.items():
+            cache_data = serializer.dumps(value)
+            pipe.setex(name=key, value=cache_data, time=ttl)
+            l1_mapping[key] = serializer.loads(cache_data)
+        return pipe.publish(self.channel, self._invalidate_message(list(mapping))), l1_mapping
 
+    def _delete_pipeline(self, keys: List[str], tag_keys: List[str]):
+        """标签失效时同时发布失效消息并驱逐本地 L1"""
+        self.invalidate_local(keys)
+        return super()._delete_pipeline(keys, tag_keys).publish(self.channel, self._invalidate_message(keys))
 
-class RedisCacheProxy(BaseCacheProxy):
-    """同步redis缓存代理"""
+    def _warm_up_pattern(self, pattern: str) -> str:
+        return pattern or f"{constants.CACHE_KEY_PREFIX}:cache_json:*"
 
-    def __init__(self, cache_client: Redis):
+    @staticmethod
+    def _warm_up_key(key) -> Optional[str]:
+        """预热的 key，跳过分布式锁"""
+        key = key.decode() if isinstance(key, bytes) else key
+        return None if key.endswith(":lock") else key
+
+    def _hot_keys_pipeline(self, keys: List[str]):
+        """每个 key 的访问频率（LFU 淘汰策略）与空闲时间"""
+        pipe = self.cache_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.execute_command("OBJECT", "FREQ", key)
+            pipe.execute_command("OBJECT", "IDLETIME", key)
+        return pipe
+
+    @staticmethod
+    def _rank_hot_keys(keys: List[str], pipe_rets: list, limit: int) -> List[str]:
+        """按访问频率降序、空闲时间升序排序，都不支持（非 LFU 策略、托管 Redis 禁用 OBJECT）时保持扫描顺序"""
+
+        def _score(item):
+            _, freq, idle = item
+            return (freq if isinstance(freq, int) else 0, -idle if isinstance(idle, int) else 0)
+
+        ranked = sorted(zip(keys, pipe_rets[::2], pipe_rets[1::2]), key=_score, reverse=True)
+        return [key for key, _, _ in ranked[:limit]]
+
+    def _l1_fill_many(self, keys: List[str], pipe_rets: list) -> int:
+        """预热写入 L1（不计入命中统计），pipe_rets 为每个 key 依次 GET、PTTL 的结果"""
+        count = 0
+        for key, cache_data, pttl in zip(keys, pipe_rets[::2], pipe_rets[1::2]):
+            if cache_data is None:
+                continue
+            try:
+                self._l1_fill(key, cache_data, pttl)
+                count += 1
+            except Exception as e:
+                logger.warning(f"warm up l1 {key} error {e}")
+        return count
+
+    def _invalidate_message(self, keys: List[str]) -> str:
+        return json.dumps({"node": self.node_id, "keys": keys})
+
+    def _handle_invalidate_message(self, message: dict):
+        """处理其他节点发布的失效消息，驱逐本地 L1"""
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if data.get("node") == self.node_id:
+            return
+        self.invalidate_local(data.get("keys") or [])
+
+    def invalidate_local(self, keys: List[str]):
+        """驱逐本地 L1 缓存"""
+        for key in keys:
+            self.l1_cache.delete(key)
+
+    def hit_stats(self) -> dict:
+        """各级缓存命中统计"""
+        total = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "l1_hit_ratio": self.l1_hits / total if total else 0,
+            "l2_hit_ratio": self.l2_hits / (self.l2_hits + self.misses) if self.l2_hits + self.misses else 0,
+            "hit_ratio": (self.l1_hits + self.l2_hits) / total if total else 0,
+            "l1_size": self.l1_cache.size(),
+        }
+
+
+class TieredCacheProxy(_TieredCacheMixin, _RedisTagMixin, BaseCacheProxy):
+    """
+    同步二级缓存代理（L1 进程内 LRU/TTL 缓存 + L2 Redis）
+    L1 存储反序列化后的对象，命中时无网络开销和 json 解析；
+    写入与删除通过 Redis 发布订阅通知其他节点驱逐 L1
+
+    Notes:
+        L1 命中返回的是同一个对象，调用方不要修改
+    """
+
+    stores_objects = True
+
+    def __init__(
+        self,
+        cache_client: Redis,
+        l1_maxsize: int = 1024,
+        l1_ttl: int = 60,
+        channel: str = None,
+        subscribe: bool = True,
+        serializer: CacheSerializer = None,
+    ):
+        """
+        Args:
+            cache_client: 同步 redis 客户端
+            l1_maxsize: L1 最大缓存数量
+            l1_ttl: L1 最长有效期（秒），失效消息丢失时的最长不一致时间
+            channel: 失效消息发布订阅的频道
+            subscribe: 是否订阅其他节点的失效消息
+            serializer: L2 缓存值序列化器，默认 json，cache_json 写入时使用装饰器的 codec、compress
+        """
         super().__init__(cache_client)
+        self._init_tiered(l1_maxsize=l1_maxsize, l1_ttl=l1_ttl, channel=channel, serializer=serializer)
+        self._pubsub_thread = None
+        if subscribe:
+            self.start_subscribe()
 
-    def set(self, key, value, ttl):
-        self.cache_client.setex(name=key, value=value, time=ttl)
+    def start_subscribe(self):
+        """后台线程订阅失效消息"""
+        if self._pubsub_thread is None:
+            pubsub = self.cache_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._handle_invalidate_message})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
 
+    def stop_subscribe(self):
+        if self._pubsub_thread:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
 
-class AsyncRedisCacheProxy(BaseCacheProxy):
-    """异步Redis缓存代理"""
+    def warm_up_l1(self, pattern: str = None, limit: int = 1000, scan_limit: int = None) -> int:
+        """
+        将 Redis 中的热点缓存复制到 L1
+        Args:
+            pattern: 扫描的 key 模式，默认 cache_json 的缓存 key
+            limit: 最多复制的 key 数量
+            scan_limit: 最多扫描的 key 数量，默认 limit 的 10 倍，按访问频率（LFU）或最近访问时间选出热点
 
-    def __init__(self, cache_client: aioredis.Redis):
+        Returns: 复制到 L1 的 key 数量
+        """
+        scan_limit = scan_limit or limit * 10
+        keys = []
+        for key in self.cache_client.scan_iter(match=self._warm_up_pattern(pattern), count=1000):
+            key = self._warm_up_key(key)
+            if key:
+                keys.append(key)
+            if len(keys) >= scan_limit:
+                break
+        if not keys:
+            return 0
+
+        hot_keys = self._rank_hot_keys(keys, self._hot_keys_pipeline(keys).execute(raise_on_error=False), limit)
+        pipe = self.cache_client.pipeline(transaction=False)
+        for key in hot_keys:
+            pipe.get(key).pttl(key)
+        return self._l1_fill_many(hot_keys, pipe.execute())
+
+    def get(self, key):
+        value = self._l1_get(key)
+        if value is not self._MISSING:
+            return value
+
+        # 一次往返获取值与剩余过期时间
+        cache_data, pttl = self.cache_client.pipeline(transaction=False).get(key).pttl(key).execute()
+        if cache_data is None:
+            self.misses += 1
+            return None
+        return self._l1_set_from_l2(key, cache_data, pttl)
+
+    def get_many(self, keys):
+        values = [self._l1_get(key) for key in keys]
+        l2_keys = [key for key, value in zip(keys, values) if value is self._MISSING]
+        if l2_keys:
+            pipe = self.cache_client.pipeline(transaction=False)
+            for key in l2_keys:
+                pipe.get(key).pttl(key)
+            l2_values = dict(zip(l2_keys, self._l1_set_many_from_l2(l2_keys, pipe.execute())))
+            values = [l2_values[key] if value is self._MISSING else value for key, value in zip(keys, values)]
+        return values
+
+    def set(self, key, value, ttl, serializer: CacheSerializer = None):
+        self.set_many({key: value}, ttl, serializer=serializer)
+
+    def set_many(self, mapping, ttl, serializer: CacheSerializer = None):
+        """批量写入，serializer 为 L2 的序列化器（cache_json 传入装饰器的 codec），默认代理的 serializer"""
+        pipe, l1_mapping = self._l2_set_many_pipeline(mapping, ttl, serializer)
+        pipe.execute()
+        self.l1_cache.set_many(l1_mapping, ttl=min(ttl, self.l1_ttl))
+
+    def delete(self, *keys: str):
+        """删除缓存并通知其他节点"""
+        pipe = self.cache_client.pipeline(transaction=False)
+        pipe.delete(*keys).publish(self.channel, self._invalidate_message(list(keys))).execute()
+        self.invalidate_local(keys)
+
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.cache_client.set(name=key, value=token, nx=True, ex=ttl):
+            return token
+
+    def release_lock(self, key, token):
+        self.cache_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        self._add_tags_pipeline(key, tags, ttl, key_prefix).execute()
+
+    def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        tag_keys = [self._tag_key(tag, key_prefix) for tag in tags]
+        keys = self._union_members(self._members_pipeline(tag_keys).execute())
+        self._delete_pipeline(keys, tag_keys).execute()
+        return len(keys)
+
+
+class AsyncTieredCacheProxy(_TieredCacheMixin, _RedisTagMixin, BaseCacheProxy):
+    """
+    异步二级缓存代理（L1 进程内 LRU/TTL 缓存 + L2 Redis）
+    首次读写时在当前事件循环中启动失效消息订阅任务
+
+    Notes:
+        L1 命中返回的是同一个对象，调用方不要修改
+    """
+
+    stores_objects = True
+
+    def __init__(
+        self,
+        cache_client: aioredis.Redis,
+        l1_maxsize: int = 1024,
+        l1_ttl: int = 60,
+        channel: str = None,
+        subscribe: bool = True,
+        serializer: CacheSerializer = None,
+    ):
         super().__init__(cache_client)
+        self._init_tiered(l1_maxsize=l1_maxsize, l1_ttl=l1_ttl, channel=channel, serializer=serializer)
+        self.subscribe = subscribe
+        self._subscribe_task: asyncio.Task = None
 
-    async def set(self, key, value, ttl):
-        await self.cache_client.setex(name=key, value=value, time=ttl)
+    async def _subscribe_loop(self):
+        pubsub = self.cache_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message and message.get("type") == "message":
+                    self._handle_invalidate_message(message)
+        finally:
+            await pubsub.aclose()
+
+    def start_subscribe(self) -> asyncio.Task:
+        """事件循环中启动失效消息订阅任务"""
+        if self._subscribe_task is None or self._subscribe_task.done():
+            self._subscribe_task = asyncio.create_task(self._subscribe_loop())
+        return self._subscribe_task
+
+    async def stop_subscribe(self):
+        if self._subscribe_task:
+            self._subscribe_task.cancel()
+            try:
+                await self._subscribe_task
+            except asyncio.CancelledError:
+                pass
+            self._subscribe_task = None
+
+    async def warm_up_l1(self, pattern: str = None, limit: int = 1000, scan_limit: int = None) -> int:
+        """将 Redis 中的热点缓存复制到 L1，参数同 TieredCacheProxy.warm_up_l1"""
+        scan_limit = scan_limit or limit * 10
+        keys = []
+        async for key in self.cache_client.scan_iter(match=self._warm_up_pattern(pattern), count=1000):
+            key = self._warm_up_key(key)
+            if key:
+                keys.append(key)
+            if len(keys) >= scan_limit:
+                break
+        if not keys:
+            return 0
+
+        pipe_rets = await self._hot_keys_pipeline(keys).execute(raise_on_error=False)
+        hot_keys = self._rank_hot_keys(keys, pipe_rets, limit)
+        pipe = self.cache_client.pipeline(transaction=False)
+        for key in hot_keys:
+            pipe.get(key).pttl(key)
+        return self._l1_fill_many(hot_keys, await pipe.execute())
 
     async def get(self, key):
-        cache_data = await self.cache_client.get(key)
-        return cache_data
+        if self.subscribe:
+            self.start_subscribe()
 
+        value = self._l1_get(key)
+        if value is not self._MISSING:
+            return value
 
-class MemoryCacheProxy(BaseCacheProxy):
-    """系统内存缓存代理"""
+        cache_data, pttl = await self.cache_client.pipeline(transaction=False).get(key).pttl(key).execute()
+        if cache_data is None:
+            self.misses += 1
+            return None
+        return self._l1_set_from_l2(key, cache_data, pttl)
+
+    async def get_many(self, keys):
+        if self.subscribe:
+            self.start_subscribe()
+
+        values = [self._l1_get(key) for key in keys]
+        l2_keys = [key for key, value in zip(keys, values) if value is self._MISSING]
+        if l2_keys:
+            pipe = self.cache_client.pipeline(transaction=False)
+            for key in l2_keys:
+                pipe.get(key).pttl(key)
+            l2_values = dict(zip(l2_keys, self._l1_set_many_from_l2(l2_keys, await pipe.execute())))
+            values = [l2_values[key] if value is self._MISSING else value for key, value in zip(keys, values)]
+        return values
+
+    async def set(self, key, value, ttl, serializer: CacheSerializer = None):
+        await self.set_many({key: value}, ttl, serializer=serializer)
+
+    async def set_many(self, mapping, ttl, serializer: CacheSerializer = None):
+        if self.subscribe:
+            self.start_subscribe()
+
+        pipe, l1_mapping = self._l2_set_many_pipeline(mapping, ttl, serializer)
+        await pipe.execute()
+        self.l1_cache.set_many(l1_mapping, ttl=min(ttl, self.l1_ttl))
+
+    async def delete(self, *keys: str):
+        """删除缓存并通知其他节点"""
+        pipe = self.cache_client.pipeline(transaction=False)
+        await pipe.delete(*keys).publish(self.channel, self._invalidate_message(list(keys))).execute()
+        self.invalidate_local(keys)
+
+    async def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if await self.cache_client.set(name=key, value=token, nx=True, ex=ttl):
+            return token
 
-    def __init__(self, cache_client: cacheout.Cache):
+    async def release_lock(self, key, token):
+        await self.cache_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def add_tags(self, key, tags, ttl, key_prefix=constants.CACHE_KEY_PREFIX):
+        await self._add_tags_pipeline(key, tags, ttl, key_prefix).execute()
+
+    async def invalidate_tags(self, tags, key_prefix=constants.CACHE_KEY_PREFIX):
+        tag_keys = [self._tag_key(tag, key_prefix) for tag in tags]
+        keys = self._union_members(await self._members_pipeline(tag_keys).execute())
+        await self._delete_pipeline(keys, tag_keys).execute()
+        return len(keys)
+
+
+# Redis 6+ 客户端缓存失效消息的频道
+TRACKING_INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class _TrackingCacheMixin:
+    """
+    服务端辅助的客户端缓存公共处理（CLIENT TRACKING BCAST 广播模式）
+    监听连接订阅 __redis__:invalidate，跟踪连接开启 CLIENT TRACKING ON REDIRECT <监听连接id> BCAST PREFIX ...，
+    匹配前缀的 key 被任意客户端修改、删除、过期时，服务端推送失效消息驱逐本地缓存
+
+    Notes:
+        - 使用 RESP2 REDIRECT 方式，不要求客户端开启 RESP3
+        - 广播模式不需要通过跟踪连接读取，读取仍走连接池，只有跟踪连接与监听连接两个额外连接
+        - 连接断开期间无法收到失效消息，会清空本地缓存并停止本地缓存直到重新连接
+        - 跟踪连接断开（eg: 服务端 timeout、负载均衡空闲断开）后服务端不再推送失效消息，
+          监听时每隔 health_check_interval 通过跟踪连接执行 CLIENT ID 检查，连接断开或被重连过视为跟踪失效
+    """
+
+    _MISSING = object()
+
+    def _init_tracking(
+        self,
+        prefixes: List[str],
+        maxsize: int,
+        local_ttl: int,
+        retry_interval: float,
+        health_check_interval: float = 5,
+    ):
+        if not prefixes:
+            raise ValueError("client side caching requires at least one key prefix")
+        self.prefixes = tuple(prefixes)
+        self.local_cache = cacheout.LRUCache(maxsize=maxsize, ttl=local_ttl)
+        self.retry_interval = retry_interval
+        self.health_check_interval = health_check_interval
+        self.tracking = False  # 失效消息监听中才缓存到本地
+        self._invalidate_seq = 0  # 每次失效递增，读取期间有失效则不写入本地
+        self._listen_conn = None
+        self._tracking_conn = None
+        self._tracking_client_id = None
+        self.local_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def is_tracked(self, key) -> bool:
+        """key 是否在跟踪前缀下（只缓存跟踪的 key）"""
+        return isinstance(key, str) and key.startswith(self.prefixes)
+
+    def _new_connections(self):
+        pool = self.cache_client.connection_pool
+        return pool.connection_class(**pool.connection_kwargs), pool.connection_class(**pool.connection_kwargs)
+
+    def _tracking_command(self, client_id) -> list:
+        args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+        for prefix in self.prefixes:
+            args.extend(["PREFIX", prefix])
+        return args
+
+    def _check_tracking_client_id(self, client_id):
+        """跟踪连接被自动重连后 CLIENT ID 变化，新连接没有开启跟踪"""
+        if client_id != self._tracking_client_id:
+            raise ConnectionError(
+                f"redis tracking connection lost, client id {self._tracking_client_id} -> {client_id}"
+            )
+
+    def _handle_invalidate_message(self, message):
+        """处理失效消息 [message, __redis__:invalidate, [key, ...]]，key 为 None 时表示 FLUSHDB 等全部失效"""
+        if not isinstance(message, list) or len(message) != 3 or message[0] not in (b"message", "message"):
+            return
+        keys = message[2]
+        self._invalidate_seq += 1
+        self.invalidations += 1
+        if keys is None:
+            self.local_cache.clear()
+            return
+        for key in keys:
+            self.local_cache.delete(key.decode() if isinstance(key, bytes) else key)
+
+    def _stop_tracking(self):
+        """连接断开后不再能收到失效消息，清空本地缓存"""
+        self.tracking = False
+        self._invalidate_seq += 1
+        self.local_cache.clear()
+
+    def _local_get(self, key):
+        value = self.local_cache.get(key, default=self._MISSING)
+        if value is not self._MISSING:
+            self.local_hits += 1
+        return value
+
+    def _local_set(self, key, value, seq: int):
+        """读取期间没有失效消息才写入本地"""
+        self.misses += 1
+        if self.tracking and seq == self._invalidate_seq:
+            self.local_cache.set(key, value)
+
+    def _local_set_many(self, keys: List[str], values: list, seq: int):
+        for key, value in zip(keys, values):
+            self._local_set(key, value, seq)
+
+    def invalidate_local(self, keys):
+        self._invalidate_seq += 1
+        for key in keys:
+            self.local_cache.delete(key)
+
+    def hit_stats(self) -> dict:
+        total = self.local_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.local_hits / total if total else 0,
+            "local_size": self.local_cache.size(),
+            "tracking": self.tracking,
+        }
+
+
+class TrackingCacheProxy(_TrackingCacheMixin, RedisCacheProxy):
+    """
+    同步 Redis 客户端缓存代理（服务端辅助失效）
+    跟踪前缀下的 key 读取后保存在进程内存，直到服务端推送失效消息，热点 key 读取没有网络开销且保持一致
+
+    Examples:
+        proxy = TrackingCacheProxy(redis_client, prefixes=["config:"])
+        proxy.get("config:feature_flags")  # 第一次读 Redis，之后读本地，直到该 key 被修改
+    """
+
+    def __init__(
+        self,
+        cache_client: Redis,
+        prefixes: List[str],
+        maxsize: int = 1024,
+        local_ttl: int = 0,
+        retry_interval: float = 1,
+        health_check_interval: float = 5,
+        start: bool = True,
+    ):
+        """
+        Args:
+            cache_client: 同步 redis 客户端
+            prefixes: 跟踪的 key 前缀列表，eg: ["config:"]
+            maxsize: 本地缓存最大数量
+            local_ttl: 本地缓存最长有效期（秒），0 表示只依赖失效消息
+            retry_interval: 连接断开后重连的间隔
+            health_check_interval: 跟踪连接的检查间隔（秒）
+            start: 是否立即启动后台线程监听失效消息
+        """
         super().__init__(cache_client)
+        self._init_tracking(
+            prefixes,
+            maxsize=maxsize,
+            local_ttl=local_ttl,
+            retry_interval=retry_interval,
+            health_check_interval=health_check_interval,
+        )
+        self._stop_event = threading.Event()
+        self._listen_thread = None
+        if start:
+            self.start_tracking()
+
+    def start_tracking(self):
+        """后台线程开启跟踪并监听失效消息"""
+        if self._listen_thread is None:
+            self._stop_event.clear()
+            self._listen_thread = threading.Thread(target=self._listen, name="redis_tracking", daemon=True)
+            self._listen_thread.start()
+
+    def stop_tracking(self):
+        if self._listen_thread:
+            self._stop_event.set()
+            self._listen_thread.join()
+            self._listen_thread = None
+
+    def _connect_tracking(self):
+        self._listen_conn, self._tracking_conn = self._new_connections()
+        self._listen_conn.send_command("CLIENT", "ID")
+        client_id = self._listen_conn.read_response()
+        self._listen_conn.send_command("SUBSCRIBE", TRACKING_INVALIDATE_CHANNEL)
+        self._listen_conn.read_response()
+        self._tracking_conn.send_command("CLIENT", "ID")
+        self._tracking_client_id = self._tracking_conn.read_response()
+        self._tracking_conn.send_command(*self._tracking_command(client_id))
+        self._tracking_conn.read_response()
+        self.tracking = True
+
+    def _check_tracking_conn(self):
+        """检查跟踪连接，断开、超时或被重连过时抛出异常"""
+        self._tracking_conn.send_command("CLIENT", "ID")
+        if not self._tracking_conn.can_read(timeout=self.health_check_interval):
+            raise TimeoutError("redis tracking connection health check timeout")
+        self._check_tracking_client_id(self._tracking_conn.read_response())
+
+    def _listen(self):
+        while not self._stop_event.is_set():
+            try:
+                self._connect_tracking()
+                next_check_time = time.monotonic() + self.health_check_interval
+                while not self._stop_event.is_set():
+                    if self._listen_conn.can_read(timeout=min(1, self.health_check_interval)):
+                        self._handle_invalidate_message(self._listen_conn.read_response())
+                    if time.monotonic() >= next_check_time:
+                        self._check_tracking_conn()
+                        next_check_time = time.monotonic() + self.health_check_interval
+            except Exception as e:
+                logger.error(f"redis client tracking error {e}")
+            finally:
+                self._stop_tracking()
+                for conn in (self._listen_conn, self._tracking_conn):
+                    if conn:
+                        conn.disconnect()
+            self._stop_event.wait(self.retry_interval)
+
+    def get(self, key):
+        if not self.is_tracked(key):
+            return self.cache_client.get(key)
+
+        value = self._local_get(key)
+        if value is not self._MISSING:
+            return value
+
+        seq = self._invalidate_seq
+        value = self.cache_client.get(key)
+        self._local_set(key, value, seq)
+        return value
+
+    def get_many(self, keys):
+        values = [self._local_get(key) if self.is_tracked(key) else self._MISSING for key in keys]
+        remote_keys = [key for key, value in zip(keys, values) if value is self._MISSING]
+        if remote_keys:
+            seq = self._invalidate_seq
+            remote_values = dict(zip(remote_keys, super().get_many(remote_keys)))
+            tracked_keys = [key for key in remote_keys if self.is_tracked(key)]
+            self._local_set_many(tracked_keys, [remote_values[key] for key in tracked_keys], seq)
+            values = [remote_values[key] if value is self._MISSING else value for key, value in zip(keys, values)]
+        return values
 
     def set(self, key, value, ttl):
-        self.cache_client.set(key=key, value=value, ttl=ttl)
+        super().set(key, value, ttl)
+        self.invalidate_local([key])
 
+    def set_many(self, mapping, ttl):
+        super().set_many(mapping, ttl)
+        self.invalidate_local(mapping)
 
-MEMORY_PROXY = MemoryCacheProxy(cache_client=cacheout.Cache(maxsize=1024))
+    def delete(self, *keys):
+        super().delete(*keys)
+        self.invalidate_local(keys)
 
+    def _delete_pipeline(self, keys: List[str], tag_keys: List[str]):
+        self.invalidate_local(keys)
+        return super()._delete_pipeline(keys, tag_keys)
 
-class MemcacheCacheProxy(BaseCacheProxy):
 
-    def __init__(self, cache_client: memcache.Client):
+class AsyncTrackingCacheProxy(_TrackingCacheMixin, AsyncRedisCacheProxy):
+    """异步 Redis 客户端缓存代理（服务端辅助失效），首次读写时在当前事件循环启动监听任务"""
+
+    def __init__(
+        self,
+        cache_client: aioredis.Redis,
+        prefixes: List[str],
+        maxsize: int = 1024,
+        local_ttl: int = 0,
+        retry_interval: float = 1,
+        health_check_interval: float = 5,
+        start: bool = True,
+    ):
+        """
+        Args:
+            cache_client: 异步 redis 客户端
+            prefixes: 跟踪的 key 前缀列表，eg: ["config:"]
+            maxsize: 本地缓存最大数量
+            local_ttl: 本地缓存最长有效期（秒），0 表示只依赖失效消息
+            retry_interval: 连接断开后重连的间隔
+            health_check_interval: 跟踪连接的检查间隔（秒）
+            start: 是否在首次读写时启动监听任务
+        """
         super().__init__(cache_client)
+        self._init_tracking(
+            prefixes,
+            maxsize=maxsize,
+            local_ttl=local_ttl,
+            retry_interval=retry_interval,
+            health_check_interval=health_check_interval,
+        )
+        self.start = start
+        self._listen_task = None
+
+    def start_tracking(self) -> asyncio.Task:
+        """启动监听失效消息的任务（需要在事件循环中调用）"""
+        if self._listen_task is None or self._listen_task.done():
+            self._listen_task = asyncio.create_task(self._listen())
+        return self._listen_task
+
+    async def stop_tracking(self):
+        if self._listen_task:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+
+    async def _connect_tracking(self):
+        self._listen_conn, self._tracking_conn = self._new_connections()
+        await self._listen_conn.send_command("CLIENT", "ID")
+        client_id = await self._listen_conn.read_response()
+        await self._listen_conn.send_command("SUBSCRIBE", TRACKING_INVALIDATE_CHANNEL)
+        await self._listen_conn.read_response()
+        await self._tracking_conn.send_command("CLIENT", "ID")
+        self._tracking_client_id = await self._tracking_conn.read_response()
+        await self._tracking_conn.send_command(*self._tracking_command(client_id))
+        await self._tracking_conn.read_response()
+        self.tracking = True
+
+    async def _check_tracking_conn(self):
+        """检查跟踪连接，断开、超时或被重连过时抛出异常"""
+        await self._tracking_conn.send_command("CLIENT", "ID")
+        client_id = await asyncio.wait_for(self._tracking_conn.read_response(), self.health_check_interval)
+        self._check_tracking_client_id(client_id)
+
+    async def _listen(self):
+        while True:
+            try:
+                await self._connect_tracking()
+                next_check_time = time.monotonic() + self.health_check_interval
+                while True:
+                    # 超时返回 None
+                    message = await self._listen_conn.read_response(timeout=min(1, self.health_check_interval))
+                    if message is not None:
+                        self._handle_invalidate_message(message)
+                    if time.monotonic() >= next_check_time:
+                        await self._check_tracking_conn()
+                        next_check_time = time.monotonic() + self.health_check_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"redis client tracking error {e}")
+            finally:
+                self._stop_tracking()
+                for conn in (self._listen_conn, self._tracking_conn):
+                    if conn:
+                        await conn.disconnect()
+            await asyncio.sleep(self.retry_interval)
+
+    async def get(self, key):
+        if self.start:
+            self.start_tracking()
+        if not self.is_tracked(key):
+            return await self.cache_client.get(key)
+
+        value = self._local_get(key)
+        if value is not self._MISSING:
+            return value
+
+        seq = self._invalidate_seq
+        value = await self.cache_client.get(key)
+        self._local_set(key, value, seq)
+        return value
+
+    async def get_many(self, keys):
+        if self.start:
+            self.start_tracking()
+
+        values = [self._local_get(key) if self.is_tracked(key) else self._MISSING for key in keys]
+        remote_keys = [key for key, value in zip(keys, values) if value is self._MISSING]
+        if remote_keys:
+            seq = self._invalidate_seq
+            remote_values = dict(zip(remote_keys, await super().get_many(remote_keys)))
+            tracked_keys = [key for key in remote_keys if self.is_tracked(key)]
+            self._local_set_many(tracked_keys, [remote_values[key] for key in tracked_keys], seq)
+            values = [remote_values[key] if value is self._MISSING else value for key, value in zip(keys, values)]
+        return values
+
+    async def set(self, key, value, ttl):
+        await super().set(key, value, ttl)
+        self.invalidate_local([key])
+
+    async def set_many(self, mapping, ttl):
+        await super().set_many(mapping, ttl)
+        self.invalidate_local(mapping)
+
+    async def delete(self, *keys):
+        await super().delete(*keys)
+        self.invalidate_local(keys)
+
+    def _delete_pipeline(self, keys: List[str], tag_keys: List[str]):
+        self.invalidate_local(keys)
+        return super()._delete_pipeline(keys, tag_keys)
+
+
+class _FlightCall:
+    """单飞调用（同步）"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc: BaseException = None
+        self.retry = False  # leader 被取消或中断，等待者重新竞争执行
 
-    def set(self, key, value, ttl):
-        self.cache_client.set(key, value, time=ttl)
+
+class SingleFlight:
+    """
+    单飞（防缓存击穿）
+    同一个 key 并发调用时只有一个调用者（leader）执行，其余调用者等待并共享其结果
+    leader 被取消（CancelledError）或中断（KeyboardInterrupt、SystemExit）时只影响 leader 自己，
+    等待者被唤醒后由其中一个成为新的 leader 重新执行
+    """
+
+    _RETRY = object()  # 异步 leader 被取消时设置的结果，通知等待者重试
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _FlightCall] = {}
+        self._futures: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        同步单飞调用
+        Args:
+            key: 合并调用的 key
+            func: 实际执行的函数
+
+        Returns: (结果, 是否共享了其他调用者的结果)
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call:
+                    leader = False
+                else:
+                    call = self._calls[key] = _FlightCall()
+                    leader = True
+
+            if not leader:
+                call.event.wait()
+                if call.retry:
+                    continue
+                if call.exc:
+                    raise call.exc
+                return call.result, True
+
+            try:
+                call.result = func()
+            except Exception as e:
+                call.exc = e
+                raise
+            except BaseException:
+                call.retry = True
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.event.set()
+            return call.result, False
+
+    async def do_async(self, key: str, coro_func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        异步单飞调用
+        Args:
+            key: 合并调用的 key
+            coro_func: 实际执行的协程函数
+
+        Returns: (结果, 是否共享了其他调用者的结果)
+        """
+        loop = asyncio.get_running_loop()
+        future_key = (id(loop), key)  # future 与事件循环绑定
+        while True:
+            future = self._futures.get(future_key)
+            if future:
+                ret = await asyncio.shield(future)
+                if ret is self._RETRY:
+                    continue
+                return ret, True
+
+            future = self._futures[future_key] = loop.create_future()
+            try:
+                ret = await coro_func()
+                future.set_result(ret)
+                return ret, False
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # 标记异常已获取，没有等待者时避免告警
+                raise
+            except BaseException:
+                # 取消只影响 leader 自己，唤醒等待者重新竞争执行
+                future.set_result(self._RETRY)
+                raise
+            finally:
+                self._futures.pop(future_key, None)
+
+
+SINGLE_FLIGHT = SingleFlight()
+
+# 注册了预热参数的函数 {函数名: (被装饰的函数, 预热参数生成函数)}
+WARM_UP_FUNCS: Dict[str, Tuple[Callable, Callable]] = {}
+
+# 缓存条目字段: 结果、新鲜截止时间戳、函数计算耗时
+ENTRY_VALUE = "__v__"
+ENTRY_FRESH_UNTIL = "__e__"
+ENTRY_DELTA = "__d__"
+
+
+def is_negative_result(ret) -> bool:
+    """是否为空结果（None 或空的容器、字符串），用于负缓存"""
+    if ret is None:
+        return True
+    return isinstance(ret, (str, bytes, list, tuple, dict, set)) and not ret
+
+
+# 后台刷新缓存的线程池与异步任务
+REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache_refresh")
+REFRESH_TASKS = set()
 
 
 def cache_json(
-    cache_proxy: BaseCacheProxy = MEMORY_PROXY,
+    cache_proxy: BaseCacheProxy = None,
     key_prefix: str = constants.CACHE_KEY_PREFIX,
     ttl: Union[int, timedelta] = 60,
+    single_flight: bool = True,
+    distributed_lock: bool = False,
+    lock_ttl: int = 10,
+    lock_wait_interval: float = 0.05,
+    codec: Union[str, BaseCacheCodec] = "json",
+    compress: Union[str, BaseCacheCompressor] = None,
+    compress_threshold: int = 1024,
+    key_builder: Callable[[Callable, tuple, dict], str] = DEFAULT_KEY_BUILDER,
+    stale_ttl: int = 0,
+    ttl_jitter: float = 0,
+    early_refresh_beta: float = 0,
+    negative_ttl: int = None,
+    tags: Callable[..., List[str]] = None,
+    metrics: bool = False,
+    bloom_filter: BaseBloomFilter = None,
+    bloom_key: Callable[..., Any] = None,
+    warm_up_args: Callable[[], Union[Iterable, AsyncIterable]] = None,
 ):
     """
-    缓存装饰器（仅支持缓存能够json序列化的数据）
+    缓存装饰器（默认 json 序列化，可通过 codec 指定 orjson、msgpack、pickle）
     Args:
-        cache_proxy: 缓存代理客户端, 默认系统内存
+        cache_proxy: 缓存代理客户端, 默认系统内存（同步函数 MEMORY_PROXY，异步函数 ASYNC_MEMORY_PROXY）
         ttl: 过期时间 默认60s
         key_prefix: 默认的key前缀
+        single_flight: 进程内同一个key并发未命中时只执行一次函数，其余调用者共享结果，默认开启
+        distributed_lock: 跨进程单飞，通过缓存代理的分布式锁（Redis SET NX）保证只有一个进程执行函数
+        lock_ttl: 分布式锁过期时间，也是未获取到锁时等待缓存结果的最长时间
+        lock_wait_interval: 未获取到锁时轮询缓存的间隔
+        codec: 编解码器 json、orjson、msgpack、pickle 或 BaseCacheCodec 实例，默认 json
+        compress: 压缩方式 zlib、zstd，默认不压缩
+        compress_threshold: 编码后超过该字节数才压缩，默认 1024
+        key_builder: 缓存 key 生成器 (func, args, kwargs) -> str，默认 CacheKeyBuilder()
+            eg: 装饰实例方法忽略 self 参数 CacheKeyBuilder(ignore_args=["self"])
+        stale_ttl: 过期后仍可返回旧值的时间窗口（秒），窗口内直接返回旧值并在后台刷新一次，默认 0 不开启
+        ttl_jitter: 过期时间随机抖动比例，eg: 0.1 表示 ttl 随机增加 0~10%，避免同时写入的 key 同时过期
+        early_refresh_beta: 概率提前刷新系数（XFetch），越接近过期、函数耗时越长提前刷新概率越大，
+            默认 0 不开启，一般取 1.0
+        negative_ttl: 结果为 None 或空（[]、{}、""）时的过期时间，一般比 ttl 短，默认与 ttl 相同，为 0 时空结果不缓存
+            空结果同样会被缓存命中，避免不存在的数据每次都穿透到数据库
+        tags: 根据函数参数生成缓存标签的函数，写入缓存时记录 key 所属的标签，
+            数据变更时通过 invalidate_tags 精确删除相关缓存，eg: tags=lambda user_id: [f"user:{user_id}"]
+            标签按 key_prefix 隔离，自定义 key_prefix 时 invalidate_tags 需传入相同的 key_prefix
+        metrics: 是否按函数、缓存代理统计指标，通过 cache_stats() 或 被装饰函数.cache_metrics.stats() 查看
+        bloom_filter: 布隆过滤器（BloomFilter、RedisBloomFilter），判断一定不存在时直接返回 None，
+            不查缓存也不执行函数，防止不存在的 id 穿透到数据库，新增数据需同步写入布隆过滤器
+        bloom_key: 根据函数参数生成布隆过滤器元素的函数，默认取函数的第一个参数（跳过 self、cls 及 key_builder 忽略的参数）
+        warm_up_args: 预热参数生成函数，返回（异步）可迭代的调用参数，dict 为关键字参数、tuple 为位置参数、
+            其他为单个参数，注册后通过 warm_up() 预热缓存，eg: warm_up_args=lambda: range(1, 101)
 
     Returns:
     """
+    tag_key_prefix = key_prefix  # 标签按 key 前缀隔离
     key_prefix = f"{key_prefix}:cache_json"
     if isinstance(ttl, timedelta):
         ttl = int(ttl.total_seconds())
+    if isinstance(negative_ttl, timedelta):
+        negative_ttl = int(negative_ttl.total_seconds())
+
+    serializer = CacheSerializer(codec=codec, compress=compress, compress_threshold=compress_threshold)
 
     def _cache(func):
+        # 未指定缓存代理时根据同步、异步函数选择默认的内存缓存
+        proxy = cache_proxy or get_default_cache_proxy(asyncio.iscoroutinefunction(func))
+        check_cache_serializer(proxy, serializer)
+        stores_objects = proxy.stores_objects
+        # 二级缓存代理存取对象，L2 使用装饰器的编解码器
+        set_kwargs = {"serializer": serializer} if isinstance(proxy, _TieredCacheMixin) else {}
+        func_metrics = CacheMetrics(f"{func.__module__}.{func.__qualname__}") if metrics else None
+        metrics_list = (func_metrics, proxy.metrics) if metrics else ()
+        if func_metrics:
+            FUNC_METRICS[func_metrics.name] = func_metrics
+
+        def _incr(name):
+            for m in metrics_list:
+                m.incr(name)
+
+        def _observe(name, value):
+            for m in metrics_list:
+                m.observe(name, value)
+
+        def _dumps(ret):
+            if stores_objects:
+                return ret
+            if not metrics_list:
+                return serializer.dumps(ret)
+            start_time = time.perf_counter()
+            cache_data = serializer.dumps(ret)
+            _observe("serialize_time", time.perf_counter() - start_time)
+            _observe("value_size", len(cache_data))
+            return cache_data
+
+        def _loads(cache_data):
+            if stores_objects:
+                return cache_data
+            if not metrics_list:
+                return serializer.loads(cache_data)
+            start_time = time.perf_counter()
+            ret = serializer.loads(cache_data)
+            _observe("deserialize_time", time.perf_counter() - start_time)
+            return ret
+
+        def _get_sync(hash_key):
+            if not metrics_list:
+                return proxy.get(hash_key)
+            start_time = time.perf_counter()
+            cache_data = proxy.get(hash_key)
+            _observe("get_latency", time.perf_counter() - start_time)
+            return cache_data
+
+        async def _get_async(hash_key):
+            if not metrics_list:
+                return await proxy.get(hash_key)
+            start_time = time.perf_counter()
+            cache_data = await proxy.get(hash_key)
+            _observe("get_latency", time.perf_counter() - start_time)
+            return cache_data
+
+        def _set_sync(hash_key, cache_value, cache_ttl):
+            start_time = time.perf_counter()
+            proxy.set(key=hash_key, value=cache_value, ttl=cache_ttl, **set_kwargs)
+            if metrics_list:
+                _observe("set_latency", time.perf_counter() - start_time)
+
+        async def _set_async(hash_key, cache_value, cache_ttl):
+            start_time = time.perf_counter()
+            await proxy.set(key=hash_key, value=cache_value, ttl=cache_ttl, **set_kwargs)
+            if metrics_list:
+                _observe("set_latency", time.perf_counter() - start_time)
+
+        def _new_entry(ret, compute_time: float) -> Tuple[Any, int]:
+            """构造缓存条目，返回 (缓存值, 实际过期时间)"""
+            base_ttl = negative_ttl if negative_ttl is not None and is_negative_result(ret) else ttl
+            fresh_ttl = base_ttl + random.uniform(0, base_ttl * ttl_jitter) if ttl_jitter else base_ttl
+            entry = {ENTRY_VALUE: ret, ENTRY_FRESH_UNTIL: time.time() + fresh_ttl, ENTRY_DELTA: compute_time}
+            return _dumps(entry), math.ceil(fresh_ttl + stale_ttl)
+
+        def _parse_entry(cache_data) -> Tuple[Any, float, float]:
+            """解析缓存条目，返回 (结果, 新鲜截止时间, 计算耗时)"""
+            entry = _loads(cache_data)
+            if isinstance(entry, dict) and ENTRY_VALUE in entry:
+                return entry[ENTRY_VALUE], entry[ENTRY_FRESH_UNTIL], entry[ENTRY_DELTA]
+            # 兼容旧版本没有条目信息的缓存值
+            return entry, math.inf, 0
+
+        def _on_shared(start_time):
+            """单飞等待者的指标"""
+            if metrics_list:
+                _incr("single_flight_waits")
+                _observe("single_flight_wait", time.perf_counter() - start_time)
+
+        def _need_refresh(fresh_until: float, compute_time: float) -> bool:
+            """是否需要后台刷新（已过期的旧值 或 概率提前刷新）"""
+            now = time.time()
+            if now >= fresh_until:
+                return True
+            if early_refresh_beta and compute_time:
+                # XFetch: now - delta * beta * ln(rand) >= expiry
+                return now - compute_time * early_refresh_beta * math.log(1 - random.random()) >= fresh_until
+            return False
+
+        sig = inspect.signature(func) if bloom_filter is not None and not bloom_key else None
+        # 实例方法、类方法的 self、cls 以及 key_builder 忽略的参数不作为布隆过滤器的元素
+        bloom_ignore_args = {"self", "cls"} | set(getattr(key_builder, "ignore_args", ()))
+
+        def _bloom_item(args, kwargs):
+            """布隆过滤器判断的元素"""
+            if bloom_key:
+                return bloom_key(*args, **kwargs)
+            arguments = sig.bind(*args, **kwargs).arguments
+            return next(value for name, value in arguments.items() if name not in bloom_ignore_args)
+
+        refreshing_keys = set()  # 正在后台刷新的 key，同一个 key 只刷新一次
+        refreshing_lock = threading.Lock()
+
         def _gen_key(*args, **kwargs):
             """生成缓存的key"""
 
-            # 根据函数信息与参数生成
-            # key => 函数所在模块:函数名:函数位置参数:函数关键字参数 进行hash
-            param_args_str = ",".join([str(arg) for arg in args])
-            param_kwargs_str = ",".join(sorted([f"{k}:{v}" for k, v in kwargs.items()]))
-            hash_str = f"{func.__module__}:{func.__name__}:{param_args_str}:{param_kwargs_str}"
-            hash_ret = hashlib.sha256(hash_str.encode()).hexdigest()
+            # 根据函数信息与参数生成哈希
+            hash_ret = key_builder(func, args, kwargs)
 
             # 根据哈希结果生成key 默认前缀:函数所在模块:函数名:hash
             hash_key = f"{key_prefix}:{func.__module__}:{func.__name__}:{hash_ret}"
             return hash_key
 
+        def _mark_refreshing(hash_key) -> bool:
+            with refreshing_lock:
+                if hash_key in refreshing_keys:
+                    return False
+                refreshing_keys.add(hash_key)
+                return True
+
+        def _compute_sync(hash_key, args, kwargs):
+            """执行函数并缓存结果，返回 (结果, 缓存值)"""
+            start_time = time.perf_counter()
+            ret = func(*args, **kwargs)
+            cache_value, cache_ttl = _new_entry(ret, time.perf_counter() - start_time)
+            if cache_ttl > 0:
+                _set_sync(hash_key, cache_value, cache_ttl)
+                if tags:
+                    try:
+                        proxy.add_tags(hash_key, tags(*args, **kwargs), cache_ttl, tag_key_prefix)
+                    except Exception as e:
+                        # 标签记录失败不影响结果返回，缓存只能等待过期
+                        logger.warning(f"cache add tags {hash_key} error {e}")
+            return ret, cache_value
+
+        async def _compute_async(hash_key, args, kwargs):
+            """执行函数并缓存结果，返回 (结果, 缓存值)"""
+            start_time = time.perf_counter()
+            ret = await func(*args, **kwargs)
+            cache_value, cache_ttl = _new_entry(ret, time.perf_counter() - start_time)
+            if cache_ttl > 0:
+                await _set_async(hash_key, cache_value, cache_ttl)
+                if tags:
+                    try:
+                        await proxy.add_tags(hash_key, tags(*args, **kwargs), cache_ttl, tag_key_prefix)
+                    except Exception as e:
+                        logger.warning(f"cache add tags {hash_key} error {e}")
+            return ret, cache_value
+
+        def _load_sync(hash_key, args, kwargs):
+            """未命中时加载，返回 (结果, 缓存值)"""
+            if single_flight:
+                # leader 再次检查缓存，避免等待者刚好错过上一个 leader 的结果
+                cache_data = _get_sync(hash_key)
+                if cache_data is not None:
+                    return _parse_entry(cache_data)[0], cache_data
+
+            lock_key, lock_token = f"{hash_key}:lock", None
+            if distributed_lock:
+                lock_token = proxy.acquire_lock(lock_key, lock_ttl)
+                if not lock_token:
+                    # 其他进程正在执行，等待其缓存结果，超时后自行执行
+                    wait_deadline = time.monotonic() + lock_ttl
+                    while time.monotonic() < wait_deadline:
+                        time.sleep(lock_wait_interval)
+                        cache_data = _get_sync(hash_key)
+                        if cache_data is not None:
+                            return _parse_entry(cache_data)[0], cache_data
+
+            try:
+                return _compute_sync(hash_key, args, kwargs)
+            finally:
+                if lock_token:
+                    proxy.release_lock(lock_key, lock_token)
+
+        async def _load_async(hash_key, args, kwargs):
+            """未命中时加载，返回 (结果, 缓存值)"""
+            if single_flight:
+                cache_data = await _get_async(hash_key)
+                if cache_data is not None:
+                    return _parse_entry(cache_data)[0], cache_data
+
+            lock_key, lock_token = f"{hash_key}:lock", None
+            if distributed_lock:
+                lock_token = await proxy.acquire_lock(lock_key, lock_ttl)
+                if not lock_token:
+                    wait_deadline = time.monotonic() + lock_ttl
+                    while time.monotonic() < wait_deadline:
+                        await asyncio.sleep(lock_wait_interval)
+                        cache_data = await _get_async(hash_key)
+                        if cache_data is not None:
+                            return _parse_entry(cache_data)[0], cache_data
+
+            try:
+                return await _compute_async(hash_key, args, kwargs)
+            finally:
+                if lock_token:
+                    await proxy.release_lock(lock_key, lock_token)
+
+        def _refresh_sync(hash_key, args, kwargs):
+            """后台刷新缓存"""
+            lock_key, lock_token = f"{hash_key}:lock", None
+            try:
+                if distributed_lock:
+                    # 其他进程正在刷新则跳过
+                    lock_token = proxy.acquire_lock(lock_key, lock_ttl)
+                    if not lock_token:
+                        return
+                _compute_sync(hash_key, args, kwargs)
+            except Exception as e:
+                logger.error(f"cache_json refresh {hash_key} error {e}")
+            finally:
+                if lock_token:
+                    proxy.release_lock(lock_key, lock_token)
+                refreshing_keys.discard(hash_key)
+
+        async def _refresh_async(hash_key, args, kwargs):
+            """后台刷新缓存"""
+            lock_key, lock_token = f"{hash_key}:lock", None
+            try:
+                if distributed_lock:
+                    lock_token = await proxy.acquire_lock(lock_key, lock_ttl)
+                    if not lock_token:
+                        return
+                await _compute_async(hash_key, args, kwargs)
+            except Exception as e:
+                logger.error(f"cache_json refresh {hash_key} error {e}")
+            finally:
+                if lock_token:
+                    await proxy.release_lock(lock_key, lock_token)
+                refreshing_keys.discard(hash_key)
+
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
             """同步处理"""
 
+            # 布隆过滤器判断一定不存在直接返回
+            if bloom_filter is not None and not bloom_filter.contains(_bloom_item(args, kwargs)):
+                _incr("bloom_rejects")
+                return None
+
             # 生成缓存的key
             hash_key = _gen_key(*args, **kwargs)
 
             # 先从缓存获取数据
-            cache_data = cache_proxy.get(hash_key)
-            if cache_data:
-                # 有直接返回
-                print(f"命中缓存: {hash_key}")
-                return json.loads(cache_data)
+            cache_data = _get_sync(hash_key)
+            if cache_data is not None:
+                # 有直接返回，过期的旧值或需要提前刷新时后台刷新
+                _incr("hits")
+                ret, fresh_until, compute_time = _parse_entry(cache_data)
+                if metrics_list and fresh_until <= time.time():
+                    _incr("stale_hits")
+                if _need_refresh(fresh_until, compute_time) and _mark_refreshing(hash_key):
+                    _incr("refreshes")
+                    REFRESH_EXECUTOR.submit(_refresh_sync, hash_key, args, kwargs)
+                return ret
 
-            # 没有，执行函数获取结果
-            ret = func(*args, **kwargs)
+            # 没有，执行函数获取结果并缓存
+            _incr("misses")
+            if not single_flight:
+                return _load_sync(hash_key, args, kwargs)[0]
 
-            # 缓存结果
-            cache_proxy.set(key=hash_key, value=json.dumps(ret), ttl=ttl)
-            return ret
+            # 并发未命中时只有 leader 执行，其余调用者反序列化共享的缓存值（避免共享同一个可变对象）
+            start_time = time.perf_counter()
+            (ret, cache_value), shared = SINGLE_FLIGHT.do(hash_key, lambda: _load_sync(hash_key, args, kwargs))
+            if not shared:
+                return ret
+            _on_shared(start_time)
+            return _parse_entry(cache_value)[0]
 
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             """异步处理"""
 
+            if bloom_filter is not None:
+                exists = bloom_filter.contains(_bloom_item(args, kwargs))
+                if not (await exists if inspect.isawaitable(exists) else exists):
+                    _incr("bloom_rejects")
+                    return None
+
             # 生成缓存的key
             hash_key = _gen_key(*args, **kwargs)
 
             # 先从缓存获取数据
-            cache_data = await cache_proxy.get(hash_key)
-            if cache_data:
-                # 有直接返回
-                return json.loads(cache_data)
+            cache_data = await _get_async(hash_key)
+            if cache_data is not None:
+                # 有直接返回，过期的旧值或需要提前刷新时后台刷新
+                _incr("hits")
+                ret, fresh_until, compute_time = _parse_entry(cache_data)
+                if metrics_list and fresh_until <= time.time():
+                    _incr("stale_hits")
+                if _need_refresh(fresh_until, compute_time) and _mark_refreshing(hash_key):
+                    _incr("refreshes")
+                    refresh_task = asyncio.create_task(_refresh_async(hash_key, args, kwargs))
+                    REFRESH_TASKS.add(refresh_task)  # 保持任务引用，避免被垃圾回收
+                    refresh_task.add_done_callback(REFRESH_TASKS.discard)
+                return ret
 
-            # 没有，执行函数获取结果
-            ret = await func(*args, **kwargs)
+            # 没有，执行函数获取结果并缓存
+            _incr("misses")
+            if not single_flight:
+                return (await _load_async(hash_key, args, kwargs))[0]
 
-            # 缓存结果
-            await cache_proxy.set(key=hash_key, value=json.dumps(ret), ttl=ttl)
-            return ret
+            start_time = time.perf_counter()
+
+            (ret, cache_value), shared = await SINGLE_FLIGHT.do_async(
+                hash_key, lambda: _load_async(hash_key, args, kwargs)
+            )
+            if not shared:
+                return ret
+            _on_shared(start_time)
+            return _parse_entry(cache_value)[0]
+
+        wrapper = async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        wrapper.cache_metrics = func_metrics
+        if warm_up_args:
+            WARM_UP_FUNCS[f"{func.__module__}.{func.__qualname__}"] = (wrapper, warm_up_args)
+        return wrapper
+
+    return _cache
+
+
+def cache_json_batch(
+    cache_proxy: BaseCacheProxy = None,
+    key_prefix: str = constants.CACHE_KEY_PREFIX,
+    ttl: Union[int, timedelta] = 60,
+    ids_arg: str = None,
+    negative_ttl: int = None,
+    codec: Union[str, BaseCacheCodec] = "json",
+    compress: Union[str, BaseCacheCompressor] = None,
+    compress_threshold: int = 1024,
+    key_builder: Callable[[Callable, tuple, dict], str] = DEFAULT_KEY_BUILDER,
+    metrics: bool = False,
+    bloom_filter: BaseBloomFilter = None,
+):
+    """
+    批量缓存装饰器，按 id 逐个缓存结果
+    适用于 func(ids, ...) -> {id: value} 的批量查询函数，不同的 id 列表之间可以共享缓存，
+    一次 MGET 批量获取，只对未命中的 id 执行函数，再通过 pipeline 批量写回
+
+    Args:
+        cache_proxy: 缓存代理客户端, 默认系统内存（同步函数 MEMORY_PROXY，异步函数 ASYNC_MEMORY_PROXY）
+        key_prefix: 默认的key前缀
+        ttl: 过期时间 默认60s
+        ids_arg: id 列表参数名，默认函数的第一个参数（跳过 self、cls）
+        negative_ttl: 函数结果中不存在的 id 的过期时间（负缓存），默认与 ttl 相同，为 0 时不缓存
+        codec: 编解码器 json、orjson、msgpack、pickle 或 BaseCacheCodec 实例，默认 json
+        compress: 压缩方式 zlib、zstd，默认不压缩
+        compress_threshold: 编码后超过该字节数才压缩，默认 1024
+        key_builder: 缓存 key 生成器，单个 id 替换 id 列表参数后生成每个 id 的 key
+        metrics: 是否统计指标（按 id 计数命中、未命中，批量读写耗时）
+        bloom_filter: 布隆过滤器，一定不存在的 id 不查缓存也不传给函数
+
+    Examples:
+        @cache_json_batch(ttl=60)
+        async def query_users(user_ids: List[int]) -> Dict[int, dict]:
+            ...
+
+        await query_users([1, 2, 3])
+        await query_users([2, 3, 4])  # 只查询 4
+
+    Notes:
+        返回结果按输入 id 的顺序（去重）组装，不存在的 id 不在返回结果中
+
+    Returns:
+    """
+    key_prefix = f"{key_prefix}:cache_json"
+    if isinstance(ttl, timedelta):
+        ttl = int(ttl.total_seconds())
+    if isinstance(negative_ttl, timedelta):
+        negative_ttl = int(negative_ttl.total_seconds())
+    negative_ttl = ttl if negative_ttl is None else negative_ttl
+
+    serializer = CacheSerializer(codec=codec, compress=compress, compress_threshold=compress_threshold)
+
+    def _cache(func):
+        # 未指定缓存代理时根据同步、异步函数选择默认的内存缓存
+        proxy = cache_proxy or get_default_cache_proxy(asyncio.iscoroutinefunction(func))
+        check_cache_serializer(proxy, serializer)
+        stores_objects = proxy.stores_objects
+        # 二级缓存代理存取对象，L2 使用装饰器的编解码器
+        set_kwargs = {"serializer": serializer} if isinstance(proxy, _TieredCacheMixin) else {}
+        func_metrics = CacheMetrics(f"{func.__module__}.{func.__qualname__}") if metrics else None
+        metrics_list = (func_metrics, proxy.metrics) if metrics else ()
+        if func_metrics:
+            FUNC_METRICS[func_metrics.name] = func_metrics
+
+        def _record(hit_count, miss_count, name=None, start_time=None):
+            for m in metrics_list:
+                m.incr("hits", hit_count)
+                m.incr("misses", miss_count)
+                if name:
+                    m.observe(name, time.perf_counter() - start_time)
+
+        def _dumps(ret, fresh_ttl):
+            entry = {ENTRY_VALUE: ret, ENTRY_FRESH_UNTIL: time.time() + fresh_ttl, ENTRY_DELTA: 0}
+            return entry if stores_objects else serializer.dumps(entry)
+
+        def _loads(cache_data):
+            entry = cache_data if stores_objects else serializer.loads(cache_data)
+            if isinstance(entry, dict) and ENTRY_VALUE in entry:
+                return entry[ENTRY_VALUE]
+            return entry
+
+        sig = inspect.signature(func)
+        # 实例方法、类方法的 self、cls 以及 key_builder 忽略的参数不作为默认的 id 列表参数
+        ignore_args = {"self", "cls"} | set(getattr(key_builder, "ignore_args", ()))
+        id_param = ids_arg or next(name for name in sig.parameters if name not in ignore_args)
+
+        def _split(args, kwargs):
+            """解析 id 列表并生成每个 id 的缓存 key，返回 (去重后的 ids, keys, 绑定参数)"""
+            bound_args = sig.bind(*args, **kwargs)
+            ids = list(dict.fromkeys(bound_args.arguments[id_param]))
+            params = dict(bound_args.arguments)
+            keys = []
+            for pk_id in ids:
+                params[id_param] = pk_id
+                hash_ret = key_builder(func, (), params)
+                keys.append(f"{key_prefix}:{func.__module__}:{func.__name__}:{hash_ret}")
+            return ids, keys, bound_args
+
+        def _bloom_exclude(ids, keys, exists_list):
+            """去掉布隆过滤器判断一定不存在的 id"""
+            ids_keys = [(pk_id, key) for pk_id, key, exists in zip(ids, keys, exists_list) if exists]
+            for m in metrics_list:
+                m.incr("bloom_rejects", len(ids) - len(ids_keys))
+            return [pk_id for pk_id, _ in ids_keys], [key for _, key in ids_keys]
+
+        def _merge(ids, cache_datas):
+            """合并缓存结果，返回 (命中的结果, 未命中的 ids)"""
+            hit_rets, miss_ids = {}, []
+            for pk_id, cache_data in zip(ids, cache_datas):
+                if cache_data is None:
+                    miss_ids.append(pk_id)
+                else:
+                    hit_rets[pk_id] = _loads(cache_data)
+            return hit_rets, miss_ids
+
+        def _new_entries(ids, keys, miss_ids, func_rets):
+            """未命中的结果按过期时间分组构造缓存值，返回 {ttl: {key: 缓存值}}"""
+            key_map = dict(zip(ids, keys))
+            ttl_groups = {}
+            for pk_id in miss_ids:
+                ret = func_rets.get(pk_id)
+                cache_ttl = negative_ttl if ret is None else ttl
+                if cache_ttl > 0:
+                    ttl_groups.setdefault(cache_ttl, {})[key_map[pk_id]] = _dumps(ret, cache_ttl)
+            return ttl_groups
+
+        def _assemble(ids, hit_rets, func_rets):
+            """按输入顺序组装结果"""
+            rets = {}
+            for pk_id in ids:
+                ret = hit_rets[pk_id] if pk_id in hit_rets else func_rets.get(pk_id)
+                if ret is not None:
+                    rets[pk_id] = ret
+            return rets
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            ids, keys, bound_args = _split(args, kwargs)
+            if bloom_filter is not None:
+                ids, keys = _bloom_exclude(ids, keys, bloom_filter.contains_many(ids))
+            start_time = time.perf_counter()
+            hit_rets, miss_ids = _merge(ids, proxy.get_many(keys))
+            _record(len(hit_rets), len(miss_ids), "get_latency", start_time)
+
+            func_rets = {}
+            if miss_ids:
+                bound_args.arguments[id_param] = miss_ids
+                func_rets = func(*bound_args.args, **bound_args.kwargs) or {}
+                for cache_ttl, mapping in _new_entries(ids, keys, miss_ids, func_rets).items():
+                    start_time = time.perf_counter()
+                    proxy.set_many(mapping, cache_ttl, **set_kwargs)
+                    _record(0, 0, "set_latency", start_time)
+            return _assemble(ids, hit_rets, func_rets)
 
-        return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            ids, keys, bound_args = _split(args, kwargs)
+            if bloom_filter is not None:
+                exists_list = bloom_filter.contains_many(ids)
+                if inspect.isawaitable(exists_list):
+                    exists_list = await exists_list
+                ids, keys = _bloom_exclude(ids, keys, exists_list)
+            start_time = time.perf_counter()
+            hit_rets, miss_ids = _merge(ids, await proxy.get_many(keys))
+            _record(len(hit_rets), len(miss_ids), "get_latency", start_time)
+
+            func_rets = {}
+            if miss_ids:
+                bound_args.arguments[id_param] = miss_ids
+                func_rets = await func(*bound_args.args, **bound_args.kwargs) or {}
+                for cache_ttl, mapping in _new_entries(ids, keys, miss_ids, func_rets).items():
+                    start_time = time.perf_counter()
+                    await proxy.set_many(mapping, cache_ttl, **set_kwargs)
+                    _record(0, 0, "set_latency", start_time)
+            return _assemble(ids, hit_rets, func_rets)
+
+        wrapper = async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        wrapper.cache_metrics = func_metrics
+        return wrapper
 
     return _cache
+
+
+def invalidate_tags(tags: List[str], cache_proxy: BaseCacheProxy = None, key_prefix: str = constants.CACHE_KEY_PREFIX):
+    """
+    删除标签下的所有缓存
+    Args:
+        tags: 标签列表
+        cache_proxy: 缓存代理客户端，异步代理返回协程需要 await，
+            默认同时删除同步函数、异步函数的默认内存缓存（MEMORY_PROXY、ASYNC_MEMORY_PROXY）
+        key_prefix: 与 cache_json 的 key_prefix 相同，标签按 key 前缀隔离
+
+    Examples:
+        @cache_json(cache_proxy=redis_proxy, ttl=3600, tags=lambda user_id: [f"user:{user_id}"])
+        def get_user(user_id): ...
+
+        invalidate_tags([f"user:{user_id}"], cache_proxy=redis_proxy)
+
+    Notes:
+        通过 set_default_cache_proxy 把异步函数的默认缓存设置为非内存缓存时，需要指定 cache_proxy 并 await
+
+    Returns: 删除的缓存 key 数量
+    """
+    if cache_proxy is not None:
+        return cache_proxy.invalidate_tags(tags, key_prefix=key_prefix)
+
+    count = get_default_cache_proxy().invalidate_tags(tags, key_prefix=key_prefix)
+    async_proxy = get_default_cache_proxy(is_async=True)
+    if isinstance(async_proxy, AsyncMemoryCacheProxy):
+        count += async_proxy._invalidate_tags(tags, key_prefix=key_prefix)
+    else:
+        logger.warning(f"invalidate tags {tags} skip async default cache proxy {async_proxy.__class__.__name__}")
+    return count
+
+
+def _warm_up_call_args(item) -> Tuple[tuple, dict]:
+    """预热参数转换为 (位置参数, 关键字参数)"""
+    if isinstance(item, dict):
+        return (), item
+    if isinstance(item, tuple):
+        return item, {}
+    return (item,), {}
+
+
+async def warm_up(
+    concurrency: int = 10,
+    funcs: List[Callable] = None,
+    l1_proxies: List[BaseCacheProxy] = None,
+    hot_key_pattern: str = None,
+    hot_key_limit: int = 1000,
+) -> dict:
+    """
+    缓存预热，服务接收流量前调用
+    按注册的预热参数调用 cache_json 装饰的函数填充缓存（最多 concurrency 个并发，同步函数在线程池执行），
+    再将 Redis 中的热点 key 复制到二级缓存代理的 L1
+
+    Args:
+        concurrency: 最大并发数，避免预热压垮数据库
+        funcs: 预热的函数列表，默认所有注册了 warm_up_args 的函数
+        l1_proxies: 需要复制热点 key 到 L1 的二级缓存代理（TieredCacheProxy、AsyncTieredCacheProxy）
+        hot_key_pattern: 热点 key 的扫描模式，默认 cache_json 的缓存 key
+        hot_key_limit: 每个二级缓存代理最多复制的 key 数量
+
+    Examples:
+        @cache_json(cache_proxy=tiered_proxy, ttl=600, warm_up_args=lambda: HOT_PRODUCT_IDS)
+        async def get_product(product_id): ...
+
+        @app.on_event("startup")
+        async def startup():
+            await warm_up(concurrency=20, l1_proxies=[tiered_proxy])
+
+        # 同步服务
+        asyncio.run(warm_up())
+
+    Returns: 预热统计 {"functions": 函数数, "calls": 成功调用数, "errors": 失败调用数, "l1_keys": 复制到 L1 的 key 数, "cost": 耗时}
+    """
+    start_time = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"functions": 0, "calls": 0, "errors": 0, "l1_keys": 0}
+    func_ids = {id(func) for func in funcs} if funcs is not None else None
+    warm_up_funcs = [item for item in WARM_UP_FUNCS.values() if func_ids is None or id(item[0]) in func_ids]
+
+    async def _call(func, item):
+        args, kwargs = _warm_up_call_args(item)
+        try:
+            if asyncio.iscoroutinefunction(func):
+                await func(*args, **kwargs)
+            else:
+                await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+            stats["calls"] += 1
+        except Exception as e:
+            stats["errors"] += 1
+            logger.error(f"warm up {func.__qualname__}{args}{kwargs} error {e}")
+        finally:
+            semaphore.release()
+
+    tasks = set()
+
+    async def _submit(func, item):
+        # 先获取信号量再创建任务，预热参数很多时不会一次创建所有任务
+        await semaphore.acquire()
+        task = asyncio.create_task(_call(func, item))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    for func, args_gen in warm_up_funcs:
+        stats["functions"] += 1
+        items = args_gen()
+        if inspect.isawaitable(items):
+            items = await items
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                await _submit(func, item)
+        else:
+            for item in items:
+                await _submit(func, item)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    for proxy in l1_proxies or []:
+        if asyncio.iscoroutinefunction(proxy.warm_up_l1):
+            stats["l1_keys"] += await proxy.warm_up_l1(pattern=hot_key_pattern, limit=hot_key_limit)
+        else:
+            stats["l1_keys"] += await loop.run_in_executor(
+                None, functools.partial(proxy.warm_up_l1, pattern=hot_key_pattern, limit=hot_key_limit)
+            )
+
+    stats["cost"] = time.perf_counter() - start_time
+    return stats
@@ -98,6 +98,36 @@ class ExcelUtil(object):
         with pandas.ExcelWriter(path_or_buffer) as writer:
             cls._to_excel(data_list, col_mappings, sheet_name, writer, **kwargs)
 
+    @classmethod
+    def list_to_csv(
+        cls,
+        path_or_buffer: Union[str, IO],
+        data_list: List[dict],
+        col_mappings: List[ColumnMapping] = None,
+        na_rep: str = "\\N",
+        **kwargs,
+    ):
+        """
+        列表转 csv文件
+        Args:
+            path_or_buffer: 文件路径或者字节缓冲流
+            data_list: 数据集 List[dict]
+            col_mappings: 表头列字段映射，用于数据库批量导入时不要映射列名
+            na_rep: 空值的表示，默认 \\N 可直接用于 DBManager.bulk_load() 导入
+
+        Examples:
+            data_list = [{"username": "hui", "age": 18}]
+            ExcelUtil.list_to_csv("users.csv", data_list)
+            await UserManager().bulk_load("users.csv")
+
+        Returns:
+        """
+        col_dict = {cm.column_name: cm.column_alias for cm in col_mappings} if col_mappings else None
+        df = pandas.DataFrame(data=data_list)
+        if col_dict:
+            df.rename(columns=col_dict, inplace=True)
+        df.to_csv(path_or_buffer, index=False, na_rep=na_rep, lineterminator="\n", **kwargs)
+
     @classmethod
     def multi_list_to_excel(cls, path_or_buffer: Union[str, IO], data_collects: List[DataCollect], **kwargs):
         """
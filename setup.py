@@ -48,14 +48,22 @@ class PKGManager:
         """
         extras_require = {
             "db-orm": ["sqlalchemy[asyncio]==2.0.20", "aiomysql==0.2.0"],
-            "db-redis": ["redis>=4.5.4"],
-            "cache-proxy": ["redis>=4.5.4", "python-memcached==1.62", "cacheout==0.14.1"],
+            "db-redis": ["redis>=5.0.1"],
+            "cache-proxy": ["redis>=5.0.1", "python-memcached==1.62", "cacheout==0.14.1"],
+            "cache-codec": ["orjson>=3.8.3", "msgpack>=1.0.5", "zstandard>=0.21.0", "xxhash>=3.2.0"],
             "minio": ["minio==7.1.17"],
             "excel-tools": ["pandas==2.0.3", "openpyxl==3.0.10"],
         }
 
         extras_require["all"] = list(set(reduce(operator.add, [cls.get_install_requires(), *extras_require.values()])))
-        extras_require["test"] = ["pytest==7.3.1", "pytest-mock==3.14.0", "pytest-asyncio==0.23.8"]
+        extras_require["test"] = [
+            "pytest==7.3.1",
+            "pytest-mock==3.14.0",
+            "pytest-asyncio==0.23.8",
+            "aiosqlite==0.20.0",
+            "fakeredis[lua]==2.23.2",
+            *extras_require["cache-codec"],
+        ]
 
         return extras_require
 
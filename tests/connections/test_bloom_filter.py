@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_bloom_filter.py
+# @Desc: { 布隆过滤器单测（fakeredis） }
+# @Date: 2026/10/19 18:00
+import fakeredis
+import pytest
+
+from py_tools.connections.db.bloom_filter import (
+    BloomFilter,
+    RedisBloomFilter,
+    bloom_false_positive_rate,
+    bloom_filter_size,
+    populate_bloom_filter,
+)
+from py_tools.connections.db.redis_client import BaseRedisManager
+from py_tools.decorators.cache import CacheKeyBuilder, cache_json, cache_json_batch
+
+
+class AsyncRedisManager(BaseRedisManager):
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+class TestBloomFilter:
+    def test_size(self):
+        assert bloom_filter_size(1000000, 0.01) == (9585059, 7)
+        num_bits, num_hashes = bloom_filter_size(1000, 0.001)
+        assert bloom_false_positive_rate(num_bits, num_hashes, 1000) == pytest.approx(0.001, rel=0.05)
+        with pytest.raises(ValueError):
+            bloom_filter_size(1000, 1)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        assert bloom.add_many(range(10000)) == 10000
+        assert all(bloom.contains_many(range(10000)))
+
+        # 实际误判率接近理论值
+        false_positives = sum(bloom.contains_many(range(10000, 30000)))
+        assert false_positives / 20000 < 0.02
+
+        stats = bloom.stats()
+        assert stats["estimated_count"] == pytest.approx(10000, rel=0.05)
+        assert stats["false_positive_rate"] == pytest.approx(0.01, rel=0.2)
+        bloom.clear()
+        assert 1 not in bloom
+
+    def test_redis(self):
+        bloom = RedisBloomFilter(fakeredis.FakeRedis(server=fakeredis.FakeServer()), "bloom:user", capacity=1000)
+        local_bloom = BloomFilter(capacity=1000)
+        assert bloom.add_many(range(0, 1000, 2)) == 500
+        local_bloom.add_many(range(0, 1000, 2))
+        assert bloom.contains_many(range(1000)) == local_bloom.contains_many(range(1000))
+        assert bloom.stats() == local_bloom.stats()
+
+    @pytest.mark.asyncio
+    async def test_cache_json_guard(self):
+        call_ids = []
+        bloom = AsyncRedisManager.bloom_filter("user_id", capacity=1000, batch_size=100)
+        assert await populate_bloom_filter(bloom, [range(100), range(100, 200)]) == 200
+
+        @AsyncRedisManager.cache_json(ttl=60, bloom_filter=bloom, metrics=True)
+        async def get_user(user_id):
+            call_ids.append(user_id)
+            return {"user_id": user_id}
+
+        assert await get_user(1) == {"user_id": 1}
+        assert await get_user(user_id=100000) is None
+        assert call_ids == [1]
+        assert get_user.cache_metrics.stats()["bloom_rejects"] == 1
+
+        @cache_json_batch(bloom_filter=bloom)
+        async def query_users(user_ids):
+            call_ids.extend(user_ids)
+            return {user_id: {"user_id": user_id} for user_id in user_ids}
+
+        assert list(await query_users([3, 100000, 4])) == [3, 4]
+        assert call_ids == [1, 3, 4]
+        await bloom.clear()
+
+    def test_bloom_key(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add("hui")
+
+        @cache_json(bloom_filter=bloom, bloom_key=lambda self, name: name)
+        def get_user(self, name):
+            return {"name": name}
+
+        assert get_user(None, "hui") == {"name": "hui"}
+        assert get_user(None, "unknown") is None
+
+    def test_method_bloom_item(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add(1)
+
+        class UserService:
+            @cache_json(bloom_filter=bloom, key_builder=CacheKeyBuilder(ignore_args=["self"]))
+            def get_user(self, user_id):
+                return {"user_id": user_id}
+
+            @classmethod
+            @cache_json(bloom_filter=bloom)
+            def get_user_by_cls(cls, user_id):
+                return {"user_id": user_id}
+
+        # 默认跳过 self、cls，取 id 参数判断
+        assert UserService().get_user(1) == {"user_id": 1}
+        assert UserService().get_user(user_id=2) is None
+        assert UserService.get_user_by_cls(1) == {"user_id": 1}
+        assert UserService.get_user_by_cls(2) is None
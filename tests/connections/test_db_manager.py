@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_db_manager.py
+# @Desc: { DBManager 单测（sqlite） }
+# @Date: 2026/10/19 10:00
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import String
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Mapped, mapped_column
+
+from py_tools.connections.db.bloom_filter import BloomFilter, populate_bloom_filter
+from py_tools.connections.db.mysql import (
+    BaseOrmTable,
+    BaseOrmTableWithTS,
+    DBManager,
+    ReferenceTableCache,
+    SQLAlchemyManager,
+    VersionColumns,
+)
+from py_tools.constants import DEMO_DATA
+from py_tools.utils import ExcelUtil
+from py_tools.utils.tree_util import list_to_tree_dfs
+
+DB_FILE = DEMO_DATA.joinpath("tmp", "test_db_manager.db")
+
+
+class CategoryTable(BaseOrmTableWithTS):
+    """分类表"""
+
+    __tablename__ = "category"
+    name: Mapped[str] = mapped_column(String(100), default="", comment="分类名称")
+    pid: Mapped[int] = mapped_column(default=0, comment="父级id")
+
+
+class CategoryManager(DBManager):
+    orm_table = CategoryTable
+
+
+class InventoryTable(BaseOrmTable, VersionColumns):
+    """库存表"""
+
+    __tablename__ = "inventory"
+    stock: Mapped[int] = mapped_column(default=0, comment="库存")
+
+
+class InventoryManager(DBManager):
+    orm_table = InventoryTable
+
+
+@pytest_asyncio.fixture
+async def db_client():
+    DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+    db_client = SQLAlchemyManager()
+    db_client.db_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_FILE}")
+    db_client.async_session_maker = async_sessionmaker(bind=db_client.db_engine, expire_on_commit=False)
+    async with db_client.db_engine.begin() as conn:
+        await conn.run_sync(CategoryTable.metadata.drop_all)
+        await conn.run_sync(CategoryTable.metadata.create_all)
+
+    DBManager.init_db_client(db_client)
+    yield db_client
+    await db_client.db_engine.dispose()
+    DB_FILE.unlink(missing_ok=True)
+
+
+class TestDBManager:
+    @pytest.mark.asyncio
+    async def test_changes_since(self, db_client):
+        await CategoryManager().bulk_add([{"name": f"c{i}"} for i in range(5)])
+
+        batches = [batch async for batch in CategoryManager().changes_since(batch_size=2)]
+        assert [len(batch.rows) for batch in batches] == [2, 2, 1]
+        watermark = batches[-1].watermark
+        assert watermark[1] == 5
+
+        # 水位线之后没有变更
+        assert [batch async for batch in CategoryManager().changes_since(watermark)] == []
+
+        await asyncio.sleep(0.01)
+        await CategoryManager().update(values={"name": "c1-new"}, conds=[CategoryTable.id == 2])
+        await CategoryManager().delete_by_id(3, logic_del=True)
+
+        batches = [batch async for batch in CategoryManager().changes_since(watermark, batch_size=10)]
+        assert len(batches) == 1
+        assert [row.name for row in batches[0].rows] == ["c1-new"]
+        assert batches[0].tombstones == [3]
+        assert batches[0].watermark[1] == 3
+
+        # 从头拉取时不返回逻辑删除的记录
+        batches = [batch async for batch in CategoryManager().changes_since(batch_size=2)]
+        assert [row.id for batch in batches for row in batch.rows] == [1, 4, 5, 2]
+        assert all(batch.tombstones == [] for batch in batches)
+
+    @pytest.mark.asyncio
+    async def test_scan_ids(self, db_client):
+        await CategoryManager().bulk_add([{"name": f"c{i}", "pid": i % 2} for i in range(7)])
+
+        batches = [ids async for ids in CategoryManager().scan_ids(batch_size=3)]
+        assert batches == [[1, 2, 3], [4, 5, 6], [7]]
+
+        batches = [ids async for ids in CategoryManager().scan_ids(batch_size=2, conds=[CategoryTable.pid == 1])]
+        assert batches == [[2, 4], [6]]
+
+        bloom_filter = BloomFilter(capacity=100)
+        assert await populate_bloom_filter(bloom_filter, CategoryManager().scan_ids(batch_size=3)) == 7
+        assert bloom_filter.contains_many(range(1, 8)) == [True] * 7
+
+    @pytest.mark.asyncio
+    async def test_query_tree(self, db_client):
+        # 1 -> 2 -> 4 -> 5, 1 -> 3, 6
+        pid_map = {1: 0, 2: 1, 3: 1, 4: 2, 5: 4, 6: 0}
+        await CategoryManager().bulk_add([{"name": f"c{pk}", "pid": pid} for pk, pid in pid_map.items()])
+
+        rows = await CategoryManager().query_subtree(root_id=2)
+        assert [(row["id"], row["depth"]) for row in rows] == [(2, 0), (4, 1), (5, 2)]
+
+        rows = await CategoryManager().query_subtree(root_id=1, max_depth=1)
+        assert [row["id"] for row in rows] == [1, 2, 3]
+
+        tree = list_to_tree_dfs(rows, root_pid=rows[0]["pid"])
+        assert [child["id"] for child in tree[0]["children"]] == [2, 3]
+
+        rows = await CategoryManager().query_ancestors(node_id=5)
+        assert [(row["id"], row["depth"]) for row in rows] == [(5, 0), (4, 1), (2, 2), (1, 3)]
+
+    @pytest.mark.asyncio
+    async def test_reference_table_cache(self, db_client):
+        await CategoryManager().bulk_add([{"name": f"c{i}"} for i in range(3)])
+
+        ref_cache = ReferenceTableCache(CategoryManager, unique_fields=["name"])
+        assert await ref_cache.load() == 3
+        assert ref_cache.get(1).name == "c0"
+        assert ref_cache.get_by("name", "c2").id == 3
+
+        await asyncio.sleep(0.01)
+        await CategoryManager().update(values={"name": "c0-new"}, conds=[CategoryTable.id == 1])
+        await CategoryManager().delete_by_id(2, logic_del=True)
+        await CategoryManager().add({"name": "c3"})
+
+        assert await ref_cache.refresh() == 3
+        assert ref_cache.get_by("name", "c0") is None
+        assert ref_cache.get_by("name", "c0-new").id == 1
+        assert 2 not in ref_cache
+        assert len(ref_cache) == 3
+
+        # 没有更新时间字段的全量加载同样不加载逻辑删除的记录
+        ref_cache = ReferenceTableCache(CategoryManager, updated_field="unknown")
+        assert not ref_cache.incremental
+        assert await ref_cache.load() == 3
+        assert 2 not in ref_cache
+
+    @pytest.mark.asyncio
+    async def test_bulk_load(self, db_client):
+        load_count = await CategoryManager().bulk_load(({"name": f"c{i}", "pid": i} for i in range(10)), chunk_size=3)
+        assert load_count == 10
+
+        csv_file = DB_FILE.with_suffix(".csv")
+        ExcelUtil.list_to_csv(
+            str(csv_file), [{"name": "csv1", "pid": 1, "deleted_at": None}, {"name": "csv2", "pid": 2}]
+        )
+        try:
+            assert await CategoryManager().bulk_load(csv_file) == 2
+        finally:
+            csv_file.unlink(missing_ok=True)
+
+        rows = await CategoryManager().query_all(conds=[CategoryTable.name.like("csv%")])
+        assert [(row.name, row.pid, row.deleted_at) for row in rows] == [("csv1", 1, None), ("csv2", 2, None)]
+
+        # orm 实例 to_dict() 的 created_at、updated_at 为 None，导入时填充 python 端默认值
+        assert await CategoryManager().bulk_load([CategoryTable(name="orm1", pid=1), {"name": "orm2", "pid": 2}]) == 2
+        rows = await CategoryManager().query_all(conds=[CategoryTable.name.like("orm%")])
+        assert len(rows) == 2 and all(row.created_at and row.updated_at for row in rows)
+
+        defaults = CategoryManager._column_defaults(CategoryTable)
+        assert {"created_at", "updated_at"} <= set(defaults)
+        assert isinstance(defaults["created_at"](), datetime)
+        assert InventoryManager._column_defaults(InventoryTable)["version"]() == 0
+
+    @pytest.mark.asyncio
+    async def test_update_if_version(self, db_client):
+        pk_id = await InventoryManager().add({"stock": 10})
+
+        assert await InventoryManager().update_if_version(pk_id, 0, {"stock": 9}) is True
+        # 旧版本号更新失败
+        assert await InventoryManager().update_if_version(pk_id, 0, {"stock": 8}) is False
+
+        jobs = [
+            InventoryManager().update_with_version_retry(pk_id, lambda row: {"stock": row.stock - 1}) for _ in range(3)
+        ]
+        assert all(await asyncio.gather(*jobs))
+
+        row = await InventoryManager().query_by_id(pk_id)
+        assert (row.stock, row.version) == (6, 4)
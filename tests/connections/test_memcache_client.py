@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_memcache_client.py
+# @Desc: { 异步 Memcached 客户端单测（进程内模拟服务端） }
+# @Date: 2026/10/19 20:00
+import asyncio
+import socket
+import time
+
+import pytest
+import pytest_asyncio
+
+from py_tools.connections.db.memcache_client import AsyncMemcacheClient
+from py_tools.decorators.cache import AsyncMemcacheCacheProxy, cache_json, cache_json_batch
+
+
+class FakeMemcacheServer:
+    """进程内模拟的 Memcached 服务端（文本协议 get、set、add、delete）"""
+
+    def __init__(self):
+        self.data = {}  # key -> (flags, data, 过期时间戳)
+        self.requests = 0
+        self.server = None
+        self.writers = set()
+
+    async def start(self, port: int = 0) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        await self.server.wait_closed()
+
+    def _get(self, key):
+        item = self.data.get(key)
+        if item and item[2] and item[2] <= time.time():
+            self.data.pop(key)
+            return None
+        return item
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            while line := await reader.readline():
+                self.requests += 1
+                parts = line.rstrip(b"\r\n").split(b" ")
+                command, args = parts[0], parts[1:]
+                if command == b"get":
+                    for key in args:
+                        item = self._get(key)
+                        if item:
+                            writer.write(b"VALUE %s %d %d\r\n%s\r\n" % (key, item[0], len(item[1]), item[1]))
+                    writer.write(b"END\r\n")
+                elif command in (b"set", b"add"):
+                    key, flags, ttl, size = args[0], int(args[1]), int(args[2]), int(args[3])
+                    data = (await reader.readexactly(size + 2))[:-2]
+                    if command == b"add" and self._get(key):
+                        writer.write(b"NOT_STORED\r\n")
+                    else:
+                        self.data[key] = (flags, data, time.time() + ttl if ttl else 0)
+                        writer.write(b"STORED\r\n")
+                elif command == b"delete":
+                    writer.write(b"DELETED\r\n" if self.data.pop(args[0], None) else b"NOT_FOUND\r\n")
+                else:
+                    writer.write(b"ERROR\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+
+@pytest_asyncio.fixture
+async def memcache_servers():
+    servers = [FakeMemcacheServer() for _ in range(3)]
+    addresses = [await server.start() for server in servers]
+    yield servers, addresses
+    for server in servers:
+        await server.stop()
+
+
+class TestAsyncMemcacheClient:
+    @pytest.mark.asyncio
+    async def test_multi(self, memcache_servers):
+        servers, addresses = memcache_servers
+        client = AsyncMemcacheClient(addresses, pool_size=2)
+        mapping = {f"key:{i}": f"value:{i}" for i in range(30)}
+        mapping["bytes"] = b"\x00\r\nbinary"
+
+        assert await client.set_multi(mapping, ttl=60) == []
+        assert all(server.data for server in servers)  # key 分布到各个节点
+        assert await client.get_multi(list(mapping) + ["unknown"]) == mapping
+
+        assert await client.add("key:1", "new") is False
+        assert await client.add("lock", "token", ttl=60) is True
+        assert await client.delete_multi(["key:1", "key:2", "unknown"]) == 2
+        assert await client.get("key:1") is None
+
+        # 并发请求共享连接池
+        rets = await asyncio.gather(*[client.get(f"key:{i}") for i in range(3, 30)])
+        assert rets == [f"value:{i}" for i in range(3, 30)]
+        assert all(len(pool._idle) <= 2 for pool in client.pools.values())
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_server_down(self, memcache_servers):
+        servers, addresses = memcache_servers
+        client = AsyncMemcacheClient(addresses, timeout=1)
+        await client.set_multi({f"key:{i}": i for i in range(30)})
+
+        # 节点不可用时对应的 key 视为未命中，其他节点正常
+        await servers[0].stop()
+        down_keys = client.ring.group_keys([f"key:{i}" for i in range(30)])[addresses[0]]
+        values = await client.get_multi([f"key:{i}" for i in range(30)])
+        assert len(values) == 30 - len(down_keys)
+        assert set(await client.set_multi({key: 1 for key in down_keys})) == set(down_keys)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_json(self, memcache_servers):
+        servers, addresses = memcache_servers
+        proxy = AsyncMemcacheCacheProxy(AsyncMemcacheClient(addresses))
+        call_ids = []
+
+        @cache_json(cache_proxy=proxy, distributed_lock=True)
+        async def get_user(user_id):
+            call_ids.append(user_id)
+            await asyncio.sleep(0.01)
+            return {"user_id": user_id}
+
+        rets = await asyncio.gather(*[get_user(1) for _ in range(5)])
+        assert rets == [{"user_id": 1}] * 5 and call_ids == [1]
+
+        @cache_json_batch(cache_proxy=proxy, codec="msgpack")
+        async def query_users(user_ids):
+            call_ids.extend(user_ids)
+            return {user_id: {"user_id": user_id} for user_id in user_ids}
+
+        assert len(await query_users(list(range(10)))) == 10
+        assert len(await query_users(list(range(15)))) == 15
+        assert call_ids == [1] + list(range(15))
+
+        request_count = sum(server.requests for server in servers)
+        await query_users(list(range(15)))
+        assert sum(server.requests for server in servers) - request_count <= len(servers)
+
+    def test_event_loops(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        # 在事件循环外创建客户端，之后在不同的事件循环中使用
+        client = AsyncMemcacheClient([f"127.0.0.1:{port}"], pool_size=2)
+
+        async def run(close=False):
+            server = FakeMemcacheServer()
+            await server.start(port)
+            await client.set("key", "value")
+            rets = await asyncio.gather(*[client.get("key") for _ in range(5)])
+            if close:
+                await client.close()
+            await server.stop()
+            return rets
+
+        # 上一个事件循环的空闲连接不会被复用
+        assert asyncio.run(run()) == ["value"] * 5
+        assert asyncio.run(run(close=True)) == ["value"] * 5
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_redis_manager.py
+# @Desc: { BaseRedisManager 单测（fakeredis） }
+# @Date: 2026/10/19 16:00
+import asyncio
+
+import fakeredis
+import pytest
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.exceptions import DataError
+
+from py_tools.connections.db.redis_client import AutoPipelineRedis, BaseRedisManager
+from py_tools.decorators.cache import AsyncRedisCacheProxy, cache_json, is_cluster_client
+
+
+class RedisManager(BaseRedisManager):
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+class AsyncRedisManager(BaseRedisManager):
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+class TestTypedCache:
+    def test_hash(self):
+        profile = {"name": "hui", "age": 18, "tags": ["a", "b"], "extra": None}
+        assert RedisManager.hash_set("user:1", profile, ttl=60) == 4
+        assert RedisManager.hash_get("user:1") == profile
+        assert RedisManager.hash_get("user:1", ["name", "tags", "unknown"]) == {
+            "name": "hui",
+            "tags": ["a", "b"],
+            "unknown": None,
+        }
+        assert RedisManager.hash_get("user:2", ["name"]) is None
+
+        assert RedisManager.hash_update("user:1", {"age": 19}) is True
+        assert RedisManager.hash_get("user:1", ["age"]) == {"age": 19}
+        assert 0 < RedisManager.client.ttl("user:1") <= 60
+
+        # key 不存在时不写入部分字段
+        assert RedisManager.hash_update("user:2", {"age": 19}) is False
+        assert RedisManager.hash_get("user:2") is None
+
+        assert RedisManager.hash_set("user:3", {}, ttl=60) == 0
+        assert RedisManager.hash_get("user:3") == {}
+        assert RedisManager.hash_update("user:3", {"age": 20}) is True
+        assert RedisManager.hash_get("user:3") == {"age": 20}
+
+    def test_list_and_set(self):
+        assert RedisManager.list_push("logs", *range(5), max_len=3) == 3
+        assert RedisManager.list_range("logs") == [2, 3, 4]
+
+        assert RedisManager.set_add("ids", 1, 2, "a", ttl=60) == 3
+        assert RedisManager.set_contains("ids", 1, 3, "a") == [True, False, True]
+        assert RedisManager.set_remove("ids", 2) == 1
+        assert sorted(RedisManager.set_members("ids"), key=str) == [1, "a"]
+
+    def test_cache_hash(self):
+        call_count = 0
+
+        @RedisManager.cache_hash(ttl=60)
+        def get_user_profile(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id, **{f"field{i}": i for i in range(200)}}
+
+        # 未命中执行函数并缓存整体结果
+        assert get_user_profile.get_fields(["user_id", "field1"], user_id=1) == {"user_id": 1, "field1": 1}
+        assert len(get_user_profile(1)) == 201
+        assert get_user_profile.get_fields(["field199"], 1) == {"field199": 199}
+        assert call_count == 1
+
+        RedisManager.hash_update(get_user_profile.cache_key(1), {"field1": "new"})
+        assert get_user_profile(1)["field1"] == "new"
+
+        # 空结果同样被缓存
+        @RedisManager.cache_hash(ttl=60)
+        def get_user_settings(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {}
+
+        call_count = 0
+        assert get_user_settings(1) == {}
+        assert get_user_settings(1) == {}
+        assert get_user_settings.get_fields(["theme"], 1) == {"theme": None}
+        assert call_count == 1
+        assert 0 < RedisManager.client.ttl(get_user_settings.cache_key(1)) <= 60
+
+    @pytest.mark.asyncio
+    async def test_async_cache_hash(self):
+        call_count = 0
+
+        @AsyncRedisManager.cache_hash(ttl=60)
+        async def get_user_profile(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id, "name": "hui"}
+
+        assert await get_user_profile(1) == {"user_id": 1, "name": "hui"}
+        assert await get_user_profile.get_fields(["name"], 1) == {"name": "hui"}
+        assert call_count == 1
+
+        assert await AsyncRedisManager.list_push("logs", {"a": 1}) == 1
+        assert await AsyncRedisManager.list_range("logs") == [{"a": 1}]
+
+
+class TestAutoPipelineRedis:
+    @pytest.mark.asyncio
+    async def test_auto_pipeline(self):
+        client = AutoPipelineRedis(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+
+        # 并发的命令合并为一个 pipeline
+        await asyncio.gather(*[client.set(f"key:{i}", i) for i in range(100)])
+        rets = await asyncio.gather(*[client.get(f"key:{i}") for i in range(100)])
+        assert rets == [str(i).encode() for i in range(100)]
+        assert (client.pipeline_count, client.command_count) == (2, 200)
+
+        # 单个命令的错误只影响对应的调用者
+        await client.set("str", "a")
+        rets = await asyncio.gather(client.incr("str"), client.incr("num"), return_exceptions=True)
+        assert isinstance(rets[0], Exception) and rets[1] == 1
+
+        # 构建命令时参数校验失败只影响对应的调用者，其他调用者不会一直等待
+        rets = await asyncio.wait_for(
+            asyncio.gather(
+                client.set("key:0", 0, ex="bad"), client.get("key:1"), client.incr("num"), return_exceptions=True
+            ),
+            timeout=1,
+        )
+        assert isinstance(rets[0], DataError) and rets[1:] == [b"1", 2]
+
+        # 未合并的命令透传
+        assert await client.pipeline(transaction=False).get("num").execute() == [b"2"]
+
+    @pytest.mark.asyncio
+    async def test_cluster_client(self):
+        # 集群判断按包装的原始客户端
+        cluster_client = AsyncRedisCluster(host="127.0.0.1", port=7000)
+        assert is_cluster_client(AutoPipelineRedis(cluster_client))
+        assert not is_cluster_client(AutoPipelineRedis(fakeredis.FakeAsyncRedis()))
+
+    @pytest.mark.asyncio
+    async def test_max_batch_and_cache_json(self):
+        client = AutoPipelineRedis(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()), max_batch=10)
+
+        @cache_json(cache_proxy=AsyncRedisCacheProxy(client))
+        async def query_user(user_id):
+            return {"user_id": user_id}
+
+        rets = await asyncio.gather(*[query_user(i) for i in range(25)])
+        assert rets == [{"user_id": i} for i in range(25)]
+        assert client.pipeline_count < client.command_count
+        await client.aclose()
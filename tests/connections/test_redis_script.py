@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_redis_script.py
+# @Desc: { Lua 脚本注册表单测（fakeredis） }
+# @Date: 2026/10/19 19:00
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from redis.crc import key_slot
+
+from py_tools.connections.db.redis_client import BaseRedisManager
+from py_tools.connections.db.redis_script import AsyncScriptRegistry, ScriptRegistry
+
+
+class RedisManager(BaseRedisManager):
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+class TestScriptRegistry:
+    def test_evalsha_fallback(self):
+        scripts = ScriptRegistry(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+        sha = scripts.register("echo", "return ARGV[1]")
+
+        # 未加载时 NOSCRIPT 回退 EVAL，之后 EVALSHA 命中
+        assert scripts.client.script_exists(sha) == [False]
+        assert scripts.call("echo", args=["hui"]) == b"hui"
+        assert scripts.client.script_exists(sha) == [True]
+        assert scripts.call("echo", args=["dbk"]) == b"dbk"
+
+        scripts.load()
+        assert all(scripts.client.script_exists(*[sha for sha, _ in scripts.scripts.values()]))
+        with pytest.raises(KeyError):
+            scripts.call("unknown")
+
+    def test_rate_limit(self):
+        scripts = RedisManager.scripts()
+        assert scripts is RedisManager.scripts()
+
+        rets = [scripts.token_bucket("rate:bucket", capacity=3, rate=1)[0] for _ in range(5)]
+        assert rets == [True, True, True, False, False]
+        assert 0 <= scripts.token_bucket("rate:bucket", capacity=3, rate=1)[1] < 1
+
+        rets = [scripts.sliding_window("rate:window", limit=2, window=1) for _ in range(3)]
+        assert rets == [(True, 1), (True, 2), (False, 2)]
+        assert 0 < RedisManager.client.pttl("rate:window") <= 1000
+
+    def test_atomic_ops(self):
+        scripts = RedisManager.scripts()
+        assert scripts.capped_list_push("logs", *range(5), max_len=3, ttl=60) == 3
+        assert RedisManager.client.lrange("logs", 0, -1) == [b"2", b"3", b"4"]
+        assert 0 < RedisManager.client.ttl("logs") <= 60
+
+        assert [scripts.incr_expire("counter", ttl=60) for _ in range(3)] == [1, 2, 3]
+        assert 0 < RedisManager.client.ttl("counter") <= 60
+
+        RedisManager.client.set("version", 1, ex=60)
+        assert scripts.compare_and_set("version", 1, 2) is True
+        assert scripts.compare_and_set("version", 1, 3) is False
+        assert RedisManager.client.get("version") == b"2"
+        assert 0 < RedisManager.client.ttl("version") <= 60
+
+        call_count = 0
+
+        def loader():
+            nonlocal call_count
+            call_count += 1
+            return "value"
+
+        assert scripts.get_or_set_with_lock("cache:key", loader, ttl=60) == "value"
+        assert scripts.get_or_set_with_lock("cache:key", loader, ttl=60) == b"value"
+        assert call_count == 1
+        assert not RedisManager.client.exists("{cache:key}:lock")
+
+    def test_lock_key_slot(self):
+        # 缓存 key 与锁 key 在同一个集群槽位
+        for key in ["k", "cache:user:1", "{user}:1", "a{b"]:
+            assert key_slot(key.encode()) == key_slot(ScriptRegistry._lock_key(key).encode())
+        assert ScriptRegistry._lock_key("{user}:1") == "{user}:1:lock"
+
+    def test_loader_error_unlock(self):
+        scripts = ScriptRegistry(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+        def loader():
+            raise ValueError("db error")
+
+        # loader 出错时释放锁，下一个调用者立即获取锁执行 loader
+        with pytest.raises(ValueError):
+            scripts.get_or_set_with_lock("cache:key", loader, ttl=60, lock_ttl=30)
+        assert not scripts.client.exists("{cache:key}:lock")
+        start = time.monotonic()
+        assert scripts.get_or_set_with_lock("cache:key", lambda: "value", ttl=60, lock_ttl=30) == "value"
+        assert time.monotonic() - start < 1
+
+    @pytest.mark.asyncio
+    async def test_async_get_or_set_with_lock(self):
+        scripts = AsyncScriptRegistry(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        call_count = 0
+
+        async def loader():
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.05)
+            return "value"
+
+        # 并发未命中时只有获取到锁的调用者执行 loader
+        rets = await asyncio.gather(
+            *[scripts.get_or_set_with_lock("cache:key", loader, ttl=60, wait_interval=0.01) for _ in range(5)]
+        )
+        assert (rets.count("value"), rets.count(b"value")) == (1, 4)
+        assert call_count == 1
+
+        async def error_loader():
+            raise ValueError("db error")
+
+        with pytest.raises(ValueError):
+            await scripts.get_or_set_with_lock("cache:other", error_loader, ttl=60, lock_ttl=30)
+        assert not await scripts.client.exists("{cache:other}:lock")
+        assert await scripts.token_bucket("rate:bucket", capacity=1, rate=1) == (True, 0)
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_redis_shard.py
+# @Desc: { Redis 客户端分片单测（fakeredis） }
+# @Date: 2026/10/19 17:00
+import fakeredis
+import pytest
+
+from py_tools.connections.db.hash_ring import ConsistentHashRing
+from py_tools.connections.db.redis_client import BaseRedisManager
+from py_tools.connections.db.redis_shard import AsyncShardedRedis, ShardedRedis
+from py_tools.decorators.cache import (
+    AsyncRedisCacheProxy,
+    RedisCacheProxy,
+    TieredCacheProxy,
+    cache_json,
+    cache_json_batch,
+)
+
+
+def make_sharded(node_num=3, is_async=False):
+    redis_cls = fakeredis.FakeAsyncRedis if is_async else fakeredis.FakeRedis
+    sharded_cls = AsyncShardedRedis if is_async else ShardedRedis
+    clients = {f"node{i}": redis_cls(server=fakeredis.FakeServer()) for i in range(node_num)}
+    return sharded_cls(clients)
+
+
+class TestConsistentHashRing:
+    def test_distribution(self):
+        ring = ConsistentHashRing(["a", "b", "c"])
+        groups = ring.group_keys(f"key:{i}" for i in range(3000))
+        assert sorted(groups) == ["a", "b", "c"]
+        assert all(700 < len(keys) < 1300 for keys in groups.values())
+        assert ring.get_node(b"key:1") == ring.get_node("key:1")
+
+    def test_remap(self):
+        ring = ConsistentHashRing(["a", "b", "c"])
+        keys = [f"key:{i}" for i in range(3000)]
+        before = {key: ring.get_node(key) for key in keys}
+
+        # 新增节点只迁移约 1/4 的 key，且只迁移到新节点
+        ring.add_node("d")
+        moved = [key for key in keys if ring.get_node(key) != before[key]]
+        assert 400 < len(moved) < 1200
+        assert all(ring.get_node(key) == "d" for key in moved)
+
+        ring.remove_node("d")
+        assert {key: ring.get_node(key) for key in keys} == before
+        assert ring.nodes == ["a", "b", "c"]
+
+
+class TestShardedRedis:
+    def test_commands(self):
+        client = make_sharded()
+        keys = [f"key:{i}" for i in range(30)]
+        for i, key in enumerate(keys):
+            client.set(key, i)
+
+        # key 分布到各个节点
+        assert all(node_client.dbsize() > 0 for node_client in client.clients.values())
+        assert client.get("key:3") == b"3"
+        assert client.mget(keys + ["unknown"]) == [str(i).encode() for i in range(30)] + [None]
+        assert client.exists(*keys[:10]) == 10
+        assert len(client.keys("key:*")) == 30
+        assert sorted(client.scan_iter(match="key:*", count=5)) == sorted(key.encode() for key in keys)
+
+        pipe = client.pipeline(transaction=False)
+        pipe.incr("key:1").mget(["key:1", "key:2"]).delete(*keys[:5])
+        assert pipe.execute() == [2, [b"2", b"2"], 5]
+        assert client.delete(*keys) == 25
+
+    def test_cache_json(self):
+        client = make_sharded()
+        proxy = RedisCacheProxy(client)
+        call_ids = []
+
+        @cache_json_batch(cache_proxy=proxy, ids_arg="user_ids")
+        def query_users(user_ids):
+            call_ids.extend(user_ids)
+            return {user_id: {"user_id": user_id} for user_id in user_ids}
+
+        assert query_users(list(range(20))) == {i: {"user_id": i} for i in range(20)}
+        assert list(query_users(list(range(25, -1, -1)))) == list(range(25, -1, -1))
+        assert call_ids == list(range(20)) + [25, 24, 23, 22, 21, 20]
+
+        # 标签失效跨节点删除
+        @cache_json(cache_proxy=proxy, tags=lambda user_id: [f"user:{user_id}", "users"])
+        def get_user(user_id):
+            call_ids.append(user_id)
+            return {"user_id": user_id}
+
+        for i in range(10):
+            get_user(i)
+        assert proxy.invalidate_tags(["users"]) == 10
+        get_user(1)
+        assert call_ids.count(1) == 3
+        assert proxy.invalidate_tags([]) == 0
+
+    def test_tiered_warm_up_l1(self):
+        client = make_sharded()
+        proxy = TieredCacheProxy(client, subscribe=False)
+
+        @cache_json(cache_proxy=proxy)
+        def get_user(user_id):
+            return {"user_id": user_id}
+
+        for i in range(30):
+            get_user(i)
+
+        # SCAN 所有节点的热点缓存复制到另一个节点的 L1
+        other_proxy = TieredCacheProxy(client, subscribe=False)
+        assert other_proxy.warm_up_l1(limit=100) == 30
+        assert other_proxy.l1_cache.size() == 30
+
+    @pytest.mark.asyncio
+    async def test_async(self):
+        client = make_sharded(is_async=True)
+        keys = [f"key:{i}" for i in range(30)]
+        pipe = client.pipeline(transaction=False)
+        for i, key in enumerate(keys):
+            pipe.set(key, i)
+        assert await pipe.execute() == [True] * 30
+        assert await client.mget(keys) == [str(i).encode() for i in range(30)]
+
+        @cache_json(cache_proxy=AsyncRedisCacheProxy(client), tags=lambda user_id: ["users"])
+        async def get_user(user_id):
+            return {"user_id": user_id}
+
+        assert await get_user(1) == {"user_id": 1}
+        assert await AsyncRedisCacheProxy(client).invalidate_tags(["users"]) == 1
+        assert len([key async for key in client.scan_iter(match="key:*")]) == 30
+        assert await client.delete(*keys) == 30
+        await client.aclose()
+
+    def test_init_redis_client(self):
+        class ShardedRedisManager(BaseRedisManager):
+            client = None
+
+        class AsyncShardedRedisManager(BaseRedisManager):
+            client = None
+
+        nodes = [{"host": "127.0.0.1", "port": 6379}, {"host": "127.0.0.1", "port": 6380}]
+        client = ShardedRedisManager.init_redis_client(shard_nodes=nodes, password="pwd")
+        assert isinstance(client, ShardedRedis)
+        assert client.ring.nodes == ["127.0.0.1:6379/0", "127.0.0.1:6380/0"]
+        assert not ShardedRedisManager._is_async_client()
+
+        AsyncShardedRedisManager.init_redis_client(async_client=True, shard_nodes=nodes)
+        assert AsyncShardedRedisManager._is_async_client()
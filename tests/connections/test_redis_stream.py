@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_redis_stream.py
+# @Desc: { Redis Streams 消息队列单测（fakeredis） }
+# @Date: 2026/10/19 21:00
+import asyncio
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from py_tools.connections.db.redis_client import BaseRedisManager
+from py_tools.connections.mq.redis_stream import AsyncRedisStreamQueue, RedisStreamQueue
+
+
+class RedisManager(BaseRedisManager):
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+class AsyncRedisManager(BaseRedisManager):
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+class TestRedisStreamQueue:
+    def test_produce_consume(self):
+        queue = RedisManager.stream_queue("orders", group="order_service", batch_size=10)
+        assert isinstance(queue, RedisStreamQueue)
+        queue.ensure_group()
+        queue.ensure_group()  # 已存在时忽略
+
+        message_ids = queue.add_many({"order_id": i} for i in range(25))
+        assert len(message_ids) == 25
+        assert RedisManager.client.xlen(queue.name) == 25
+
+        messages = queue.read("consumer-1", count=20)
+        assert [message for _, message in messages] == [{"order_id": i} for i in range(20)]
+        assert queue.ack([message_id for message_id, _ in messages]) == 20
+        assert RedisManager.client.xpending(queue.name, queue.group)["pending"] == 0
+
+        # 未确认的消息空闲超时后被其他消费者认领
+        messages = queue.read("consumer-1", count=10)
+        assert len(messages) == 5
+        assert queue.claim("consumer-2", min_idle_time=60000) == []
+        time.sleep(0.01)
+        assert queue.claim("consumer-2", min_idle_time=5) == messages
+
+    def test_run(self):
+        queue = RedisManager.stream_queue("events", group="worker")
+        queue.add_many(range(50))
+        handled, lock = [], threading.Lock()
+
+        def handler(message_id, message):
+            time.sleep(0.001)
+            if message == 7 and 7 not in handled:
+                handled.append(7)
+                raise ValueError("retry")
+            with lock:
+                handled.append(message)
+                if len(handled) >= 51:
+                    queue.stop()
+
+        # 处理失败的消息不确认，空闲后重新认领处理
+        thread = threading.Thread(
+            target=queue.run,
+            args=(handler,),
+            kwargs=dict(count=10, concurrency=4, block=10, claim_idle=20, claim_interval=0.01),
+        )
+        thread.start()
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+        assert sorted(handled) == sorted(list(range(50)) + [7])
+        assert RedisManager.client.xpending(queue.name, queue.group)["pending"] == 0
+
+
+class TestAsyncRedisStreamQueue:
+    @pytest.mark.asyncio
+    async def test_backpressure(self):
+        queue = AsyncRedisManager.stream_queue("tasks", group="worker", max_len=1000)
+        assert isinstance(queue, AsyncRedisStreamQueue)
+        await queue.add_many({"task_id": i} for i in range(100))
+        running, max_running, handled = 0, 0, []
+
+        async def handler(message_id, message):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            handled.append(message["task_id"])
+            if len(handled) == 100:
+                queue.stop()
+
+        read_counts = []
+        read = queue.read
+
+        async def record_read(consumer, count=100, block=None):
+            read_counts.append(count)
+            return await read(consumer, count, block)
+
+        queue.read = record_read
+        await asyncio.wait_for(queue.run(handler, count=50, concurrency=5, max_in_flight=20, block=10), 10)
+
+        # 并发不超过 concurrency，每次读取不超过剩余处理容量
+        assert sorted(handled) == list(range(100))
+        assert max_running <= 5
+        assert read_counts and max(read_counts) <= 20
+        assert (await AsyncRedisManager.client.xpending(queue.name, queue.group))["pending"] == 0
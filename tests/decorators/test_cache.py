@@ -0,0 +1,911 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# @Author: Hui
+# @File: test_cache.py
+# @Desc: { 缓存装饰器单测 }
+# @Date: 2026/10/19 11:00
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+import cacheout
+import fakeredis
+import pytest
+
+from py_tools.constants import CACHE_KEY_PREFIX
+from py_tools.decorators.cache import (
+    WARM_UP_FUNCS,
+    AsyncMemoryCacheProxy,
+    AsyncRedisCacheProxy,
+    AsyncTieredCacheProxy,
+    AsyncTrackingCacheProxy,
+    CacheKeyBuilder,
+    CacheSerializer,
+    LRUMemoryCache,
+    MemoryCacheProxy,
+    RedisCacheProxy,
+    TieredCacheProxy,
+    TinyLFUMemoryCache,
+    TrackingCacheProxy,
+    cache_json,
+    cache_json_batch,
+    cache_stats,
+    get_default_cache_proxy,
+    invalidate_tags,
+    set_default_cache_proxy,
+    warm_up,
+)
+
+
+class TestCacheJson:
+    """cache_json 缓存装饰器测试"""
+
+    def test_single_flight(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=MemoryCacheProxy(cacheout.Cache()))
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            time.sleep(0.2)  # 模拟慢查询
+            return {"user_id": user_id}
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            rets = list(executor.map(query_user, [1] * 10))
+
+        assert call_count == 1
+        assert rets == [{"user_id": 1}] * 10
+        # 共享结果的调用者拿到的是独立的对象
+        assert len({id(ret) for ret in rets}) == 10
+
+    @pytest.mark.asyncio
+    async def test_async_single_flight(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=AsyncRedisCacheProxy(fakeredis.FakeAsyncRedis()))
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.2)
+            return {"user_id": user_id}
+
+        rets = await asyncio.gather(*[query_user(1) for _ in range(10)])
+        assert call_count == 1
+        assert rets == [{"user_id": 1}] * 10
+
+    @pytest.mark.asyncio
+    async def test_single_flight_leader_cancelled(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=AsyncMemoryCacheProxy(LRUMemoryCache()))
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.1)
+            return {"user_id": user_id}
+
+        # leader 被取消（客户端断开、超时）时，等待者不受影响，其中一个成为新的 leader 重新执行
+        leader = asyncio.create_task(query_user(1))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(query_user(1)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*waiters) == [{"user_id": 1}] * 5
+        assert leader.cancelled()
+        assert call_count == 2
+
+    def test_single_flight_leader_interrupted(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=MemoryCacheProxy(cacheout.Cache()))
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            time.sleep(0.1)
+            if call_count == 1:
+                raise SystemExit()
+            return {"user_id": user_id}
+
+        # leader 被中断时只影响自己，等待者重新执行
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(query_user, 1)
+            time.sleep(0.02)
+            waiters = [executor.submit(query_user, 1) for _ in range(4)]
+            assert [waiter.result() for waiter in waiters] == [{"user_id": 1}] * 4
+            with pytest.raises(SystemExit):
+                leader.result()
+        assert call_count == 2
+
+    def test_distributed_lock(self):
+        call_count = 0
+        redis_server = fakeredis.FakeServer()
+
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            time.sleep(0.2)
+            return {"user_id": user_id}
+
+        # 模拟多个进程，各自的缓存代理指向同一个 redis
+        query_funcs = [
+            cache_json(
+                cache_proxy=RedisCacheProxy(fakeredis.FakeRedis(server=redis_server)),
+                distributed_lock=True,
+                lock_wait_interval=0.01,
+            )(query_user)
+            for _ in range(5)
+        ]
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            rets = list(executor.map(lambda query_func: query_func(1), query_funcs))
+
+        assert call_count == 1
+        assert rets == [{"user_id": 1}] * 5
+
+    def test_stale_while_revalidate(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=MemoryCacheProxy(cacheout.Cache()), ttl=1, stale_ttl=10)
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            time.sleep(0.1)
+            return {"user_id": user_id, "version": call_count}
+
+        assert query_user(1)["version"] == 1
+        time.sleep(1.1)
+
+        # 过期后直接返回旧值，后台只刷新一次
+        start_time = time.perf_counter()
+        rets = [query_user(1) for _ in range(5)]
+        assert time.perf_counter() - start_time < 0.1
+        assert rets == [{"user_id": 1, "version": 1}] * 5
+
+        time.sleep(0.3)
+        assert call_count == 2
+        assert query_user(1)["version"] == 2
+
+    @pytest.mark.asyncio
+    async def test_async_early_refresh(self):
+        call_count = 0
+
+        @cache_json(cache_proxy=AsyncRedisCacheProxy(fakeredis.FakeAsyncRedis()), ttl=60, early_refresh_beta=1e6)
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.01)
+            return {"user_id": user_id}
+
+        assert await query_user(1) == {"user_id": 1}
+        # beta 足够大时必然提前刷新
+        assert await query_user(1) == {"user_id": 1}
+        await asyncio.sleep(0.1)
+        assert call_count == 2
+
+    @pytest.mark.parametrize("empty_ret", [None, [], {}, "", 0, False])
+    def test_falsy_result_hit(self, empty_ret):
+        call_count = 0
+
+        @cache_json(cache_proxy=RedisCacheProxy(fakeredis.FakeRedis()))
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return empty_ret
+
+        assert query_user(1) == empty_ret
+        assert query_user(1) == empty_ret
+        assert call_count == 1
+
+    def test_negative_ttl(self):
+        call_count = 0
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+        @cache_json(cache_proxy=RedisCacheProxy(redis_client), ttl=60, negative_ttl=5)
+        def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id} if user_id > 0 else None
+
+        assert query_user(0) is None
+        assert query_user(0) is None
+        assert call_count == 1
+
+        query_user(1)
+        negative_ttl, ttl = sorted(redis_client.ttl(key) for key in redis_client.keys())
+        assert 0 < negative_ttl <= 5 < ttl <= 60
+
+
+class TestCacheMetrics:
+    """缓存指标测试"""
+
+    def test_cache_metrics(self):
+        cache_proxy = RedisCacheProxy(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+        @cache_json(cache_proxy=cache_proxy, metrics=True)
+        def query_user(user_id):
+            time.sleep(0.1)
+            return {"user_id": user_id}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(query_user, [1] * 4))
+        query_user(1)
+        query_user(2)
+
+        stats = query_user.cache_metrics.stats()
+        assert (stats["hits"], stats["misses"], stats["single_flight_waits"]) == (1, 5, 3)
+        assert stats["hit_ratio"] == 1 / 6
+        assert stats["set_latency"]["count"] == 2
+        assert stats["value_size"]["count"] == 2 and stats["value_size"]["max"] > 0
+        assert stats["single_flight_wait"]["p50"] >= 0.05
+
+        all_stats = cache_stats()
+        assert all_stats["functions"][query_user.cache_metrics.name] == stats
+        assert all_stats["proxies"][cache_proxy.name]["get_latency"]["count"] == stats["get_latency"]["count"]
+
+    @pytest.mark.asyncio
+    async def test_batch_metrics(self):
+        @cache_json_batch(metrics=True)
+        async def query_users(user_ids):
+            return {user_id: {"user_id": user_id} for user_id in user_ids}
+
+        await query_users([1, 2])
+        await query_users([2, 3, 4])
+        stats = query_users.cache_metrics.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 4)
+        assert stats["set_latency"]["count"] == 2
+
+
+class TestCacheTags:
+    """缓存标签失效测试"""
+
+    @pytest.mark.parametrize("proxy_type", ["memory", "redis", "tiered"])
+    def test_invalidate_tags(self, proxy_type):
+        call_count = 0
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache_proxy = {
+            "memory": lambda: MemoryCacheProxy(cacheout.Cache()),
+            "redis": lambda: RedisCacheProxy(redis_client),
+            "tiered": lambda: TieredCacheProxy(redis_client, subscribe=False),
+        }[proxy_type]()
+
+        @cache_json(cache_proxy=cache_proxy, ttl=3600, tags=lambda user_id, page=1: [f"user:{user_id}", "users"])
+        def query_user_orders(user_id, page=1):
+            nonlocal call_count
+            call_count += 1
+            return [{"user_id": user_id, "page": page}]
+
+        for user_id, page in [(1, 1), (1, 2), (2, 1)]:
+            query_user_orders(user_id, page=page)
+            query_user_orders(user_id, page=page)
+        assert call_count == 3
+
+        assert invalidate_tags(["user:1"], cache_proxy=cache_proxy) == 2
+        query_user_orders(1, page=1)
+        query_user_orders(2, page=1)
+        assert call_count == 4
+
+        assert invalidate_tags(["users"], cache_proxy=cache_proxy) == 3
+        query_user_orders(2, page=1)
+        assert call_count == 5
+
+    @pytest.mark.asyncio
+    async def test_async_invalidate_tags(self):
+        call_count = 0
+        cache_proxy = AsyncRedisCacheProxy(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        cache_proxy.tag_delete_batch = 2
+
+        @cache_json(cache_proxy=cache_proxy, tags=lambda user_id: ["users"])
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id}
+
+        for user_id in range(5):
+            await query_user(user_id)
+        assert await invalidate_tags(["users"], cache_proxy=cache_proxy) == 5
+        assert await cache_proxy.cache_client.keys() == []
+
+        await query_user(1)
+        assert call_count == 6
+
+    @pytest.mark.asyncio
+    async def test_invalidate_default_proxy_tags(self):
+        call_count = 0
+
+        # 未指定缓存代理时同步、异步函数使用不同的默认内存缓存，都需要删除
+        @cache_json(tags=lambda user_id: [f"default_proxy_user:{user_id}"])
+        async def get_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id}
+
+        @cache_json(tags=lambda user_id: [f"default_proxy_user:{user_id}"])
+        def get_user_sync(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id}
+
+        for _ in range(2):
+            await get_user(1)
+            get_user_sync(1)
+        assert call_count == 2
+
+        assert invalidate_tags(["default_proxy_user:1"]) == 2
+        await get_user(1)
+        get_user_sync(1)
+        assert call_count == 4
+
+    @pytest.mark.parametrize("proxy_type", ["memory", "redis"])
+    def test_tags_key_prefix(self, proxy_type):
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache_proxy = MemoryCacheProxy(cacheout.Cache()) if proxy_type == "memory" else RedisCacheProxy(redis_client)
+        call_ids = []
+
+        def query_user(user_id):
+            call_ids.append(user_id)
+            return {"user_id": user_id}
+
+        # 不同 key 前缀（eg: 不同租户）共用缓存服务，标签互不影响
+        query_user_a = cache_json(cache_proxy=cache_proxy, key_prefix="tenant_a", tags=lambda user_id: ["users"])(
+            query_user
+        )
+        query_user_b = cache_json(cache_proxy=cache_proxy, key_prefix="tenant_b", tags=lambda user_id: ["users"])(
+            query_user
+        )
+        query_user_a(1)
+        query_user_b(1)
+        assert invalidate_tags(["users"], cache_proxy=cache_proxy) == 0
+        assert invalidate_tags(["users"], cache_proxy=cache_proxy, key_prefix="tenant_a") == 1
+        query_user_a(1)
+        query_user_b(1)
+        assert call_ids == [1, 1, 1]
+
+    def test_tag_ttl(self):
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        cache_proxy = RedisCacheProxy(redis_client)
+        tag_key = cache_proxy._tag_key("users")
+
+        # 标签的过期时间只延长不缩短
+        cache_proxy.add_tags("key:1", ["users"], 100)
+        assert 0 < redis_client.ttl(tag_key) <= 100
+        cache_proxy.add_tags("key:2", ["users"], 1000)
+        assert redis_client.ttl(tag_key) > 100
+        cache_proxy.add_tags("key:3", ["users"], 10)
+        assert redis_client.ttl(tag_key) > 100
+        assert redis_client.smembers(tag_key) == {b"key:1", b"key:2", b"key:3"}
+
+    def test_add_tags_error(self):
+        class BrokenTagProxy(MemoryCacheProxy):
+            def add_tags(self, key, tags, ttl, key_prefix=CACHE_KEY_PREFIX):
+                raise ConnectionError("tag server down")
+
+        @cache_json(cache_proxy=BrokenTagProxy(cacheout.Cache()), tags=lambda user_id: ["users"])
+        def query_user(user_id):
+            return {"user_id": user_id}
+
+        # 标签记录失败只记录日志，不影响结果返回
+        assert query_user(1) == {"user_id": 1}
+
+
+class TestMemoryCache:
+    """进程内缓存测试"""
+
+    def test_lru_memory_cache(self):
+        cache = LRUMemoryCache(maxsize=3, max_bytes=0)
+        for i in range(3):
+            cache.set(i, i)
+        cache.get(0)
+        cache.set(3, 3)  # 淘汰最久未使用的 1
+        assert [cache.get(i) for i in range(4)] == [0, None, 2, 3]
+
+        cache.set("ttl", 1, ttl=0.05)
+        time.sleep(0.1)
+        assert cache.get("ttl") is None
+
+        cache = LRUMemoryCache(maxsize=0, max_bytes=10000)
+        for i in range(10):
+            cache.set(i, "x" * 2000)
+        assert cache.stats()["bytes"] <= 10000
+        assert cache.get(9) and cache.get(0) is None
+        cache.set("big", "x" * 20000)  # 超过容量上限不缓存
+        assert cache.get("big") is None
+
+    def test_tinylfu_memory_cache(self):
+        cache = TinyLFUMemoryCache(maxsize=100, max_bytes=0)
+        # 热点数据多次访问
+        for _ in range(3):
+            for i in range(50):
+                if cache.get(f"hot:{i}") is None:
+                    cache.set(f"hot:{i}", i)
+
+        # 一次性扫描大量冷数据不会挤掉热点数据
+        for i in range(1000):
+            cache.set(f"scan:{i}", i)
+        assert sum(cache.get(f"hot:{i}") is not None for i in range(50)) >= 45
+        assert cache.size() <= 100
+
+        lru_cache = LRUMemoryCache(maxsize=100, max_bytes=0)
+        for i in range(50):
+            lru_cache.set(f"hot:{i}", i)
+        for i in range(1000):
+            lru_cache.set(f"scan:{i}", i)
+        assert all(lru_cache.get(f"hot:{i}") is None for i in range(50))
+
+    def test_tinylfu_max_bytes(self):
+        cache = TinyLFUMemoryCache(maxsize=0, max_bytes=100000)
+        for i in range(100):
+            cache.set(i, "x" * 5000)
+            cache.get(i)
+        stats = cache.stats()
+        assert stats["bytes"] <= 100000 and stats["policy"] == "w-tinylfu"
+        assert stats["bytes"] == stats["window_bytes"] + stats["probation_bytes"] + stats["protected_bytes"]
+        cache.set("big", "x" * 200000)  # 超过容量上限不缓存
+        assert cache.get("big") is None
+
+        cache.set("ttl", 1, ttl=0.05)
+        time.sleep(0.1)
+        assert cache.get("ttl") is None
+        cache.delete(99)
+        assert cache.get(99) is None
+        cache.clear()
+        assert cache.stats()["bytes"] == 0
+
+    def test_set_default_cache_proxy(self):
+        default_proxy = get_default_cache_proxy()
+        proxy = MemoryCacheProxy(TinyLFUMemoryCache(maxsize=0, max_bytes=1024 * 1024))
+        set_default_cache_proxy(proxy=proxy)
+        try:
+
+            @cache_json()
+            def query_report(report_id):
+                return {"report_id": report_id, "rows": list(range(100))}
+
+            assert query_report(1) == query_report(1)
+            stats = proxy.stats()
+            assert (stats["size"], stats["hits"]) == (1, 1)
+            assert stats["bytes"] > len(json.dumps(query_report(1)))  # 按序列化后的值计算
+        finally:
+            set_default_cache_proxy(proxy=default_proxy)
+
+    @pytest.mark.asyncio
+    async def test_async_default_proxy(self):
+        call_count = 0
+
+        @cache_json()
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id}
+
+        rets = [await query_user(1) for _ in range(3)]
+        assert rets == [{"user_id": 1}] * 3
+        assert call_count == 1
+
+
+class TestCacheJsonBatch:
+    """批量缓存装饰器测试"""
+
+    def test_cache_json_batch(self):
+        query_ids = []
+        redis_client = fakeredis.FakeRedis()
+
+        @cache_json_batch(cache_proxy=RedisCacheProxy(redis_client), negative_ttl=5)
+        def query_users(user_ids, fields=None):
+            query_ids.append(list(user_ids))
+            return {user_id: {"user_id": user_id} for user_id in user_ids if user_id < 100}
+
+        assert query_users([3, 1, 2]) == {3: {"user_id": 3}, 1: {"user_id": 1}, 2: {"user_id": 2}}
+        rets = query_users([2, 4, 3, 100])
+        assert list(rets) == [2, 4, 3]  # 按输入顺序，不存在的 id 不返回
+        assert query_ids == [[3, 1, 2], [4, 100]]
+
+        # 不存在的 id 负缓存
+        assert query_users([100, 1]) == {1: {"user_id": 1}}
+        assert len(query_ids) == 2
+
+        # 其他参数不同不共享缓存
+        query_users([1], fields=["name"])
+        assert query_ids[-1] == [1]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tiered", [False, True])
+    async def test_async_cache_json_batch(self, tiered):
+        query_ids = []
+        redis_client = fakeredis.FakeAsyncRedis()
+        cache_proxy = (
+            AsyncTieredCacheProxy(redis_client, subscribe=False) if tiered else AsyncRedisCacheProxy(redis_client)
+        )
+
+        @cache_json_batch(cache_proxy=cache_proxy)
+        async def query_users(user_ids):
+            query_ids.append(list(user_ids))
+            return {user_id: [] for user_id in user_ids}
+
+        assert await query_users([1, 2]) == {1: [], 2: []}
+        assert await query_users([2, 3, 1]) == {2: [], 3: [], 1: []}
+        assert query_ids == [[1, 2], [3]]
+
+    def test_method(self):
+        query_ids = []
+        cache_proxy = RedisCacheProxy(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+        class UserService:
+            # 默认的 id 列表参数跳过 self、cls
+            @cache_json_batch(cache_proxy=cache_proxy, key_builder=CacheKeyBuilder(ignore_args=["self"]))
+            def query_users(self, user_ids):
+                query_ids.append(list(user_ids))
+                return {user_id: {"user_id": user_id} for user_id in user_ids}
+
+            @classmethod
+            @cache_json_batch(cache_proxy=cache_proxy, key_builder=CacheKeyBuilder(ignore_args=["cls"]))
+            def query_orders(cls, order_ids):
+                query_ids.append(list(order_ids))
+                return {order_id: [] for order_id in order_ids}
+
+        assert UserService().query_users([1, 2]) == {1: {"user_id": 1}, 2: {"user_id": 2}}
+        assert UserService().query_users([2, 3]) == {2: {"user_id": 2}, 3: {"user_id": 3}}
+        assert UserService.query_orders([1]) == {1: []}
+        assert UserService.query_orders([1]) == {1: []}
+        assert query_ids == [[1, 2], [3], [1]]
+
+
+class TestCacheKeyBuilder:
+    """缓存 key 生成器测试"""
+
+    @staticmethod
+    def query_users(user_ids, filters=None, page=1):
+        pass
+
+    @pytest.mark.parametrize("hash_algo", ["blake2b", "xxhash", "md5", "sha256"])
+    def test_build(self, hash_algo):
+        key_builder = CacheKeyBuilder(hash_algo=hash_algo)
+        key = key_builder(self.query_users, ([1, 2],), {"filters": {"a": 1, "b": {2, 1}}})
+
+        # 位置参数与关键字参数、默认值、dict 与 set 的顺序不影响 key
+        assert key == key_builder(
+            self.query_users, (), {"user_ids": [1, 2], "filters": {"b": {1, 2}, "a": 1}, "page": 1}
+        )
+        assert key != key_builder(self.query_users, ([1, 2],), {"filters": {"a": 1, "b": {2, 1}}, "page": 2})
+        assert key != key_builder(self.query_users, ([2, 1],), {"filters": {"a": 1, "b": {2, 1}}})
+
+    def test_ignore_self(self):
+        call_count = 0
+
+        class UserService:
+            @cache_json(
+                cache_proxy=MemoryCacheProxy(cacheout.Cache()), key_builder=CacheKeyBuilder(ignore_args=["self"])
+            )
+            def get_user(self, user_id):
+                nonlocal call_count
+                call_count += 1
+                return {"user_id": user_id}
+
+        assert UserService().get_user(1) == UserService().get_user(user_id=1)
+        assert call_count == 1
+
+
+class TestCacheSerializer:
+    """缓存值序列化测试"""
+
+    data = {"name": "hui", "created_at": datetime(2024, 1, 1, 12, 0), "amount": Decimal("9.90"), "tags": ["a"] * 500}
+
+    @pytest.mark.parametrize("codec", ["json", "orjson", "msgpack"])
+    def test_codecs(self, codec):
+        serializer = CacheSerializer(codec=codec)
+        ret = serializer.loads(serializer.dumps(self.data))
+        assert ret["created_at"].startswith("2024-01-01T12:00")
+        assert ret["amount"] == "9.90"
+
+    def test_pickle_codec(self):
+        serializer = CacheSerializer(codec="pickle")
+        assert serializer.loads(serializer.dumps(self.data)) == self.data
+
+    @pytest.mark.parametrize("compress", ["zlib", "zstd"])
+    def test_compress(self, compress):
+        serializer = CacheSerializer(codec="pickle", compress=compress, compress_threshold=100)
+        cache_data = serializer.dumps(self.data)
+        assert len(cache_data) < len(CacheSerializer(codec="pickle").dumps(self.data))
+        assert serializer.loads(cache_data) == self.data
+
+        # 小于阈值不压缩
+        assert serializer.dumps({"a": 1})[0] == serializer.codec.codec_id
+
+    def test_switch_codec(self):
+        # 根据头部字节解码，切换编码后旧的缓存值仍然可读
+        old_data = CacheSerializer(codec="msgpack", compress="zlib", compress_threshold=0).dumps({"a": 1})
+        assert CacheSerializer(codec="json").loads(old_data) == {"a": 1}
+
+        # 兼容未带头部的旧版本 json 缓存
+        assert CacheSerializer().loads(json.dumps({"a": 1}).encode()) == {"a": 1}
+
+    @pytest.mark.parametrize("codec", ["json", "orjson"])
+    def test_decode_responses_client(self, codec):
+        # decode_responses=True 的客户端读取到 str，文本编码的缓存值去掉头部后解码
+        proxy = RedisCacheProxy(fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True))
+        call_count = 0
+
+        @cache_json(cache_proxy=proxy, codec=codec)
+        def get_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id, "name": "惠"}
+
+        assert get_user(1) == get_user(1) == {"user_id": 1, "name": "惠"}
+        assert call_count == 1
+
+        # 二进制编码、压缩的缓存值无法通过 str 读取，装饰时报错
+        for kwargs in [{"codec": "msgpack"}, {"compress": "zlib"}]:
+            with pytest.raises(ValueError, match="decode_responses"):
+                cache_json(cache_proxy=proxy, **kwargs)(get_user)
+
+
+class TestTieredCacheProxy:
+    """二级缓存代理测试"""
+
+    def test_tiered_cache(self):
+        redis_server = fakeredis.FakeServer()
+        proxy_a = TieredCacheProxy(fakeredis.FakeRedis(server=redis_server))
+        proxy_b = TieredCacheProxy(fakeredis.FakeRedis(server=redis_server))
+        try:
+            proxy_a.set("key", {"v": 1}, ttl=60)
+            assert proxy_b.get("key") == {"v": 1}  # L2 命中回填 L1
+            assert proxy_b.get("key") == {"v": 1}  # L1 命中
+            assert proxy_b.get("none") is None
+            assert proxy_b.hit_stats()["l1_hits"] == 1
+            assert proxy_b.hit_stats()["l2_hits"] == 1
+            assert proxy_b.hit_stats()["misses"] == 1
+
+            # 其他节点更新后通过发布订阅驱逐本地 L1
+            proxy_a.set("key", {"v": 2}, ttl=60)
+            time.sleep(0.5)
+            assert proxy_b.get("key") == {"v": 2}
+        finally:
+            proxy_a.stop_subscribe()
+            proxy_b.stop_subscribe()
+
+    @pytest.mark.asyncio
+    async def test_async_tiered_cache(self):
+        call_count = 0
+        redis_server = fakeredis.FakeServer()
+        proxy_a = AsyncTieredCacheProxy(fakeredis.FakeAsyncRedis(server=redis_server))
+        proxy_b = AsyncTieredCacheProxy(fakeredis.FakeAsyncRedis(server=redis_server))
+
+        @cache_json(cache_proxy=proxy_a)
+        async def query_user(user_id):
+            nonlocal call_count
+            call_count += 1
+            return {"user_id": user_id}
+
+        try:
+            assert await query_user(1) == {"user_id": 1}
+            assert await query_user(1) == {"user_id": 1}
+            assert call_count == 1
+            assert proxy_a.hit_stats()["l1_hits"] == 1
+
+            await proxy_b.get("key")  # 启动订阅
+            await asyncio.sleep(0.1)
+            await proxy_b.set("key", {"v": 1}, ttl=60)
+            await proxy_a.set("key", {"v": 2}, ttl=60)
+            await asyncio.sleep(0.1)
+            assert await proxy_b.get("key") == {"v": 2}
+        finally:
+            await proxy_a.stop_subscribe()
+            await proxy_b.stop_subscribe()
+
+    @pytest.mark.parametrize("codec, created_at_type", [("pickle", datetime), ("json", str)])
+    def test_tiered_cache_codec(self, codec, created_at_type):
+        redis_server = fakeredis.FakeServer()
+        proxy_a = TieredCacheProxy(fakeredis.FakeRedis(server=redis_server), subscribe=False)
+        proxy_b = TieredCacheProxy(fakeredis.FakeRedis(server=redis_server), subscribe=False)
+
+        def query_user(user_id):
+            return {"user_id": user_id, "created_at": datetime(2024, 1, 1)}
+
+        # L2 使用装饰器的 codec，L1、L2 命中的结果类型一致
+        query_user_a = cache_json(cache_proxy=proxy_a, codec=codec)(query_user)
+        query_user_b = cache_json(cache_proxy=proxy_b, codec=codec)(query_user)
+        query_user_a(1)
+        assert isinstance(query_user_a(1)["created_at"], created_at_type)  # L1 命中
+        assert isinstance(query_user_b(1)["created_at"], created_at_type)  # L2 命中
+        assert (proxy_a.hit_stats()["l1_hits"], proxy_b.hit_stats()["l2_hits"]) == (1, 1)
+
+
+def _wait_until(predicate, timeout: float = 3):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "wait timeout"
+        time.sleep(0.01)
+
+
+class TestTrackingCacheProxy:
+    """客户端缓存代理测试（fakeredis 不支持 CLIENT TRACKING，直接投递失效消息）"""
+
+    def test_tracking_cache(self):
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        proxy = TrackingCacheProxy(redis_client, prefixes=["config:"], start=False)
+        proxy.tracking = True
+        redis_client.set("config:a", "1")
+        redis_client.set("user:1", "hui")
+
+        assert proxy.get("config:a") == b"1"
+        redis_client.set("config:a", "2")
+        assert proxy.get("config:a") == b"1"  # 本地命中，直到收到失效消息
+        assert proxy.get_many(["config:a", "config:b", "user:1"]) == [b"1", None, b"hui"]
+        assert proxy.hit_stats()["local_hits"] == 2
+        assert proxy.local_cache.size() == 2  # 不在跟踪前缀下的 key 不缓存
+
+        proxy._handle_invalidate_message([b"message", b"__redis__:invalidate", [b"config:a"]])
+        assert proxy.get("config:a") == b"2"
+
+        # FLUSHDB 等全部失效
+        proxy._handle_invalidate_message([b"message", b"__redis__:invalidate", None])
+        assert proxy.local_cache.size() == 0
+
+        # 自己写入时直接驱逐本地
+        proxy.get("config:a")
+        proxy.set("config:a", "3", ttl=60)
+        assert proxy.get("config:a") == b"3"
+
+    def test_tracking_disconnected(self):
+        # 跟踪连接建立失败时不缓存到本地，读取全部走 Redis
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        proxy = TrackingCacheProxy(redis_client, prefixes=["config:"], retry_interval=0.1)
+        try:
+            time.sleep(0.2)
+            redis_client.set("config:a", "1")
+            assert proxy.get("config:a") == b"1"
+            redis_client.set("config:a", "2")
+            assert proxy.get("config:a") == b"2"
+            assert proxy.hit_stats()["tracking"] is False
+        finally:
+            proxy.stop_tracking()
+
+    def test_tracking_conn_lost(self):
+        redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        proxy = TrackingCacheProxy(
+            redis_client, prefixes=["config:"], retry_interval=0.05, health_check_interval=0.05, start=False
+        )
+        proxy._tracking_command = lambda client_id: ["PING"]  # fakeredis 不支持 CLIENT TRACKING
+        proxy.start_tracking()
+        try:
+            _wait_until(lambda: proxy.tracking)
+            tracking_client_id = proxy._tracking_client_id
+            redis_client.set("config:a", "1")
+            proxy.get("config:a")
+            assert proxy.local_cache.size() == 1
+
+            # 跟踪连接断开（自动重连后的新连接没有开启跟踪）时清空本地缓存并重新建立跟踪
+            proxy._tracking_conn.disconnect()
+            _wait_until(lambda: proxy._tracking_client_id != tracking_client_id and proxy.tracking)
+            assert proxy.local_cache.size() == 0
+        finally:
+            proxy.stop_tracking()
+
+    @pytest.mark.asyncio
+    async def test_async_tracking_conn_lost(self):
+        redis_client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        proxy = AsyncTrackingCacheProxy(
+            redis_client, prefixes=["config:"], retry_interval=0.05, health_check_interval=0.05
+        )
+        proxy._tracking_command = lambda client_id: ["PING"]
+        await redis_client.set("config:a", "1")
+        await proxy.get("config:a")
+        try:
+            for _ in range(100):
+                if proxy.tracking:
+                    break
+                await asyncio.sleep(0.01)
+            tracking_client_id = proxy._tracking_client_id
+            await proxy.get("config:a")
+            assert proxy.local_cache.size() == 1
+
+            await proxy._tracking_conn.disconnect()
+            for _ in range(100):
+                if proxy._tracking_client_id != tracking_client_id and proxy.tracking:
+                    break
+                await asyncio.sleep(0.01)
+            assert proxy._tracking_client_id != tracking_client_id
+            assert proxy.local_cache.size() == 0
+        finally:
+            await proxy.stop_tracking()
+
+    @pytest.mark.asyncio
+    async def test_async_tracking_cache(self):
+        call_count = 0
+        redis_client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        proxy = AsyncTrackingCacheProxy(redis_client, prefixes=["test:cache_json"], start=False)
+        proxy.tracking = True
+
+        @cache_json(cache_proxy=proxy, key_prefix="test")
+        async def get_config(name):
+            nonlocal call_count
+            call_count += 1
+            return {"name": name}
+
+        assert await get_config("a") == {"name": "a"}
+        assert await get_config("a") == {"name": "a"}
+        assert call_count == 1
+        assert proxy.hit_stats()["local_hits"] == 1
+
+        # 读取 Redis 期间收到失效消息时不写入本地
+        seq = proxy._invalidate_seq
+        proxy._handle_invalidate_message([b"message", b"__redis__:invalidate", [b"test:cache_json:x"]])
+        proxy._local_set("test:cache_json:x", b"old", seq)
+        assert proxy.local_cache.get("test:cache_json:x") is None
+
+
+class TestCacheWarmUp:
+    """缓存预热测试"""
+
+    @pytest.fixture(autouse=True)
+    def isolate_warm_up_funcs(self):
+        # 预热注册表是全局的，每个用例使用独立的注册表
+        registered_funcs = dict(WARM_UP_FUNCS)
+        WARM_UP_FUNCS.clear()
+        yield
+        WARM_UP_FUNCS.clear()
+        WARM_UP_FUNCS.update(registered_funcs)
+
+    @pytest.mark.asyncio
+    async def test_warm_up(self):
+        running, max_running = 0, 0
+        query_ids = []
+
+        async def hot_user_ids():
+            for user_id in range(20):
+                yield user_id
+
+        @cache_json(cache_proxy=AsyncMemoryCacheProxy(LRUMemoryCache()), warm_up_args=hot_user_ids)
+        async def get_user(user_id):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            query_ids.append(user_id)
+            if user_id == 13:
+                raise ValueError("user not found")
+            return {"user_id": user_id}
+
+        @cache_json(warm_up_args=lambda: [{"name": "a"}, ("b",)])
+        def get_config(name):
+            query_ids.append(name)
+            return {"name": name}
+
+        stats = await warm_up(concurrency=5, funcs=[get_user, get_config])
+        assert (stats["functions"], stats["calls"], stats["errors"]) == (2, 21, 1)
+        assert max_running == 5
+
+        # 预热后命中缓存
+        query_count = len(query_ids)
+        assert await get_user(1) == {"user_id": 1}
+        assert get_config("b") == {"name": "b"}
+        assert len(query_ids) == query_count
+
+    @pytest.mark.asyncio
+    async def test_warm_up_l1(self):
+        redis_server = fakeredis.FakeServer()
+        proxy_a = AsyncTieredCacheProxy(fakeredis.FakeAsyncRedis(server=redis_server), subscribe=False)
+        proxy_b = AsyncTieredCacheProxy(fakeredis.FakeAsyncRedis(server=redis_server), subscribe=False)
+        sync_proxy = TieredCacheProxy(fakeredis.FakeRedis(server=redis_server), subscribe=False)
+
+        @cache_json(cache_proxy=proxy_a, distributed_lock=True, warm_up_args=lambda: range(10))
+        async def get_user(user_id):
+            return {"user_id": user_id}
+
+        @cache_json(cache_proxy=proxy_a, warm_up_args=lambda: range(10))
+        async def get_config(name):
+            return {"name": name}
+
+        # 空列表不预热任何函数
+        assert (await warm_up(funcs=[]))["functions"] == 0
+
+        await proxy_a.cache_client.set(f"{CACHE_KEY_PREFIX}:cache_json:other:lock", "token")
+        stats = await warm_up(funcs=[get_user], l1_proxies=[proxy_b, sync_proxy], hot_key_limit=5)
+        assert (stats["functions"], stats["calls"]) == (1, 10)
+        assert stats["l1_keys"] == 10
+        assert proxy_b.l1_cache.size() == 5 and sync_proxy.l1_cache.size() == 5
+        assert proxy_b.hit_stats()["l2_hits"] == 0  # 预热不计入命中统计